@@ -4,6 +4,7 @@ import pandas as pd
 from wsee.data import pipeline, explore
 from wsee.preprocessors import preprocessors
 from wsee.labeling.event_argument_role_lfs import *
+from wsee.preprocessors.pattern_event_processor import find_best_pattern_match
 
 
 class TestMixedNer(unittest.TestCase):
@@ -30,5 +31,27 @@ class TestMixedNer(unittest.TestCase):
         self.assertIsNotNone(event_role_rows)
 
 
+class TestEventPatterns(unittest.TestCase):
+
+    def setUp(self):
+        dataframes_path = '/Users/phuc/develop/python/wsee/tests/fixtures/dataframes.jsonl'
+        self.pd_df: pd.DataFrame = pd.read_json(dataframes_path, lines=True)
+
+    def test_pattern_match_index(self):
+        event_role_rows, _ = pipeline.build_event_role_examples(self.pd_df, n_cores=1)
+        for rules in [original_rules, general_location_rules]:
+            for idx, row in event_role_rows.iterrows():
+                trigger_spans = row.mixed_ner_spans[get_entity_idx(row.trigger['id'], row.entities)]
+                argument_spans = row.mixed_ner_spans[get_entity_idx(row.argument['id'], row.entities)]
+                best_rule, best_match = find_best_pattern_match(row.mixed_ner, rules, trigger_spans, argument_spans)
+                indexed_rule, indexed_match = get_pattern_match_index(row.mixed_ner, rules).find_best_match(
+                    trigger_spans, argument_spans)
+                self.assertIs(best_rule, indexed_rule)
+                if best_match is None:
+                    self.assertIsNone(indexed_match)
+                else:
+                    self.assertEqual(best_match.span(), indexed_match)
+
+
 if __name__ == '__main__':
     unittest.main()
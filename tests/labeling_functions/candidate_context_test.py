@@ -0,0 +1,81 @@
+import unittest
+
+import pandas as pd
+from snorkel.labeling import PandasLFApplier
+from wsee.labeling import event_trigger_lfs
+from wsee.labeling.candidate_context import candidate_context, candidate_memoized, labeling_function, \
+    reset_candidate_context
+from wsee.labeling.column_lfs import ColumnLFApplier
+
+
+class TestCandidateContext(unittest.TestCase):
+
+    def setUp(self):
+        reset_candidate_context()
+        self.calls = []
+
+        @labeling_function(pre=[])
+        def lf_long_trigger(x):
+            self.calls.append(('lf_long_trigger', x.trigger['id']))
+            return 1 if len(x.trigger['text']) > 3 else -1
+
+        @candidate_memoized
+        def trigger_starts_with(x, prefix):
+            self.calls.append(('trigger_starts_with', x.trigger['id'], prefix))
+            return x.trigger['text'].startswith(prefix)
+
+        @labeling_function(pre=[])
+        def lf_chained(x):
+            if lf_long_trigger(x) == 1 or trigger_starts_with(x, 'S'):
+                return 1
+            return -1
+
+        @labeling_function(pre=[])
+        def lf_negative(x):
+            return 0 if lf_long_trigger(x) == -1 and not trigger_starts_with(x, 'S') else -1
+
+        self.lfs = [lf_long_trigger, lf_chained, lf_negative]
+        self.trigger_starts_with = trigger_starts_with
+        entities = [{'id': 'e1', 'text': 'Stau'}, {'id': 'e2', 'text': 'aus'}, {'id': 'e3', 'text': 'Sperrung'}]
+        self.df = pd.DataFrame([{'id': 'doc1', 'text': 'Stau, aus, Sperrung', 'trigger': entity}
+                                for entity in entities])
+
+    def test_applier(self):
+        L = PandasLFApplier(self.lfs).apply(self.df, progress_bar=False)
+        self.assertEqual([[1, 1, -1], [-1, -1, 0], [1, 1, -1]], L.tolist())
+        # every labeling function and sub-predicate runs at most once per candidate
+        self.assertEqual([('lf_long_trigger', 'e1'),
+                          ('lf_long_trigger', 'e2'), ('trigger_starts_with', 'e2', 'S'),
+                          ('lf_long_trigger', 'e3')], self.calls)
+
+    def test_arguments(self):
+        cand = self.df.iloc[1]
+        self.assertFalse(self.trigger_starts_with(cand, 'S'))
+        self.assertTrue(self.trigger_starts_with(cand, 'a'))
+        self.assertFalse(self.trigger_starts_with(cand, 'S'))
+        self.assertEqual([('trigger_starts_with', 'e2', 'S'), ('trigger_starts_with', 'e2', 'a')], self.calls)
+
+    def test_modified_candidate(self):
+        cand = self.df.iloc[1].copy()
+        self.assertEqual(-1, self.lfs[0](cand))
+        cand['trigger'] = {'id': 'e2', 'text': 'Ausfall'}
+        reset_candidate_context()
+        self.assertEqual(1, self.lfs[0](cand))
+
+    def test_applier_reset(self):
+        ColumnLFApplier(self.lfs).apply(self.df, progress_bar=False)
+        # the last candidate changes but keeps its ids, the next applier run must not reuse its memoized labels
+        modified_df = self.df.iloc[2:].copy()
+        modified_df['trigger'] = [{'id': 'e3', 'text': 'S'}]
+        L = ColumnLFApplier(self.lfs).apply(modified_df, progress_bar=False)
+        self.assertEqual([[-1, 1, -1]], L.tolist())
+
+    def test_keyword_scorer_reset(self):
+        self.lfs[0](self.df.iloc[0])
+        self.assertTrue(candidate_context['results'])
+        event_trigger_lfs.set_keyword_scorer(event_trigger_lfs.keyword_scorer)
+        self.assertFalse(candidate_context['results'])
+
+
+if __name__ == '__main__':
+    unittest.main()
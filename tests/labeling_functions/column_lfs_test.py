@@ -0,0 +1,66 @@
+import unittest
+
+import pandas as pd
+from snorkel.labeling import PandasLFApplier
+from wsee.labeling import event_argument_role_lfs
+from wsee.labeling.candidate_context import labeling_function
+from wsee.labeling.column_lfs import ColumnLabelingFunction, ColumnLFApplier
+from wsee.utils import utils
+
+
+class TestColumnLabelingFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame([
+            {'between_distance': 3, 'separate_sentence': False, 'entity_type': 'location_city'},
+            {'between_distance': 45, 'separate_sentence': False, 'entity_type': 'date'},
+            {'between_distance': -1, 'separate_sentence': True, 'entity_type': 'location_route'},
+            {'between_distance': 12, 'separate_sentence': True, 'entity_type': 'distance'}
+        ])
+
+        @labeling_function(pre=[])
+        def lf_close_location(x):
+            return 1 if x.between_distance < 10 and x.entity_type.startswith('location') else -1
+
+        self.lfs = [
+            event_argument_role_lfs.lf_too_far_40,
+            lf_close_location,
+            event_argument_role_lfs.lf_somajo_separate_sentence_or_too_far_40,
+            ColumnLabelingFunction('lf_route_same_sentence', 2,
+                                   [('entity_type', 'in', ['location_route', 'location']),
+                                    ('separate_sentence', '==', False)]),
+            ColumnLabelingFunction('lf_no_route', 3, [('entity_type', 'not in', {'location_route'}),
+                                                      ('between_distance', '>=', 0)])
+        ]
+
+    def test_applier(self):
+        L = ColumnLFApplier(self.lfs).apply(self.df, progress_bar=False)
+        self.assertEqual([[-1, 1, -1, -1, 3],
+                          [10, -1, 10, -1, 3],
+                          [-1, 1, 10, -1, -1],
+                          [-1, -1, 10, -1, 3]], L.tolist())
+        # same labels as applying all labeling functions row by row
+        self.assertEqual(PandasLFApplier(self.lfs).apply(self.df, progress_bar=False).tolist(), L.tolist())
+
+    def test_data_point(self):
+        cand = utils.Candidate({'between_distance': 41, 'separate_sentence': False})
+        self.assertEqual(10, event_argument_role_lfs.lf_too_far_40(cand))
+        self.assertEqual(-1, event_argument_role_lfs.lf_overlapping(cand))
+
+    def test_fault_tolerant(self):
+        lfs = [event_argument_role_lfs.lf_too_far_40, event_argument_role_lfs.lf_multiple_same_event_type]
+        with self.assertRaises(KeyError):
+            ColumnLFApplier(lfs).apply(self.df, progress_bar=False)
+        L, meta = ColumnLFApplier(lfs).apply(self.df, progress_bar=False, fault_tolerant=True, return_meta=True)
+        self.assertEqual([[-1, -1], [10, -1], [-1, -1], [-1, -1]], L.tolist())
+        self.assertEqual({'lf_multiple_same_event_type': 4}, meta.faults)
+
+    def test_invalid_conditions(self):
+        with self.assertRaises(ValueError):
+            ColumnLabelingFunction('lf_invalid', 1, [('between_distance', '=>', 40)])
+        with self.assertRaises(ValueError):
+            ColumnLabelingFunction('lf_invalid', 1, [('between_distance', '>', 40)], combine='none')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from snorkel.labeling import LFAnalysis
+from wsee.labeling import lf_analysis
+
+
+class TestLFAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.L = np.array([
+            [0, -1, 1, -1],
+            [0, 0, -1, -1],
+            [-1, -1, -1, -1],
+            [2, -1, 2, 1],
+            [-1, 1, -1, -1],
+            [0, -1, -1, 1]
+        ])
+        self.Y = np.array([0, 0, 1, 2, -1, 1])
+        self.lf_names = ['lf_a', 'lf_b', 'lf_c', 'lf_d']
+
+    def test_lf_summary(self):
+        statistics = lf_analysis.get_lf_statistics(self.L, cardinality=3, Y=self.Y, chunk_size=4)
+        summary = lf_analysis.get_lf_summary(statistics, self.lf_names)
+        expected = LFAnalysis(self.L).lf_summary()
+        for column in ['Polarity', 'Coverage', 'Overlaps', 'Conflicts']:
+            self.assertEqual(expected[column].tolist(), summary[column].tolist())
+        self.assertEqual(LFAnalysis(self.L).label_coverage(), lf_analysis.get_label_coverage(statistics))
+        # the vote of lf_b on the data point without a gold label does not count towards the accuracy
+        self.assertEqual([3, 1, 1, 1], summary['Correct'].tolist())
+        self.assertEqual([1, 0, 1, 1], summary['Incorrect'].tolist())
+        self.assertEqual([0.75, 1.0, 0.5, 0.5], summary['Emp. Acc.'].tolist())
+
+    def test_lf_class_summary(self):
+        statistics = lf_analysis.get_lf_statistics(self.L, cardinality=3, Y=self.Y)
+        class_summary = lf_analysis.get_lf_class_summary(statistics, self.lf_names, ['O', 'delay', 'location'])
+        self.assertEqual(3, class_summary.loc[('lf_a', 'O'), 'Votes'])
+        self.assertEqual(1.0, class_summary.loc[('lf_a', 'location'), 'Precision'])
+        self.assertEqual(2 / 3, class_summary.loc[('lf_a', 'O'), 'Precision'])
+        self.assertEqual(1.0, class_summary.loc[('lf_a', 'O'), 'Recall'])
+        self.assertEqual(0.5, class_summary.loc[('lf_d', 'delay'), 'Recall'])
+        self.assertNotIn(('lf_b', 'location'), class_summary.index)
+
+        # without gold labels only the vote statistics are reported
+        statistics = lf_analysis.get_lf_statistics(self.L, cardinality=3)
+        self.assertNotIn('Precision', lf_analysis.get_lf_class_summary(statistics, self.lf_names))
+        self.assertNotIn('Emp. Acc.', lf_analysis.get_lf_summary(statistics, self.lf_names))
+
+    def test_label_matrix_formats(self):
+        expected = lf_analysis.get_lf_summary(lf_analysis.get_lf_statistics(self.L, 3, Y=self.Y))
+        sparse_L = lf_analysis.to_sparse_label_matrix(self.L)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            npy_path = Path(tmp_dir).joinpath('L.npy')
+            np.save(npy_path, self.L)
+            npz_path = Path(tmp_dir).joinpath('L.npz')
+            lf_analysis.save_sparse_label_matrix(self.L, npz_path)
+            chunks = [sparse_L[:3], self.L[3:]]
+            for L in [sparse_L, npy_path, npz_path, chunks]:
+                statistics = lf_analysis.get_lf_statistics(L, 3, Y=self.Y, chunk_size=2)
+                self.assertTrue(expected.equals(lf_analysis.get_lf_summary(statistics)))
+
+    def test_misaligned_gold_labels(self):
+        with self.assertRaises(ValueError):
+            lf_analysis.get_lf_statistics(self.L, 3, Y=self.Y[:-1])
+        with self.assertRaises(ValueError):
+            lf_analysis.get_lf_statistics(self.L, 3, Y=np.append(self.Y, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
 import pandas as pd
+from fuzzywuzzy import process
 from wsee.labeling.event_trigger_lfs import *
 
 
@@ -13,6 +14,31 @@ class TestKeyword(unittest.TestCase):
     def test_keyword(self):
         self.assertEqual(True, False)
 
+    def test_keyword_score_table(self):
+        trigger_texts = [entity['text'] for entities in self.pd_df['entities'] for entity in entities
+                         if entity['entity_type'] == 'trigger']
+        keyword_score_table.clear()
+        add_keyword_scores(trigger_texts)
+        self.assertEqual(set(trigger_texts), set(keyword_score_table))
+        for text in trigger_texts:
+            for name, keywords in keyword_lists.items():
+                expected_score = fuzzy_matching.fuzzywuzzy_scorer([text], keywords)[0]
+                if expected_score >= fuzzy_matching.EXACT_SCORE_CUTOFF:
+                    self.assertEqual(expected_score, get_keyword_score(text, name))
+                else:
+                    self.assertLess(get_keyword_score(text, name), fuzzy_matching.EXACT_SCORE_CUTOFF)
+        # texts that were not scored beforehand are scored on demand
+        self.assertEqual(100, get_keyword_score('Stau', 'trafficjam_keywords'))
+        self.assertIn('Stau', keyword_score_table)
+
+    def test_fuzzywuzzy_keyword_scorer(self):
+        set_keyword_scorer('fuzzywuzzy')
+        try:
+            self.assertEqual(process.extractOne('Verspätungen', delay_keywords)[1],
+                             get_keyword_score('Verspätungen', 'delay_keywords'))
+        finally:
+            set_keyword_scorer(fuzzy_matching.DEFAULT_KEYWORD_SCORER)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,92 @@
+import pickle
+import unittest
+
+import pandas as pd
+from wsee.data import document_model, pipeline
+from wsee.labeling import event_argument_role_lfs
+from wsee.labeling.candidate_context import reset_candidate_context
+
+
+class TestDocumentModel(unittest.TestCase):
+
+    def setUp(self):
+        dataframes_path = '/Users/phuc/develop/python/wsee/tests/fixtures/dataframes.jsonl'
+        self.pd_df: pd.DataFrame = pd.read_json(dataframes_path, lines=True)
+        self.entities = [
+            {'id': 'e1', 'text': 'Stau', 'start': 0, 'end': 1, 'char_start': 0, 'char_end': 4,
+             'entity_type': 'trigger'},
+            {'id': 'e2', 'text': 'A1', 'start': 3, 'end': 4, 'entity_type': 'location_route'},
+            {'id': 'e3', 'text': 'Müller', 'start': 6, 'end': 7, 'char_start': 30, 'char_end': 36,
+             'entity_type': 'unknown_type', 'score': 0.5}
+        ]
+
+    def test_entity_table(self):
+        table = document_model.compact_entities(self.entities)
+        self.assertEqual(3, len(table))
+        self.assertEqual(self.entities, table)
+        self.assertEqual(self.entities, document_model.expand_entities(table))
+        self.assertEqual('trigger', table[0]['entity_type'])
+        self.assertEqual(3, table[1]['start'])
+        self.assertNotIn('char_start', table[1])
+        self.assertIsNone(table[1].get('char_start'))
+        self.assertEqual('unknown_type', table[-1]['entity_type'])
+        self.assertEqual(0.5, table[2]['score'])
+        self.assertEqual(len(document_model.ENTITY_TYPES), table.get_type_id('unknown_type'))
+        self.assertEqual(-1, table.get_type_id('other_type'))
+
+        unpickled_table = pickle.loads(pickle.dumps(table))
+        self.assertEqual(table, unpickled_table)
+        unpickled_entity = pickle.loads(pickle.dumps(table[2]))
+        self.assertEqual(self.entities[2], unpickled_entity)
+
+    def test_role_examples(self):
+        event_role_rows, _ = pipeline.build_event_role_examples(self.pd_df.copy(), n_cores=1)
+        compact_event_role_rows, _ = pipeline.build_event_role_examples(self.pd_df.copy(), n_cores=1,
+                                                                        compact_entities=True)
+        self.assertIsInstance(compact_event_role_rows.iloc[0]['entities'], document_model.EntityTable)
+        for (_, row), (_, compact_row) in zip(event_role_rows.iterrows(), compact_event_role_rows.iterrows()):
+            self.assertEqual(row.trigger, compact_row.trigger)
+            self.assertEqual(row.argument, compact_row.argument)
+            self.assertEqual(event_argument_role_lfs.lf_start_location_type(row),
+                             event_argument_role_lfs.lf_start_location_type(compact_row))
+
+
+class TestTagEncoding(unittest.TestCase):
+
+    def test_ner_tags(self):
+        ner_tags = ['O', 'B-LOCATION_STREET', 'B-LOCATION_CITY', 'I-LOCATION_CITY', 'B-DATE', 'B-FOO', 'O']
+        codes = document_model.encode_ner_tags(ner_tags)
+        self.assertEqual(len(ner_tags), len(codes))
+        self.assertEqual(document_model.OUTSIDE_NER_TYPE_ID, codes[0])
+        # same type id with different BIO prefixes
+        self.assertEqual(codes[2] & document_model.NER_TYPE_ID_MASK, codes[3] & document_model.NER_TYPE_ID_MASK)
+        self.assertNotEqual(codes[2], codes[3])
+        self.assertEqual(document_model.UNKNOWN_NER_TYPE_ID, codes[5] & document_model.NER_TYPE_ID_MASK)
+
+        self.assertEqual([False, True, True, True, False, False, False],
+                         [document_model.is_location_at(codes, k) for k in range(len(codes))])
+        date_mask = document_model.get_ner_type_mask(['DATE'])
+        self.assertTrue(document_model.has_ner_type_at(codes, -3, date_mask))
+        self.assertFalse(document_model.has_ner_type_at(codes, -1, date_mask))
+
+    def test_direction_pattern(self):
+        tokens = ['A1', 'Münster', '-', 'Köln']
+        ner_tag_codes = document_model.encode_ner_tags(['B-LOCATION_STREET', 'B-LOCATION_CITY', 'O', 'B-LOCATION_CITY'])
+        argument = {'start': 3, 'end': 4}
+        self.assertTrue(event_argument_role_lfs.has_direction_pattern(
+            event_argument_role_lfs.get_windowed_left_tokens(argument, tokens),
+            event_argument_role_lfs.get_windowed_left_ner(argument, ner_tag_codes)))
+
+    def test_cand_ner_tag_codes(self):
+        reset_candidate_context()
+        cand = pd.Series({'id': 'doc1', 'trigger': {'id': 'e1'}, 'argument': {'id': 'e2'},
+                          'ner_tags': ['B-LOCATION_STREET', 'O', 'B-LOCATION_CITY']})
+        ner_tag_codes = event_argument_role_lfs.get_cand_ner_tag_codes(cand)
+        self.assertEqual(document_model.encode_ner_tags(cand['ner_tags']).tolist(), ner_tag_codes.tolist())
+        # the tags of a candidate without precomputed codes are only encoded once
+        self.assertIs(ner_tag_codes, event_argument_role_lfs.get_cand_ner_tag_codes(cand))
+        reset_candidate_context()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from wsee.utils import fuzzy_matching
+
+
+class TestFuzzyMatching(unittest.TestCase):
+
+    def setUp(self):
+        self.keywords = ['Verspätung', 'verspäten', 'Wartezeit', 'Stau', 'kein Zugverkehr']
+        self.texts = ['Verspätung', 'Verspätungen', 'verspätet', '#Stau', 'Staus', 'Zugverkehr', 'Berlin', '', '...']
+
+    def test_fuzzywuzzy_scorer(self):
+        self.assertEqual([100, 89], fuzzy_matching.fuzzywuzzy_scorer(['Stau', 'Staus'], ['Stau']))
+
+    @unittest.skipIf('rapidfuzz' not in fuzzy_matching.keyword_scorers, 'rapidfuzz is not installed')
+    def test_rapidfuzz_scorer(self):
+        expected_scores = fuzzy_matching.fuzzywuzzy_scorer(self.texts, self.keywords)
+        scores = fuzzy_matching.rapidfuzz_scorer(self.texts, self.keywords)
+        self.assertEqual(len(self.texts), len(scores))
+        for text, expected_score, score in zip(self.texts, expected_scores, scores):
+            if expected_score >= fuzzy_matching.EXACT_SCORE_CUTOFF or score >= fuzzy_matching.EXACT_SCORE_CUTOFF:
+                self.assertEqual(expected_score, score, text)
+        self.assertEqual([], fuzzy_matching.rapidfuzz_scorer([], self.keywords))
+
+    def test_unknown_scorer(self):
+        with self.assertRaises(ValueError):
+            fuzzy_matching.get_keyword_scorer('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
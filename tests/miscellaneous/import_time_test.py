@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import unittest
+
+from wsee.labeling import event_argument_role_lfs
+
+# Budget for importing the labeling functions on top of snorkel, which is imported beforehand
+LABELING_IMPORT_TIME_LIMIT = 0.5
+
+
+def measure_import(module, checks='None'):
+    """
+    Imports a module in a fresh interpreter.
+    :param module: Module name.
+    :param checks: Expression evaluated after the import, e.g. to check the state of lazily loaded resources.
+    :return: Import time in seconds, names of the imported modules and the value of the checks.
+    """
+    code = '; '.join([
+        'import sys, time',
+        'import snorkel.labeling',
+        'start = time.perf_counter()',
+        f'import {module}',
+        'print(time.perf_counter() - start)',
+        f'print({checks})',
+        'print(",".join(sys.modules))'
+    ])
+    output = subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout.strip().split('\n')
+    return float(output[-3]), set(output[-1].split(',')), output[-2]
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_preprocessors(self):
+        _, modules, _ = measure_import('wsee.preprocessors.preprocessors')
+        self.assertNotIn('spacy', modules)
+        self.assertNotIn('somajo', modules)
+
+    def test_labeling_functions(self):
+        import_time, modules, loaded = measure_import(
+            'wsee.labeling.event_argument_role_lfs',
+            checks='[resource.loaded for resource in [wsee.labeling.event_argument_role_lfs.original_rules, '
+                   'wsee.labeling.event_argument_role_lfs.general_location_rules, '
+                   'wsee.labeling.event_argument_role_lfs.traffic_event_causes]]')
+        self.assertNotIn('spacy', modules)
+        self.assertNotIn('somajo', modules)
+        self.assertEqual('[False, False, False]', loaded)
+        self.assertLess(import_time, LABELING_IMPORT_TIME_LIMIT)
+
+    def test_load_resources(self):
+        event_argument_role_lfs.load_resources()
+        self.assertTrue(event_argument_role_lfs.original_rules.loaded)
+        self.assertTrue(event_argument_role_lfs.traffic_event_causes.loaded)
+        self.assertGreater(len(event_argument_role_lfs.general_location_rules), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
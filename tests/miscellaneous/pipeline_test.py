@@ -2,8 +2,10 @@ import unittest
 
 import pandas as pd
 import numpy as np
+from snorkel.labeling import PandasLFApplier
 from wsee.utils import utils
 from wsee.data import pipeline
+from wsee.labeling import event_trigger_lfs
 
 
 class TestPipeline(unittest.TestCase):
@@ -30,6 +32,27 @@ class TestPipeline(unittest.TestCase):
         merged_role_examples = pipeline.merge_event_role_examples(event_role_examples, role_class_probs)
         self.assertEqual(4, len(merged_role_examples))
 
+    def test_trigger_votes(self):
+        event_trigger_rows, _ = pipeline.build_event_trigger_examples(self.pd_df.copy(), n_cores=1)
+        trigger_lfs = pipeline.get_trigger_list_lfs()
+        L_trigger = PandasLFApplier(trigger_lfs).apply(event_trigger_rows, progress_bar=False)
+        trigger_votes = pipeline.get_label_matrix_trigger_votes(event_trigger_rows, L_trigger, trigger_lfs)
+        self.assertEqual(len(event_trigger_rows), len(trigger_votes))
+        # only the votes that are part of the trigger label matrix, the rest is computed in the role preprocessing
+        trigger_lf_names = {lf.name for lf in trigger_lfs}
+        for votes in trigger_votes.values():
+            self.assertTrue(votes)
+            self.assertTrue(set(votes) <= trigger_lf_names)
+
+        event_role_rows, _ = pipeline.build_event_role_examples(self.pd_df.copy(), n_cores=1)
+        reused_event_role_rows, _ = pipeline.build_event_role_examples(self.pd_df.copy(), n_cores=1,
+                                                                       trigger_votes=trigger_votes)
+        for (_, row), (_, reused_row) in zip(event_role_rows.iterrows(), reused_event_role_rows.iterrows()):
+            self.assertEqual(event_trigger_lfs.get_trigger_votes(row), row.trigger_votes)
+            self.assertEqual(row.trigger_votes, reused_row.trigger_votes)
+            self.assertEqual(row.not_an_event, reused_row.not_an_event)
+            self.assertEqual(row.arg_location_type_event_type_match, reused_row.arg_location_type_event_type_match)
+
     def test_build_training_data(self):
         merged_examples = pipeline.build_training_data(self.pd_df)
         self.assertIsNotNone(merged_examples)
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from snorkel.labeling import LabelModel
+from wsee.data import pipeline
+from wsee.predictors import snorkel_predictor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+
+class TestSnorkelPredictor(unittest.TestCase):
+
+    def setUp(self):
+        dataframes_path = os.path.join(FIXTURES_DIR, 'dataframes.jsonl')
+        self.pd_df: pd.DataFrame = pd.read_json(dataframes_path, lines=True)
+        trigger_lfs = pipeline.get_trigger_list_lfs()
+        role_lfs = pipeline.get_role_list_lfs()
+        self.trigger_label_model = LabelModel(cardinality=8)
+        self.trigger_label_model.fit(np.full((1, len(trigger_lfs)), -1), n_epochs=1, seed=42)
+        self.role_label_model = LabelModel(cardinality=11)
+        self.role_label_model.fit(np.full((1, len(role_lfs)), -1), n_epochs=1, seed=42)
+
+    def test_predict_document(self):
+        documents = self.pd_df[['id', 'text', 'tokens', 'pos_tags', 'ner_tags', 'entities']]
+        expected = snorkel_predictor.predict_documents(documents, self.trigger_label_model, self.role_label_model)
+        for (_, document), (_, expected_document) in zip(documents.iterrows(), expected.iterrows()):
+            labeled_document = snorkel_predictor.predict_document(document.to_dict(), self.trigger_label_model,
+                                                                  self.role_label_model)
+            self.assertEqual(expected_document['events'], labeled_document['events'])
+
+    def write_jsonl(self, tmp_dir, documents):
+        input_path = Path(tmp_dir).joinpath('documents.jsonl')
+        with open(input_path, 'w', encoding='utf8') as input_file:
+            for document in documents:
+                input_file.write(json.dumps(document, ensure_ascii=False) + '\n')
+                # blank lines are skipped
+                input_file.write('\n')
+        return input_path
+
+    def test_predict_jsonl(self):
+        keys = ['id', 'text', 'tokens', 'pos_tags', 'ner_tags', 'entities']
+        documents = []
+        for i in range(3):
+            for document in self.pd_df[keys].to_dict('records'):
+                documents.append(dict(document, id=f"{document['id']}-{i}"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = Path(tmp_dir)
+            self.trigger_label_model.save(model_path.joinpath('trigger_lm.pt'))
+            self.role_label_model.save(model_path.joinpath('role_lm.pt'))
+            input_path = self.write_jsonl(tmp_dir, documents)
+            # one worker labels the documents in the main process, more workers keep the input order
+            for n_workers, batch_size in [(1, 64), (2, 2), (2, 5)]:
+                output_path = Path(tmp_dir).joinpath(f'predicted-{n_workers}-{batch_size}.jsonl')
+                num_docs = snorkel_predictor.predict_jsonl(input_path, output_path, model_path,
+                                                           batch_size=batch_size, n_workers=n_workers)
+                with open(output_path, 'r', encoding='utf8') as output_file:
+                    labeled_documents = [json.loads(line) for line in output_file]
+                self.assertEqual(len(documents), num_docs)
+                self.assertEqual([document['id'] for document in documents],
+                                 [document['id'] for document in labeled_documents])
+                self.assertTrue(all('events' in document for document in labeled_documents))
+
+            # errors of a worker are raised without labeling the remaining batches
+            invalid_input_path = self.write_jsonl(tmp_dir, [{'id': 'invalid', 'text': 'Stau auf der A1'}] + documents)
+            with self.assertRaises(KeyError):
+                snorkel_predictor.predict_jsonl(invalid_input_path, Path(tmp_dir).joinpath('invalid.jsonl'),
+                                                model_path, batch_size=1, n_workers=2)
+
+    def test_main_missing_paths(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = self.write_jsonl(tmp_dir, [])
+            missing_path = str(Path(tmp_dir).joinpath('missing'))
+            for args in [argparse.Namespace(input_path=missing_path, model_path=tmp_dir),
+                         argparse.Namespace(input_path=str(input_path), model_path=missing_path)]:
+                with self.assertRaisesRegex(FileNotFoundError, missing_path):
+                    snorkel_predictor.main(args)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+import pandas as pd
+from wsee.data.document_model import compact_entities
+from wsee.preprocessors.memoization import memoized_preprocessor, CANDIDATE_LEVEL
+
+
+class TestMemoizedPreprocessor(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        @memoized_preprocessor(fields=['num_entities'], maxsize=2)
+        def pre_num_entities(cand):
+            self.calls.append(cand['id'])
+            cand['num_entities'] = len(cand['entities'])
+            return cand
+
+        @memoized_preprocessor(fields=['pair'], level=CANDIDATE_LEVEL)
+        def pre_pair(cand):
+            self.calls.append((cand['trigger']['id'], cand['argument']['id']))
+            cand['pair'] = cand['trigger']['text'] + ' ' + cand['argument']['text']
+            return cand
+
+        self.pre_num_entities = pre_num_entities
+        self.pre_pair = pre_pair
+        entities = [{'id': 'e1', 'text': 'Stau'}, {'id': 'e2', 'text': 'A1'}, {'id': 'e3', 'text': 'Berlin'}]
+        self.doc = {'id': 'doc1', 'text': 'Stau auf der A1 bei Berlin', 'entities': entities}
+
+    def get_cand(self, doc, trigger_idx, argument_idx):
+        return pd.Series(dict(doc, trigger=doc['entities'][trigger_idx], argument=doc['entities'][argument_idx]))
+
+    def test_document_level(self):
+        first = self.pre_num_entities(self.get_cand(self.doc, 0, 1))
+        second = self.pre_num_entities(self.get_cand(self.doc, 0, 2))
+        self.assertEqual(['doc1'], self.calls)
+        self.assertEqual(3, first['num_entities'])
+        self.assertEqual(3, second['num_entities'])
+        # the candidate specific fields are not taken from the cache
+        self.assertEqual('e3', second['argument']['id'])
+
+    def test_candidate_level(self):
+        cand = self.get_cand(self.doc, 0, 1)
+        self.assertEqual('Stau A1', self.pre_pair(cand)['pair'])
+        self.assertEqual('Stau Berlin', self.pre_pair(self.get_cand(self.doc, 0, 2))['pair'])
+        self.assertEqual('Stau A1', self.pre_pair(cand)['pair'])
+        self.assertEqual([('e1', 'e2'), ('e1', 'e3')], self.calls)
+        # the input DataPoint is not modified
+        self.assertNotIn('pair', cand)
+
+    def test_entity_dependent(self):
+        @memoized_preprocessor(fields=['entity_types'], entity_dependent=True)
+        def pre_entity_types(cand):
+            self.calls.append(cand['id'])
+            cand['entity_types'] = [entity.get('entity_type') for entity in cand['entities']]
+            return cand
+
+        self.assertEqual([None, None, None], pre_entity_types(self.get_cand(self.doc, 0, 1))['entity_types'])
+        self.assertEqual([None, None, None], pre_entity_types(self.get_cand(self.doc, 0, 2))['entity_types'])
+        self.assertEqual(['doc1'], self.calls)
+        # same document id and text, but edited entities
+        entities = [dict(entity, entity_type='location') for entity in self.doc['entities']]
+        edited_doc = dict(self.doc, entities=entities)
+        self.assertEqual(['location'] * 3, pre_entity_types(self.get_cand(edited_doc, 0, 1))['entity_types'])
+        self.assertEqual(['location'] * 3, pre_entity_types(self.get_cand(edited_doc, 0, 2))['entity_types'])
+        self.assertEqual(['doc1', 'doc1'], self.calls)
+        # compact entities are keyed on their texts, spans and types as well
+        compact_doc = dict(edited_doc, entities=compact_entities(entities))
+        self.assertEqual(['location'] * 3, pre_entity_types(self.get_cand(compact_doc, 0, 1))['entity_types'])
+        entities[1]['end'] = 2
+        compact_doc = dict(edited_doc, entities=compact_entities(entities))
+        pre_entity_types(self.get_cand(compact_doc, 0, 1))
+        self.assertEqual(['doc1', 'doc1', 'doc1', 'doc1'], self.calls)
+
+    def test_lru_eviction(self):
+        docs = [dict(self.doc, id=f'doc{i}') for i in range(1, 4)]
+        for doc in docs:
+            self.pre_num_entities(self.get_cand(doc, 0, 1))
+        self.pre_num_entities(self.get_cand(docs[2], 0, 1))
+        self.pre_num_entities(self.get_cand(docs[0], 0, 1))
+        self.assertEqual(['doc1', 'doc2', 'doc3', 'doc1'], self.calls)
+        self.pre_num_entities.reset_cache()
+        self.pre_num_entities(self.get_cand(docs[2], 0, 1))
+        self.assertEqual(['doc1', 'doc2', 'doc3', 'doc1', 'doc3'], self.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
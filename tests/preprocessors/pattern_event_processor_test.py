@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+from wsee.data import pipeline
+from wsee.labeling.event_argument_role_lfs import ROOT_DIR, original_rules, general_location_rules
+from wsee.preprocessors import pattern_event_processor
+
+
+class TestPatternEventProcessor(unittest.TestCase):
+
+    def setUp(self):
+        dataframes_path = '/Users/phuc/develop/python/wsee/tests/fixtures/dataframes.jsonl'
+        self.pd_df: pd.DataFrame = pd.read_json(dataframes_path, lines=True)
+
+    def test_convert_to_regex(self):
+        regex = pattern_event_processor.convert_to_regex('TRIGGER auf #LOCATION:')
+        self.assertIsNotNone(regex.fullmatch('TRIGGER auf\nLOCATION_CITY:'))
+        self.assertIsNotNone(regex.fullmatch('TRIGGER auf #LOCATION:'))
+        self.assertIsNone(regex.fullmatch('TRIGGER in LOCATION:'))
+
+    def test_replace_whitespace(self):
+        # every whitespace character becomes a whitespace class, other characters are kept
+        self.assertEqual('TRIGGER[\\s]auf[\\s][\\s]LOCATION',
+                         pattern_event_processor.replace_whitespace('TRIGGER auf\t\nLOCATION'))
+        self.assertEqual('TRIGGER', pattern_event_processor.replace_whitespace('TRIGGER'))
+
+    def test_required_literals(self):
+        self.assertEqual(['TRIGGER', 'auf', 'LOCATION', ':', 'LOCATION_CITY'],
+                         pattern_event_processor.get_required_literals('TRIGGER auf #LOCATION: LOCATION_CITY'))
+        for rules in [original_rules, general_location_rules]:
+            for p, rule in rules.items():
+                self.assertTrue(rule.literals)
+
+    def test_literal_prefilter(self):
+        event_role_rows, _ = pipeline.build_event_role_examples(self.pd_df, n_cores=1)
+        for rules in [original_rules, general_location_rules]:
+            prefilter = pattern_event_processor.get_literal_prefilter(rules)
+            self.assertIs(prefilter, pattern_event_processor.get_literal_prefilter(rules))
+            for mixed_ner in set(event_role_rows['mixed_ner']):
+                candidate_patterns = prefilter.get_candidate_patterns(mixed_ner)
+                self.assertLess(len(candidate_patterns), len(rules))
+                # rules that were filtered out do not match
+                for p in rules:
+                    if p not in candidate_patterns:
+                        self.assertIsNone(p.search(mixed_ner))
+
+    def test_literal_prefilter_cache(self):
+        rules = dict(original_rules)
+        prefilter = pattern_event_processor.get_literal_prefilter(rules)
+        self.assertIs(prefilter, pattern_event_processor.get_literal_prefilter(rules))
+        # rule sets that are changed in place get a new prefilter
+        p, rule = next(iter(rules.items()))
+        del rules[p]
+        self.assertIsNot(prefilter, pattern_event_processor.get_literal_prefilter(rules))
+        self.assertNotIn(p, pattern_event_processor.get_literal_prefilter(rules).get_candidate_patterns(p.pattern))
+        # the cache does not grow with the number of rule sets
+        for _ in range(2 * pattern_event_processor.LITERAL_PREFILTER_CACHE_SIZE):
+            pattern_event_processor.get_literal_prefilter(dict(general_location_rules))
+        self.assertLessEqual(len(pattern_event_processor.literal_prefilter_cache),
+                             pattern_event_processor.LITERAL_PREFILTER_CACHE_SIZE)
+
+    @unittest.skipIf(pattern_event_processor.ahocorasick is None, 'pyahocorasick is not installed')
+    def test_literal_automaton(self):
+        event_role_rows, _ = pipeline.build_event_role_examples(self.pd_df, n_cores=1)
+        mixed_ners = set(event_role_rows['mixed_ner']) | {'', 'LOCATION_CITYLOCATION_STREET', 'TRIGGER auf\nLOCATION'}
+        for rules in [original_rules, general_location_rules]:
+            automaton_prefilter = pattern_event_processor.LiteralPrefilter(rules)
+            substring_prefilter = pattern_event_processor.LiteralPrefilter(rules, use_automaton=False)
+            self.assertIsNotNone(automaton_prefilter.automaton)
+            self.assertIsNone(substring_prefilter.automaton)
+            for mixed_ner in mixed_ners:
+                self.assertEqual(substring_prefilter.find_literals(mixed_ner),
+                                 automaton_prefilter.find_literals(mixed_ner))
+
+    def test_rules_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pattern_file = Path(tmp_dir).joinpath('event-patterns.txt')
+            shutil.copy(ROOT_DIR.joinpath('event-patterns-phuc.txt'), pattern_file)
+            cache_dir = Path(tmp_dir).joinpath('cache')
+
+            rules = pattern_event_processor.parse_pattern_file(pattern_file, cache_dir=cache_dir)
+            cache_path = pattern_event_processor.get_rules_cache_path(pattern_file, cache_dir)
+            self.assertTrue(cache_path.exists())
+            self.assertEqual([cache_path], list(cache_path.parent.iterdir()))
+            cached_rules = pattern_event_processor.parse_pattern_file(pattern_file, cache_dir=cache_dir)
+            self.assertEqual([p.pattern for p in rules], [p.pattern for p in cached_rules])
+
+            # changes to the pattern file invalidate the cache
+            with open(pattern_file, 'a') as pattern_writer:
+                pattern_writer.write('\nTRIGGER[trigger,relationType] nach LOCATION[location]\n')
+            self.assertNotEqual(cache_path, pattern_event_processor.get_rules_cache_path(pattern_file, cache_dir))
+            self.assertEqual(len(rules) + 1, len(pattern_event_processor.parse_pattern_file(pattern_file,
+                                                                                            cache_dir=cache_dir)))
+
+            # unreadable cache files are replaced
+            cache_path = pattern_event_processor.get_rules_cache_path(pattern_file, cache_dir)
+            cache_path.write_bytes(b'no pickle')
+            self.assertEqual(len(rules) + 1, len(pattern_event_processor.parse_pattern_file(pattern_file,
+                                                                                            cache_dir=cache_dir)))
+            self.assertEqual(len(rules) + 1, len(pattern_event_processor.parse_pattern_file(pattern_file,
+                                                                                            cache_dir=cache_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
 import pandas as pd
+import spacy
 from wsee.preprocessors import preprocessors
 from wsee.labeling import event_argument_role_lfs
 from wsee.data import pipeline, explore
@@ -52,6 +53,18 @@ class TestMixedNer(unittest.TestCase):
         actual_cand = preprocessors.pre_mixed_ner(actual_cand)
         self.assertEqual(expected_mixed_ner_spans, actual_cand['mixed_ner_spans'])
 
+    def test_mixed_ner_without_char_offsets(self):
+        for idx, row in self.pd_df.iterrows():
+            expected_mixed_ner, expected_mixed_ner_spans = preprocessors.get_mixed_ner(row)
+
+            cand = row.copy()
+            # reverse the entity order and drop the char offsets to enforce the token based entity matching
+            cand['entities'] = [{key: value for key, value in entity.items() if key not in ['char_start', 'char_end']}
+                                for entity in reversed(row['entities'])]
+            actual_mixed_ner, actual_mixed_ner_spans = preprocessors.get_mixed_ner(cand)
+            self.assertEqual(expected_mixed_ner, actual_mixed_ner)
+            self.assertEqual(list(reversed(expected_mixed_ner_spans)), actual_mixed_ner_spans)
+
     def test_applypreprocessors(self):
         event_role_rows, event_role_rows_y = pipeline.build_event_role_examples(self.pd_df)
         labeled_rows = explore.add_labels(event_role_rows, event_role_rows_y)
@@ -92,5 +105,143 @@ class TestComplexPreprocessors(unittest.TestCase):
         self.assertIsNotNone(processed_rows)
 
 
+class TestSpacyDoc(unittest.TestCase):
+    def setUp(self):
+        self.nlp_spacy = preprocessors.nlp_spacy
+        # a blank pipeline is enough to check the sentence spans and the fallback to the rule-based sentencizer
+        preprocessors.nlp_spacy = spacy.blank('de')
+
+    def tearDown(self):
+        preprocessors.nlp_spacy = self.nlp_spacy
+
+    def test_spacy_doc_batch(self):
+        texts = ['Stau auf der A1. Sperrung in Köln!', 'Keine Störungen']
+        spacy_docs = preprocessors.get_spacy_doc_batch(texts)
+        self.assertEqual(2, len(spacy_docs))
+        for text, spacy_doc in zip(texts, spacy_docs):
+            for sentence in spacy_doc['sentences']:
+                self.assertEqual(sentence['text'], text[sentence['char_start']:sentence['char_end']])
+        self.assertEqual(['Keine', 'Störungen'], spacy_docs[1]['tokens'])
+        self.assertIn('sentencizer', preprocessors.nlp_spacy.pipe_names)
+
+        cand = pd.Series({'text': texts[1], 'spacy_doc': spacy_docs[0]})
+        self.assertEqual(spacy_docs[0], preprocessors.pre_spacy_doc(cand)['spacy_doc'])
+
+
+class TestEntityIndex(unittest.TestCase):
+    def setUp(self):
+        self.entities = [
+            {'id': 'e2', 'text': 'Stau', 'entity_type': 'trigger', 'start': 4, 'end': 5},
+            {'id': 'e0', 'text': 'A1', 'entity_type': 'location_street', 'start': 0, 'end': 1},
+            {'id': 'e1', 'text': 'Köln', 'entity_type': 'location_city', 'start': 2, 'end': 3}
+        ]
+
+    def test_entity_lookup(self):
+        entity_index = preprocessors.get_entity_index(self.entities)
+        self.assertEqual([1, 2, 0], entity_index['start_order'])
+        for idx, entity in enumerate(self.entities):
+            self.assertEqual(idx, preprocessors.get_entity_idx(entity['id'], self.entities, entity_index))
+            self.assertIs(entity, preprocessors.get_entity(entity['id'], self.entities, entity_index))
+        with self.assertRaises(Exception):
+            preprocessors.get_entity('missing', self.entities, entity_index)
+
+    def test_neighbor_entities(self):
+        entity_index = preprocessors.get_entity_index(self.entities)
+        stau, a1, koeln = self.entities
+        self.assertIsNone(preprocessors.get_left_neighbor_entity(a1, self.entities, entity_index))
+        self.assertIs(a1, preprocessors.get_left_neighbor_entity(koeln, self.entities, entity_index))
+        self.assertIs(koeln, preprocessors.get_right_neighbor_entity(a1, self.entities, entity_index))
+        self.assertIsNone(preprocessors.get_right_neighbor_entity(stau, self.entities))
+        # the entities of the document are not reordered
+        self.assertEqual(['e2', 'e0', 'e1'], [entity['id'] for entity in self.entities])
+
+
+class TestTokenWindow(unittest.TestCase):
+    def test_windowed_tokens(self):
+        tokens = ['Stau', 'auf', 'der', 'A1', 'zwischen', 'Köln', 'und', 'Bonn', '.']
+        entity = {'id': 'e0', 'text': 'Köln', 'entity_type': 'location_city', 'start': 5, 'end': 6}
+        left_tokens = preprocessors.get_windowed_left_tokens(entity, tokens)
+        right_tokens = preprocessors.get_windowed_right_tokens(entity, tokens)
+        self.assertEqual(tokens[:5], left_tokens)
+        self.assertEqual(tokens[6:], right_tokens)
+        self.assertIs(tokens, left_tokens.sequence)
+        self.assertEqual('zwischen', left_tokens[-1])
+        self.assertEqual(tokens[:5][-4:], left_tokens[-4:])
+        self.assertEqual(tokens[6:][:2], right_tokens[:2])
+        self.assertEqual(tokens[:5][::2], left_tokens[::2])
+        self.assertIn('A1', left_tokens)
+        self.assertNotIn('Bonn', left_tokens)
+        self.assertIn('Bonn', right_tokens[:2])
+        self.assertEqual(5, len(left_tokens))
+        self.assertEqual(tokens[3:5], preprocessors.get_windowed_left_tokens(entity, tokens, window_size=2))
+        self.assertFalse(preprocessors.get_windowed_right_tokens({'start': 8, 'end': 9}, tokens))
+        with self.assertRaises(IndexError):
+            _ = right_tokens[3]
+
+
+class TestSentenceIndex(unittest.TestCase):
+    def test_sentence_index(self):
+        text = 'A1 gesperrt. Stau bei Köln.'
+        sentences = [{'char_start': 0, 'char_end': 12}, {'char_start': 13, 'char_end': 27}]
+        entities = [
+            {'id': 'e0', 'text': 'A1', 'entity_type': 'location_street', 'char_start': 0, 'char_end': 2},
+            {'id': 'e1', 'text': 'Stau', 'entity_type': 'trigger', 'char_start': 13, 'char_end': 17},
+            {'id': 'e2', 'text': 'Köln', 'entity_type': 'location_city', 'char_start': 22, 'char_end': 26},
+            {'id': 'e3', 'text': 'gesperrt. Stau', 'entity_type': 'trigger', 'char_start': 3, 'char_end': 17}
+        ]
+        sentence_index = preprocessors.get_sentence_index(sentences, entities)
+        self.assertEqual([0, 1, 1, -1], sentence_index['entity_sentences'])
+        self.assertEqual([[0], [1, 2]], sentence_index['sentence_entities'])
+
+        cand = pd.Series({'text': text, 'entities': entities, 'somajo_doc': {'sentences': sentences},
+                          'trigger': entities[1], 'argument': entities[2]})
+        self.assertFalse(preprocessors.get_somajo_separate_sentence(cand))
+        self.assertEqual(entities[1:3], preprocessors.get_sentence_entities(cand))
+        cand['argument'] = entities[0]
+        self.assertTrue(preprocessors.get_somajo_separate_sentence(cand))
+        self.assertEqual([], preprocessors.get_sentence_entities(cand))
+
+
+class TestDistanceIndex(unittest.TestCase):
+    def test_distance_index(self):
+        text = 'A1 gesperrt. Stau bei Köln.'
+        sentences = [{'char_start': 0, 'char_end': 12}, {'char_start': 13, 'char_end': 27}]
+        entities = [
+            {'id': 'e0', 'text': 'A1', 'entity_type': 'location_street', 'start': 0, 'end': 1,
+             'char_start': 0, 'char_end': 2},
+            {'id': 'e1', 'text': 'gesperrt', 'entity_type': 'trigger', 'start': 1, 'end': 2,
+             'char_start': 3, 'char_end': 11},
+            {'id': 'e2', 'text': 'Stau', 'entity_type': 'trigger', 'start': 3, 'end': 4,
+             'char_start': 13, 'char_end': 17},
+            {'id': 'e3', 'text': 'Köln', 'entity_type': 'location_city', 'start': 5, 'end': 6,
+             'char_start': 22, 'char_end': 26},
+            {'id': 'e4', 'text': 'Stau bei Köln', 'entity_type': 'location', 'start': 3, 'end': 6,
+             'char_start': 13, 'char_end': 26}
+        ]
+        sentence_index = preprocessors.get_sentence_index(sentences, entities)
+        distance_index = preprocessors.get_distance_index(entities, sentence_index)
+        self.assertEqual({'e1': 0, 'e2': 1}, distance_index['trigger_rows'])
+        self.assertEqual([[0, -1, 1, 3, 1], [2, 1, -1, 1, -1]], distance_index['distance_matrix'].tolist())
+        self.assertEqual([[True, True, False, False, False], [False, False, True, True, True]],
+                         distance_index['same_sentence'].tolist())
+        for trigger_idx, trigger in [(1, entities[1]), (2, entities[2])]:
+            for entity_idx, entity in enumerate(entities):
+                self.assertEqual(preprocessors.get_entity_distance(trigger, entity),
+                                 distance_index['distance_matrix'][trigger_idx - 1, entity_idx])
+
+        cand = pd.Series({'text': text, 'entities': entities, 'sentence_index': sentence_index,
+                          'distance_index': distance_index, 'event_triggers': [{'id': 'e1'}, {'id': 'e2'}],
+                          'trigger': entities[2], 'argument': entities[3]})
+        self.assertEqual(1, preprocessors.get_between_distance(cand))
+        self.assertEqual({'e1': 3, 'e2': 1}, preprocessors.get_all_trigger_distances(cand))
+        self.assertEqual({'e2': 1}, preprocessors.get_sentence_trigger_distances(cand))
+        # the overlapping location entity is the closest one
+        self.assertEqual(entities[4], preprocessors.get_closest_entity(cand))
+        self.assertEqual(entities[4], preprocessors.get_closest_entity_same_sentence(cand))
+        cand['trigger'] = entities[1]
+        self.assertEqual(entities[0], preprocessors.get_closest_entity(cand))
+        self.assertEqual(entities[0], preprocessors.get_closest_entity_same_sentence(cand))
+
+
 if __name__ == '__main__':
     unittest.main()
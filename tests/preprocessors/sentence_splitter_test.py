@@ -20,6 +20,35 @@ class TestSentenceSplitter(unittest.TestCase):
             for sentence in somajo_sentences:
                 self.assertEqual(sentence['text'], text[sentence['char_start']:sentence['char_end']])
 
+    def test_sentence_boundaries_irregular_whitespace(self):
+        preprocessors.load_somajo_model()
+        text = '  Erster Satz.\n\n\n  Zweiter   Satz hier.\tDritter\n Satz!  '
+        somajo_doc = list(preprocessors.nlp_somajo.tokenize_text([text]))
+        somajo_sentences = preprocessors.get_somajo_doc_sentences(somajo_doc, text)
+        self.assertEqual(['Erster Satz.', 'Zweiter   Satz hier.', 'Dritter\n Satz!'],
+                         [sentence['text'] for sentence in somajo_sentences])
+        self.assertEqual([(2, 14), (19, 39), (40, 54)],
+                         [(sentence['char_start'], sentence['char_end']) for sentence in somajo_sentences])
+
+    def test_batch_sentence_splitting(self):
+        texts = self.pd_df['text'].tolist()
+        # SoMaJo drops empty paragraphs, which must not shift the sentences of the following texts
+        texts[1:1] = ['', ' \n\t ']
+        somajo_docs = preprocessors.get_somajo_doc_batch(texts)
+        self.assertEqual(len(texts), len(somajo_docs))
+        for text, somajo_doc in zip(texts, somajo_docs):
+            expected_somajo_doc = preprocessors.get_somajo_doc(pd.Series({'text': text}))
+            self.assertEqual(expected_somajo_doc['tokens'], somajo_doc['tokens'])
+            self.assertEqual(expected_somajo_doc['sentences'], somajo_doc['sentences'])
+
+    def test_slim_somajo_doc(self):
+        text = self.pd_df['text'].iloc[0]
+        somajo_doc = preprocessors.get_somajo_doc(pd.Series({'text': text}))
+        self.assertNotIn('doc', somajo_doc)
+        full_somajo_doc = preprocessors.get_somajo_doc(pd.Series({'text': text}), full_tokens=True)
+        self.assertEqual(len(somajo_doc['tokens']), sum(len(sentence) for sentence in full_somajo_doc['doc']))
+        self.assertEqual(somajo_doc['sentences'], full_somajo_doc['sentences'])
+
 
 if __name__ == '__main__':
     unittest.main()
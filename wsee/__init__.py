@@ -1,3 +1,5 @@
+__version__ = '0.1.0'
+
 NEGATIVE_TRIGGER_LABEL = 'O'
 NEGATIVE_ARGUMENT_LABEL = 'no_arg'
 
@@ -18,3 +20,20 @@ ROLE_LABELS = ['location', 'delay', 'direction',
                'start_loc', 'end_loc',
                'start_date', 'end_date', 'cause',
                'jam_length', 'route', NEGATIVE_ARGUMENT_LABEL]
+
+
+def warm_up(somajo: bool = True, spacy: bool = False):
+    """
+    Loads the resources that are otherwise loaded on first use: the event pattern rules, the gazetteer and optionally
+    the SoMaJo and spaCy models. Long-running services can call this once at startup, so that the first requests do
+    not pay for the loading.
+    :param somajo: Whether to load the SoMaJo tokenizer.
+    :param spacy: Whether to load the spaCy model.
+    """
+    from wsee.labeling import event_argument_role_lfs
+    from wsee.preprocessors import preprocessors
+    event_argument_role_lfs.load_resources()
+    if somajo:
+        preprocessors.load_somajo_model()
+    if spacy:
+        preprocessors.load_spacy_model()
@@ -35,9 +35,13 @@ def create_events(row: pd.Series) -> pd.Series:
             for role in row['event_roles']
             if np.asarray(role['event_argument_probs']).sum() > 0.0 and
             ROLE_LABELS[np.asarray(role['event_argument_probs']).argmax()] != NEGATIVE_ARGUMENT_LABEL]
+        entity_index = preprocessors.get_entity_index(row['entities'])
+        trigger_args_with_labels = {}
+        for arg, label in filtered_roles_with_labels:
+            trigger_args_with_labels.setdefault(arg['trigger'], []).append((arg, label))
 
         for event_trigger, trigger_label in filtered_triggers_with_labels:
-            trigger_entity = preprocessors.get_entity(event_trigger['id'], row['entities'])
+            trigger_entity = preprocessors.get_entity(event_trigger['id'], row['entities'], entity_index)
             event_type = trigger_label
             formatted_trigger = {
                 'id': trigger_entity['id'],
@@ -46,11 +50,10 @@ def create_events(row: pd.Series) -> pd.Series:
                 'start': trigger_entity['start'],
                 'end': trigger_entity['end']
             }
-            relevant_args_with_labels = [(arg, label) for arg, label in filtered_roles_with_labels if
-                                         arg['trigger'] == event_trigger['id']]
+            relevant_args_with_labels = trigger_args_with_labels.get(event_trigger['id'], [])
             formatted_args = []
             for event_arg, role_label in relevant_args_with_labels:
-                event_arg_entity = preprocessors.get_entity(event_arg['argument'], row['entities'])
+                event_arg_entity = preprocessors.get_entity(event_arg['argument'], row['entities'], entity_index)
                 arg_role = role_label
                 formatted_arg = {
                     'id': event_arg_entity['id'],
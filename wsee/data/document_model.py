@@ -0,0 +1,273 @@
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Entity types with a fixed integer code, other entity types are coded per document after these
+ENTITY_TYPES: Tuple[str, ...] = ('trigger', 'location', 'location_street', 'location_city', 'location_route',
+                                 'location_stop', 'date', 'time', 'duration', 'distance', 'number', 'organization',
+                                 'organization_company', 'person', 'money', 'percent', 'set', 'misc')
+ENTITY_TYPE_IDS: Dict[str, int] = {entity_type: type_id for type_id, entity_type in enumerate(ENTITY_TYPES)}
+
+# Columns of EntityTable.spans
+SPAN_KEYS: Tuple[str, ...] = ('start', 'end', 'char_start', 'char_end')
+START, END, CHAR_START, CHAR_END = range(len(SPAN_KEYS))
+SPAN_COLUMNS: Dict[str, int] = {key: column for column, key in enumerate(SPAN_KEYS)}
+# Marks a span value that is missing in the entity dictionary
+MISSING_SPAN: int = np.iinfo(np.int32).min
+
+ENTITY_KEYS: Tuple[str, ...] = ('id', 'text') + SPAN_KEYS + ('entity_type',)
+
+
+class EntityView(Mapping):
+    """
+    Read-only dictionary view on one entity of an EntityTable, so that labeling functions can keep using
+    x.trigger['start'] or entity['entity_type'].
+    """
+    __slots__ = ('table', 'idx')
+
+    def __init__(self, table: 'EntityTable', idx: int):
+        self.table = table
+        self.idx = idx
+
+    def __getitem__(self, key):
+        table = self.table
+        if key == 'id':
+            return table.ids[self.idx]
+        if key == 'entity_type':
+            return table.get_entity_type(self.idx)
+        if key == 'text':
+            return table.texts[self.idx]
+        if key in SPAN_COLUMNS:
+            value = table.spans[self.idx, SPAN_COLUMNS[key]]
+            if value == MISSING_SPAN:
+                raise KeyError(key)
+            return int(value)
+        if table.extras is not None and table.extras[self.idx] is not None:
+            return table.extras[self.idx][key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key in ENTITY_KEYS:
+            if key not in SPAN_COLUMNS or self.table.spans[self.idx, SPAN_COLUMNS[key]] != MISSING_SPAN:
+                yield key
+        if self.table.extras is not None and self.table.extras[self.idx] is not None:
+            yield from self.table.extras[self.idx]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __getstate__(self):
+        return self.table, self.idx
+
+    def __setstate__(self, state):
+        self.table, self.idx = state
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class EntityTable(Sequence):
+    """
+    Compact column based representation of the entities of a document. The entity types are coded as integers
+    (see ENTITY_TYPES), the token and character spans are stored in one NumPy array and only the ids and texts remain
+    Python strings. Indexing returns EntityView objects that behave like the entity dictionaries.
+    """
+    __slots__ = ('ids', 'texts', 'type_ids', 'spans', 'extra_types', 'extras')
+
+    def __init__(self, ids: List[str], texts: List[str], type_ids: np.ndarray, spans: np.ndarray,
+                 extra_types: Tuple[str, ...] = (), extras: Optional[List[Optional[Dict[str, Any]]]] = None):
+        self.ids = ids
+        self.texts = texts
+        self.type_ids = type_ids
+        self.spans = spans
+        self.extra_types = extra_types
+        self.extras = extras
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [EntityView(self, idx) for idx in range(len(self))[item]]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError('entity index out of range')
+        return EntityView(self, item)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield EntityView(self, idx)
+
+    def __eq__(self, other):
+        if isinstance(other, (EntityTable, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.ids, self.texts, self.type_ids, self.spans, self.extra_types, self.extras
+
+    def __setstate__(self, state):
+        self.ids, self.texts, self.type_ids, self.spans, self.extra_types, self.extras = state
+
+    def __repr__(self):
+        return f"EntityTable({[dict(entity) for entity in self]})"
+
+    def get_entity_type(self, idx: int) -> str:
+        type_id = self.type_ids[idx]
+        if type_id < len(ENTITY_TYPES):
+            return ENTITY_TYPES[type_id]
+        return self.extra_types[type_id - len(ENTITY_TYPES)]
+
+    def get_type_id(self, entity_type: str) -> int:
+        """
+        :param entity_type: Entity type.
+        :return: Integer code of the entity type in this table or -1 if no entity has that type.
+        """
+        if entity_type in ENTITY_TYPE_IDS:
+            return ENTITY_TYPE_IDS[entity_type]
+        if entity_type in self.extra_types:
+            return len(ENTITY_TYPES) + self.extra_types.index(entity_type)
+        return -1
+
+
+def compact_entities(entities) -> EntityTable:
+    """
+    Converts the entity dictionaries of a document to an EntityTable. Keys other than id, text, entity_type and the
+    spans are kept per entity.
+    :param entities: Entities of the document, either dictionaries or an EntityTable.
+    :return: EntityTable.
+    """
+    if isinstance(entities, EntityTable):
+        return entities
+    extra_types: List[str] = []
+    type_ids: np.ndarray = np.empty(len(entities), dtype=np.int16)
+    spans: np.ndarray = np.full((len(entities), len(SPAN_KEYS)), MISSING_SPAN, dtype=np.int32)
+    extras: List[Optional[Dict[str, Any]]] = []
+    for idx, entity in enumerate(entities):
+        entity_type = entity['entity_type']
+        if entity_type in ENTITY_TYPE_IDS:
+            type_ids[idx] = ENTITY_TYPE_IDS[entity_type]
+        else:
+            if entity_type not in extra_types:
+                extra_types.append(entity_type)
+            type_ids[idx] = len(ENTITY_TYPES) + extra_types.index(entity_type)
+        for column, key in enumerate(SPAN_KEYS):
+            if key in entity:
+                spans[idx, column] = entity[key]
+        extra = {key: value for key, value in entity.items() if key not in ENTITY_KEYS}
+        extras.append(extra if extra else None)
+    if not any(extras):
+        extras = None
+    return EntityTable(ids=[entity['id'] for entity in entities], texts=[entity['text'] for entity in entities],
+                       type_ids=type_ids, spans=spans, extra_types=tuple(extra_types), extras=extras)
+
+
+def expand_entities(entities) -> List[Dict[str, Any]]:
+    """
+    Converts an EntityTable back to a list of entity dictionaries, e.g. before writing documents to JSON.
+    :param entities: EntityTable or list of entity dictionaries.
+    :return: List of entity dictionaries.
+    """
+    if isinstance(entities, EntityTable):
+        return [dict(entity) for entity in entities]
+    return entities
+
+
+def compact_document(document):
+    """
+    Replaces the entity dictionaries of a document with an EntityTable.
+    :param document: Document, e.g. a DataFrame row.
+    :return: Document with compact entities.
+    """
+    document['entities'] = compact_entities(document['entities'])
+    return document
+
+
+# NER tags are coded as prefix id << NER_PREFIX_SHIFT | type id. The NER types are the upper case entity types
+# (type id = entity type id + 1), type id 0 is used for the outside tag and UNKNOWN_NER_TYPE_ID for other types.
+NER_PREFIXES: Tuple[str, ...] = ('O', 'B', 'I', 'E', 'S')
+NER_PREFIX_SHIFT: int = 8
+NER_TYPE_ID_MASK: int = (1 << NER_PREFIX_SHIFT) - 1
+OUTSIDE_NER_TYPE_ID: int = 0
+UNKNOWN_NER_TYPE_ID: int = len(ENTITY_TYPES) + 1
+NER_TAG_CODES: int = len(NER_PREFIXES) << NER_PREFIX_SHIFT
+LOCATION_NER_TYPES: Tuple[str, ...] = ('LOCATION', 'LOCATION_STREET', 'LOCATION_CITY', 'LOCATION_STOP',
+                                       'LOCATION_ROUTE')
+
+ner_tag_code_cache: Dict[str, int] = {}
+
+
+def get_ner_type_id(ner_type: str) -> int:
+    """
+    :param ner_type: NER type without BIO prefix, e.g. LOCATION_CITY.
+    :return: Type id of the NER type.
+    """
+    entity_type_id = ENTITY_TYPE_IDS.get(ner_type.lower())
+    return UNKNOWN_NER_TYPE_ID if entity_type_id is None else entity_type_id + 1
+
+
+def encode_ner_tag(ner_tag: str) -> int:
+    """
+    :param ner_tag: NER tag, e.g. B-LOCATION_CITY or O.
+    :return: Integer code of the NER tag.
+    """
+    if len(ner_tag) < 3 or ner_tag[1] != '-':
+        return OUTSIDE_NER_TYPE_ID
+    prefix_id = NER_PREFIXES.index(ner_tag[0]) if ner_tag[0] in NER_PREFIXES else NER_PREFIXES.index('I')
+    return prefix_id << NER_PREFIX_SHIFT | get_ner_type_id(ner_tag[2:])
+
+
+def encode_ner_tags(ner_tags: List[str]) -> np.ndarray:
+    """
+    Encodes the NER tags of a document as integers, see encode_ner_tag. The codes of frequent tags are cached.
+    :param ner_tags: NER tags of the document.
+    :return: Array of NER tag codes.
+    """
+    codes = np.empty(len(ner_tags), dtype=np.int16)
+    for idx, ner_tag in enumerate(ner_tags):
+        code = ner_tag_code_cache.get(ner_tag)
+        if code is None:
+            code = encode_ner_tag(ner_tag)
+            if len(ner_tag_code_cache) < 1024:
+                ner_tag_code_cache[ner_tag] = code
+        codes[idx] = code
+    return codes
+
+
+def get_ner_type_mask(ner_types) -> np.ndarray:
+    """
+    Builds a lookup table over all NER tag codes that is True for the codes with one of the given types, regardless
+    of the BIO prefix.
+    :param ner_types: NER types without BIO prefix.
+    :return: Boolean array indexed by NER tag code.
+    """
+    type_ids = [get_ner_type_id(ner_type) for ner_type in ner_types]
+    codes = np.arange(NER_TAG_CODES)
+    return np.isin(codes & NER_TYPE_ID_MASK, type_ids) & (codes >> NER_PREFIX_SHIFT > 0)
+
+
+LOCATION_NER_TYPE_MASK: np.ndarray = get_ner_type_mask(LOCATION_NER_TYPES)
+
+
+def has_ner_type_at(ner_tag_codes, offset: int, ner_type_mask: np.ndarray) -> bool:
+    """
+    Checks whether the NER tag at the offset has one of the types of the mask, see get_ner_type_mask.
+    :param ner_tag_codes: NER tag codes of a document or a window of them.
+    :param offset: Offset, negative offsets count from the end.
+    :param ner_type_mask: NER type mask.
+    :return: True if the tag at the offset has one of the types.
+    """
+    return bool(ner_type_mask[ner_tag_codes[offset]])
+
+
+def is_location_at(ner_tag_codes, offset: int) -> bool:
+    """
+    :param ner_tag_codes: NER tag codes of a document or a window of them.
+    :param offset: Offset, negative offsets count from the end.
+    :return: True if the tag at the offset is one of the location types.
+    """
+    return bool(LOCATION_NER_TYPE_MASK[ner_tag_codes[offset]])
@@ -4,20 +4,20 @@ import shutil
 import logging
 import pickle
 from pathlib import Path
-from typing import Optional, List, Any, Dict, Union
+from typing import Optional, List, Any, Dict, Tuple, Union
 
 import pandas as pd
 import numpy as np
-from snorkel.labeling import LabelModel, MajorityLabelVoter, PandasLFApplier, labeling_function, \
-    filter_unlabeled_dataframe
+from snorkel.labeling import LabelModel, MajorityLabelVoter, labeling_function, filter_unlabeled_dataframe
 from tqdm import tqdm
 from multiprocessing import Pool
 
 from wsee.preprocessors import preprocessors
 from wsee.labeling import event_trigger_lfs
 from wsee.labeling import event_argument_role_lfs
+from wsee.labeling.column_lfs import ColumnLFApplier
 from wsee.utils import utils
-from wsee.data import convert
+from wsee.data import convert, document_model
 from wsee import SD4M_RELATION_TYPES, ROLE_LABELS, NEGATIVE_TRIGGER_LABEL, NEGATIVE_ARGUMENT_LABEL
 
 
@@ -131,11 +131,72 @@ def parallelize_dataframe(df, func, n_cores=4):
     return df
 
 
+def add_somajo_docs(dataframe, n_workers=1, full_tokens=False):
+    """
+    Tokenizes and sentence splits the texts of all documents with a single batched SoMaJo call instead of one call per
+    document and stores the result in the somajo_doc column.
+    :param dataframe: Documents.
+    :param n_workers: Number of processes SoMaJo uses for tokenization.
+    :param full_tokens: Whether to keep the SoMaJo Token objects under somajo_doc['doc'], e.g. for exploration.
+    :return: DataFrame with somajo_doc column.
+    """
+    dataframe = dataframe.copy()
+    dataframe['somajo_doc'] = preprocessors.get_somajo_doc_batch(dataframe['text'].tolist(), parallel=n_workers,
+                                                                 full_tokens=full_tokens)
+    return dataframe
+
+
+def add_spacy_docs(dataframe, batch_size=64):
+    """
+    Tokenizes and sentence splits the texts of all documents with spaCy via nlp.pipe, only running the components
+    needed for sentence splitting, and stores the result in the spacy_doc column, which pre_spacy_doc reuses.
+    :param dataframe: Documents.
+    :param batch_size: Number of texts spaCy processes at once.
+    :return: DataFrame with spacy_doc column.
+    """
+    dataframe = dataframe.copy()
+    dataframe['spacy_doc'] = preprocessors.get_spacy_doc_batch(dataframe['text'].tolist(), batch_size=batch_size)
+    return dataframe
+
+
+def get_or_create_somajo_doc(doc):
+    if 'somajo_doc' in doc and isinstance(doc['somajo_doc'], dict):
+        return doc['somajo_doc']
+    return preprocessors.get_somajo_doc(doc)
+
+
+def add_tag_codes(doc):
+    """
+    Adds the integer coded NER tags of the document, see document_model.encode_ner_tags.
+    :param doc: Document.
+    :return: Document with ner_tag_codes.
+    """
+    doc['ner_tag_codes'] = document_model.encode_ner_tags(doc['ner_tags'])
+    return doc
+
+
+def add_trigger_keyword_scores(dataframe):
+    """
+    Scores the unique trigger texts of the documents against the keyword lists of the trigger labeling functions once,
+    see event_trigger_lfs.add_keyword_scores.
+    :param dataframe: Documents.
+    """
+    event_trigger_lfs.add_keyword_scores(entity['text'] for entities in dataframe['entities'] for entity in entities
+                                         if entity['entity_type'] == 'trigger')
+
+
 def preprocess_docs_for_triggers(doc):
+    entity_index = preprocessors.get_entity_index(doc['entities'])
     entity_type_freqs = preprocessors.get_entity_type_freqs(doc)
-    somajo_doc = preprocessors.get_somajo_doc(doc)
+    somajo_doc = get_or_create_somajo_doc(doc)
+    sentence_index = preprocessors.get_sentence_index(somajo_doc['sentences'], doc['entities'])
+    distance_index = preprocessors.get_distance_index(doc['entities'], sentence_index)
+    doc['entity_index'] = entity_index
     doc['entity_type_freqs'] = entity_type_freqs
     doc['somajo_doc'] = somajo_doc
+    doc['sentence_index'] = sentence_index
+    doc['distance_index'] = distance_index
+    add_tag_codes(doc)
     return doc
 
 
@@ -144,11 +205,18 @@ def preprocess_docs_for_triggers_applier(df):
 
 
 def preprocess_docs_for_roles(doc):
+    entity_index = preprocessors.get_entity_index(doc['entities'])
     entity_type_freqs = preprocessors.get_entity_type_freqs(doc)
-    somajo_doc = preprocessors.get_somajo_doc(doc)
+    somajo_doc = get_or_create_somajo_doc(doc)
+    sentence_index = preprocessors.get_sentence_index(somajo_doc['sentences'], doc['entities'])
+    distance_index = preprocessors.get_distance_index(doc['entities'], sentence_index)
     mixed_ner, mixed_ner_spans = preprocessors.get_mixed_ner(doc)
+    doc['entity_index'] = entity_index
     doc['entity_type_freqs'] = entity_type_freqs
     doc['somajo_doc'] = somajo_doc
+    doc['sentence_index'] = sentence_index
+    doc['distance_index'] = distance_index
+    add_tag_codes(doc)
     doc['mixed_ner'] = mixed_ner
     doc['mixed_ner_spans'] = mixed_ner_spans
     return doc
@@ -158,9 +226,11 @@ def preprocess_docs_for_roles_applier(df):
     return df.apply(lambda doc: preprocess_docs_for_roles(doc), axis=1)
 
 
-def preprocess_role_examples(role_row):
+def preprocess_role_examples(role_row, completed_trigger_votes=None):
+    role_row['trigger_votes'] = complete_trigger_votes(role_row, completed_trigger_votes)
     role_row['separate_sentence'] = preprocessors.get_somajo_separate_sentence(role_row)
-    role_row['not_an_event'] = event_trigger_lfs.lf_negative(role_row) == event_trigger_lfs.O
+    role_row['not_an_event'] = \
+        event_trigger_lfs.get_trigger_vote(role_row, event_trigger_lfs.lf_negative) == event_trigger_lfs.O
     role_row['arg_location_type_event_type_match'] = arg_location_type_event_type_match(role_row)
     role_row['between_distance'] = preprocessors.get_between_distance(role_row)
     role_row['is_multiple_same_event_type'] = preprocessors.is_multiple_same_event_type(role_row)
@@ -168,7 +238,9 @@ def preprocess_role_examples(role_row):
 
 
 def preprocess_role_examples_applier(df):
-    return df.apply(lambda doc: preprocess_role_examples(doc), axis=1)
+    # trigger votes that are completed in this worker, shared by the role examples of the same trigger
+    completed_trigger_votes = {}
+    return df.apply(lambda doc: preprocess_role_examples(doc, completed_trigger_votes), axis=1)
 
 
 def load_data(path, use_build_defaults=True):
@@ -203,11 +275,17 @@ def load_data(path, use_build_defaults=True):
     return output_dict
 
 
-def build_event_trigger_examples(dataframe, n_cores=4):
+def build_event_trigger_examples(dataframe, n_cores=4, somajo_workers=None, compact_entities=False,
+                                 full_somajo_tokens=False):
     """
     Takes a dataframe containing one document per row with all its annotations
     (event triggers are of interest here) and creates one row for each event trigger.
     :param n_cores: Number of cores to process dataframe in parallel.
+    :param somajo_workers: Number of processes for batched SoMaJo tokenization. Defaults to n_cores.
+    :param compact_entities: Whether to store the entities as EntityTable instead of dictionaries, which reduces the
+    memory footprint of the examples and the data sent to the worker processes.
+    :param full_somajo_tokens: Whether to keep the SoMaJo Token objects in somajo_doc, which are not needed by the
+    labeling functions.
     :param dataframe: Annotated documents.
     :return: DataFrame containing event trigger examples and NumPy array containing labels.
     """
@@ -217,14 +295,19 @@ def build_event_trigger_examples(dataframe, n_cores=4):
     logger.info("Building event trigger examples")
     logger.info(f"DataFrame has {len(dataframe.index)} rows")
 
-    # 1. Preprocess docs (entity frequencies, sentence splitting)
+    # 1. Preprocess docs (batched sentence splitting, entity index, entity frequencies, sentence index,
+    # distance index, trigger keyword scores)
+    dataframe = add_somajo_docs(dataframe, n_workers=somajo_workers or n_cores, full_tokens=full_somajo_tokens)
+    if compact_entities:
+        dataframe = dataframe.apply(document_model.compact_document, axis=1)
     dataframe = parallelize_dataframe(dataframe, preprocess_docs_for_triggers_applier, n_cores=n_cores)
+    add_trigger_keyword_scores(dataframe)
 
     # 2. Build trigger examples
     for index, row in tqdm(dataframe.iterrows()):
         for event_trigger in row.event_triggers:
             trigger_row = row.copy()
-            trigger_row['trigger'] = preprocessors.get_entity(event_trigger['id'], row.entities)
+            trigger_row['trigger'] = preprocessors.get_entity(event_trigger['id'], row.entities, row.entity_index)
             event_trigger_rows.append(trigger_row)
             event_type_num = np.asarray(event_trigger['event_type_probs']).argmax()
             event_trigger_rows_y.append(event_type_num)
@@ -244,18 +327,119 @@ def build_event_trigger_examples(dataframe, n_cores=4):
 def arg_location_type_event_type_match(cand):
     arg_entity_type = cand.argument['entity_type']
     for event_class, location_types in event_type_location_type_map.items():
-        if arg_entity_type in location_types and event_type_lf_map[event_class](cand) == event_class:
+        if arg_entity_type in location_types and \
+                event_trigger_lfs.get_trigger_vote(cand, event_type_lf_map[event_class]) == event_class:
             return True
     return False
 
 
-def build_event_role_examples(dataframe, n_cores=4):
+def build_trigger_votes(trigger_candidates: List[Any], L_trigger: Optional[np.ndarray] = None,
+                       lfs: Optional[List[labeling_function]] = None,
+                       compute_missing: bool = True) -> Dict[Tuple[str, str], Dict[str, int]]:
+    """
+    Computes the votes of the trigger labeling functions that the role preprocessing and the role labeling functions
+    depend on (event_trigger_lfs.trigger_vote_lfs) once per trigger instead of once per role candidate.
+    Votes of labeling functions that are part of the trigger label matrix are taken from it.
+    :param trigger_candidates: Trigger candidates (DataFrame rows or dictionaries) with at least id and trigger.
+    :param L_trigger: Optional label matrix of the trigger candidates.
+    :param lfs: Labeling functions that correspond to the columns of L_trigger.
+    :param compute_missing: Whether to apply the labeling functions that are not part of L_trigger. Otherwise the
+    votes only contain the ones taken from L_trigger and the rest is computed in the role preprocessing.
+    :return: Dictionary mapping (document id, trigger id) to the votes of the trigger labeling functions.
+    """
+    lf_columns: Dict[str, int] = {}
+    if L_trigger is not None and lfs is not None:
+        lf_columns = {lf.name: column for column, lf in enumerate(lfs)}
+    missing_lfs = [lf for lf in event_trigger_lfs.trigger_vote_lfs if lf.name not in lf_columns]
+    trigger_votes: Dict[Tuple[str, str], Dict[str, int]] = {}
+    for row_idx, cand in enumerate(trigger_candidates):
+        key = (cand.get('id'), cand['trigger']['id'])
+        if key in trigger_votes:
+            continue
+        votes = {lf.name: int(L_trigger[row_idx, lf_columns[lf.name]])
+                 for lf in event_trigger_lfs.trigger_vote_lfs if lf.name in lf_columns}
+        if compute_missing:
+            votes.update((lf.name, lf(cand)) for lf in missing_lfs)
+        trigger_votes[key] = votes
+    return trigger_votes
+
+
+def get_trigger_vote_keys(rows: pd.DataFrame) -> List[Tuple[str, str]]:
+    """
+    :param rows: Trigger or role examples.
+    :return: (document id, trigger id) of every row, the keys of build_trigger_votes.
+    """
+    doc_ids = rows['id'] if 'id' in rows else [None] * len(rows)
+    return [(doc_id, trigger['id']) for doc_id, trigger in zip(doc_ids, rows['trigger'])]
+
+
+def get_label_matrix_trigger_votes(event_trigger_rows: pd.DataFrame, L_trigger: np.ndarray,
+                                   lfs: List[labeling_function]) -> Dict[Tuple[str, str], Dict[str, int]]:
+    """
+    Takes the trigger votes from the label matrix of the trigger stage without applying any labeling function. The
+    votes that are not part of L_trigger are computed in the parallelized role preprocessing.
+    :param event_trigger_rows: Trigger examples.
+    :param L_trigger: Label matrix of the trigger examples.
+    :param lfs: Labeling functions that correspond to the columns of L_trigger.
+    :return: Dictionary mapping (document id, trigger id) to the votes taken from L_trigger.
+    """
+    trigger_candidates = [{'id': doc_id, 'trigger': {'id': trigger_id}}
+                          for doc_id, trigger_id in get_trigger_vote_keys(event_trigger_rows)]
+    return build_trigger_votes(trigger_candidates, L_trigger, lfs, compute_missing=False)
+
+
+def add_trigger_votes(event_role_rows: pd.DataFrame,
+                      trigger_votes: Optional[Dict[Tuple[str, str], Dict[str, int]]] = None) -> pd.DataFrame:
+    """
+    Joins the trigger votes onto the role examples by document and trigger id. Votes that are missing, e.g. of triggers
+    that are not in trigger_votes, are computed by complete_trigger_votes in the parallelized role preprocessing.
+    :param event_role_rows: Role examples.
+    :param trigger_votes: Optional precomputed trigger votes, see build_trigger_votes.
+    :return: Role examples with trigger_votes column.
+    """
+    if event_role_rows.empty:
+        return event_role_rows
+    trigger_votes = trigger_votes or {}
+    event_role_rows['trigger_votes'] = [trigger_votes.get(key, {})
+                                        for key in get_trigger_vote_keys(event_role_rows)]
+    return event_role_rows
+
+
+def complete_trigger_votes(role_row, completed_trigger_votes: Optional[Dict[Tuple[str, str], Dict[str, int]]] = None) \
+        -> Dict[str, int]:
+    """
+    Adds the votes of the labeling functions in event_trigger_lfs.trigger_vote_lfs that are missing in the
+    trigger_votes of a role example. The result is stored in completed_trigger_votes, so the labeling functions run
+    once per trigger.
+    :param role_row: Role example.
+    :param completed_trigger_votes: Optional dictionary of already completed votes by (document id, trigger id).
+    :return: Votes of all labeling functions in trigger_vote_lfs.
+    """
+    if completed_trigger_votes is None:
+        completed_trigger_votes = {}
+    key = (role_row.get('id'), role_row['trigger']['id'])
+    votes = completed_trigger_votes.get(key)
+    if votes is None:
+        votes = dict(role_row.get('trigger_votes') or {})
+        votes.update((lf.name, lf(role_row)) for lf in event_trigger_lfs.trigger_vote_lfs if lf.name not in votes)
+        completed_trigger_votes[key] = votes
+    return votes
+
+
+def build_event_role_examples(dataframe, n_cores=4, somajo_workers=None, compact_entities=False,
+                              full_somajo_tokens=False, trigger_votes=None):
     """
     Takes a dataframe containing one document per row with all its annotations
     (event roles are of interest here) and creates one row for each trigger-entity
     (event role) pair. Also adds attributes beforehand instead of using preprocessors in
     order not to do it for each row or even each row*labeling functions.
     :param n_cores: Number of cores to process dataframe in parallel.
+    :param somajo_workers: Number of processes for batched SoMaJo tokenization. Defaults to n_cores.
+    :param compact_entities: Whether to store the entities as EntityTable instead of dictionaries, which reduces the
+    memory footprint of the examples and the data sent to the worker processes.
+    :param full_somajo_tokens: Whether to keep the SoMaJo Token objects in somajo_doc, which are not needed by the
+    labeling functions.
+    :param trigger_votes: Optional trigger votes of the trigger stage, see build_trigger_votes.
     :param dataframe: Annotated documents.
     :return: DataFrame containing event role examples and NumPy array containing labels.
     """
@@ -265,26 +449,36 @@ def build_event_role_examples(dataframe, n_cores=4):
     logger.info("Building event role examples")
     logger.info(f"DataFrame has {len(dataframe.index)} rows")
     logger.info("Adding the following attributes to each document: "
-                "entity_type_freqs, somajo_doc, mixed_ner, mixed_ner_spans")
-
-    # 1. Preprocess docs (entity frequencies, sentence splitting, mixed ner pattern)
+                "entity_index, entity_type_freqs, somajo_doc, sentence_index, distance_index, ner_tag_codes, "
+                "mixed_ner, mixed_ner_spans")
+
+    # 1. Preprocess docs (batched sentence splitting, entity index, entity frequencies, sentence index,
+    # distance index, mixed ner pattern, trigger keyword scores)
+    dataframe = add_somajo_docs(dataframe, n_workers=somajo_workers or n_cores, full_tokens=full_somajo_tokens)
+    if compact_entities:
+        dataframe = dataframe.apply(document_model.compact_document, axis=1)
     dataframe = parallelize_dataframe(dataframe, preprocess_docs_for_roles_applier, n_cores=n_cores)
+    add_trigger_keyword_scores(dataframe)
 
     # 2. Build role examples
     for index, row in tqdm(dataframe.iterrows()):
         for event_role in row.event_roles:
             role_row = row.copy()
-            role_row['trigger'] = preprocessors.get_entity(event_role['trigger'], row.entities)
-            role_row['argument'] = preprocessors.get_entity(event_role['argument'], row.entities)
+            role_row['trigger'] = preprocessors.get_entity(event_role['trigger'], row.entities, row.entity_index)
+            role_row['argument'] = preprocessors.get_entity(event_role['argument'], row.entities, row.entity_index)
             event_role_rows_list.append(role_row)
             event_role_num = np.asarray(event_role['event_argument_probs']).argmax()
             event_role_rows_y.append(event_role_num)
     event_role_rows = pd.DataFrame(event_role_rows_list).reset_index(drop=True)
     event_role_rows_y = np.asarray(event_role_rows_y)
 
-    # 3. Process role examples (not_an_event, arg_type_event_type_match, between_distance, is_multiple_same_event_type)
+    # 3. Join the precomputed trigger votes onto the role examples
+    event_role_rows = add_trigger_votes(event_role_rows, trigger_votes)
+
+    # 4. Process role examples (trigger_votes, not_an_event, arg_type_event_type_match, between_distance,
+    # is_multiple_same_event_type)
     logger.info("Adding the following attributes to each role example: "
-                "not_an_event, arg_type_event_type_match, between_distance, is_multiple_same_event_type")
+                "trigger_votes, not_an_event, arg_type_event_type_match, between_distance, is_multiple_same_event_type")
     event_role_rows = parallelize_dataframe(event_role_rows, preprocess_role_examples_applier, n_cores=n_cores)
 
     label, count = np.unique(event_role_rows_y, return_counts=True)
@@ -332,7 +526,9 @@ def merge_event_trigger_examples(event_trigger_rows, event_trigger_probs):
         'entities': 'first',
         'event_triggers': 'sum',  # expects list of one trigger per row
     }
-    return event_trigger_rows.groupby('id').agg(aggregation_functions)
+    merged_event_trigger_rows = event_trigger_rows.groupby('id').agg(aggregation_functions)
+    merged_event_trigger_rows['entities'] = merged_event_trigger_rows['entities'].map(document_model.expand_entities)
+    return merged_event_trigger_rows
 
 
 def build_labeled_event_role(x):
@@ -372,13 +568,16 @@ def merge_event_role_examples(event_role_rows: pd.DataFrame, event_argument_prob
         'entities': 'first',
         'event_roles': 'sum'  # expects list of one event role per row
     }
-    return event_role_rows.groupby('id').agg(aggregation_functions)
+    merged_event_role_rows = event_role_rows.groupby('id').agg(aggregation_functions)
+    merged_event_role_rows['entities'] = merged_event_role_rows['entities'].map(document_model.expand_entities)
+    return merged_event_role_rows
 
 
 def get_trigger_probs(lf_train: pd.DataFrame, filter_abstains: bool = False,
                       lfs: Optional[List[labeling_function]] = None,
                       lf_dev: pd.DataFrame = None, seed: Optional[int] = None, tmp_path: Union[Path, str] = None,
-                      use_majority_label_voter=False) -> pd.DataFrame:
+                      use_majority_label_voter=False, return_trigger_votes=False) \
+        -> Union[pd.DataFrame, Tuple[pd.DataFrame, Dict[Tuple[str, str], Dict[str, int]]]]:
     """
     Takes "raw" data frame, builds trigger examples, (trains LabelModel), calculates event_trigger_probs
     and returns merged trigger examples with event_trigger_probs.
@@ -389,6 +588,8 @@ def get_trigger_probs(lf_train: pd.DataFrame, filter_abstains: bool = False,
     :param lfs: List of labeling functions
     :param lf_dev: Optional development dataset that can be used to set a prior for the class balance
     :param tmp_path: Path to temporarily store variables that are shared during random repeats
+    :param return_trigger_votes: Whether to also return the trigger votes taken from the trigger label matrix, which
+    can be passed to get_role_probs
     :return: Labeled lf_train, labeling function applier, label model
     """
     df_train, L_train = None, None
@@ -411,7 +612,7 @@ def get_trigger_probs(lf_train: pd.DataFrame, filter_abstains: bool = False,
 
     if lfs is None:
         lfs = get_trigger_list_lfs()
-    applier = PandasLFApplier(lfs)
+    applier = ColumnLFApplier(lfs)
 
     if L_train is None or df_train is None:
         df_train, _ = build_event_trigger_examples(lf_train)
@@ -464,13 +665,16 @@ def get_trigger_probs(lf_train: pd.DataFrame, filter_abstains: bool = False,
         # Multiplies probabilities of abstains with zero so that the example is treated as padding in the end model
         merged_event_trigger_examples = merge_event_trigger_examples(
             df_train, utils.zero_out_abstains(event_trigger_probs, L_train))
+    if return_trigger_votes:
+        return merged_event_trigger_examples, get_label_matrix_trigger_votes(df_train, L_train, lfs)
     return merged_event_trigger_examples
 
 
 def get_role_probs(lf_train: pd.DataFrame, filter_abstains: bool = False,
                    lfs: Optional[List[labeling_function]] = None,
                    lf_dev: pd.DataFrame = None, seed: Optional[int] = None, tmp_path: Union[str, Path] = None,
-                   use_majority_label_voter=False) -> pd.DataFrame:
+                   use_majority_label_voter=False,
+                   trigger_votes: Optional[Dict[Tuple[str, str], Dict[str, int]]] = None) -> pd.DataFrame:
     """
     Takes "raw" data frame, builds argument role examples, (trains LabelModel), calculates event_argument_probs
     and returns merged argument role examples with event_argument_probs.
@@ -481,6 +685,7 @@ def get_role_probs(lf_train: pd.DataFrame, filter_abstains: bool = False,
     :param lfs: List of labeling functions
     :param lf_dev: Optional development dataset that can be used to set a prior for the class balance
     :param tmp_path: Path to temporarily store variables that are shared during random repeats
+    :param trigger_votes: Optional trigger votes of lf_train from the trigger stage, see get_trigger_probs
     :return: Labeled lf_train, labeling function applier, label model
     """
     df_train, L_train = None, None
@@ -503,10 +708,10 @@ def get_role_probs(lf_train: pd.DataFrame, filter_abstains: bool = False,
 
     if lfs is None:
         lfs = get_role_list_lfs()
-    applier = PandasLFApplier(lfs)
+    applier = ColumnLFApplier(lfs)
 
     if L_train is None or df_train is None:
-        df_train, _ = build_event_role_examples(lf_train)
+        df_train, _ = build_event_role_examples(lf_train, trigger_votes=trigger_votes)
         logger.info("Running Event Role Labeling Function Applier")
         L_train = applier.apply(df_train)
         if tmp_path:
@@ -582,12 +787,14 @@ def build_training_data(lf_train: pd.DataFrame, save_path=None, seed: Optional[i
         lf_train = lf_train.apply(add_default_events, axis=1)
 
     # Trigger labeling
-    merged_event_trigger_examples = get_trigger_probs(lf_train=lf_train, lf_dev=lf_dev, seed=seed, tmp_path=tmp_path,
-                                                      use_majority_label_voter=use_majority_label_voter)
+    merged_event_trigger_examples, trigger_votes = get_trigger_probs(
+        lf_train=lf_train, lf_dev=lf_dev, seed=seed, tmp_path=tmp_path,
+        use_majority_label_voter=use_majority_label_voter, return_trigger_votes=True)
 
-    # Role labeling
+    # Role labeling, reusing the trigger votes from the trigger label matrix
     merged_event_role_examples = get_role_probs(lf_train=lf_train, lf_dev=lf_dev, seed=seed, tmp_path=tmp_path,
-                                                use_majority_label_voter=use_majority_label_voter)
+                                                use_majority_label_voter=use_majority_label_voter,
+                                                trigger_votes=trigger_votes)
 
     # Merge
     merged_examples: pd.DataFrame = utils.get_deep_copy(lf_train)
@@ -0,0 +1,106 @@
+import functools
+
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+from snorkel.labeling import LabelingFunction as SnorkelLabelingFunction
+from snorkel.labeling import labeling_function as snorkel_labeling_function
+from snorkel.types import DataPoint
+
+from wsee.preprocessors.memoization import get_candidate_key
+
+# Evaluation context of the candidate that is currently labeled: its candidate key and the memoized results of the
+# labeling functions and shared sub-predicates that were evaluated on it
+candidate_context: Dict[str, Any] = {
+    'key': None,
+    'data_point': None,
+    'values': None,
+    'results': {}
+}
+
+
+def reset_candidate_context() -> None:
+    """
+    Discards the memoized results of the current candidate. The ColumnLFApplier and set_keyword_scorer reset the
+    context themselves. Callers that apply labeling functions directly have to reset it whenever a candidate is labeled
+    again after its fields or the labeling resources changed, since candidates are identified by their ids only.
+    """
+    candidate_context['key'] = None
+    candidate_context['data_point'] = None
+    candidate_context['values'] = None
+    candidate_context['results'] = {}
+
+
+def get_candidate_results(x: DataPoint) -> Optional[Dict[Hashable, Any]]:
+    """
+    Returns the memoized results of the candidate. The context is tied to a single candidate and starts empty as soon
+    as a different candidate is labeled, so it does not grow with the number of candidates. Candidates are identified by
+    their key (document, trigger, argument) rather than by object identity, since pandas reuses the same Series object
+    for all rows in DataFrame.apply and preprocessors hand copies of the candidate to the labeling functions.
+    :param x: DataPoint.
+    :return: Dictionary of memoized results or None if the candidate cannot be identified.
+    """
+    # fast path for the labeling functions of the same pandas row: pandas assigns a new values array to the Series
+    # for every row, so the DataPoint together with its values array identifies the row without looking up the key.
+    # The context keeps a reference to the array, so its memory cannot be reused by the array of another row.
+    values = x.values if isinstance(x, pd.Series) else None
+    if values is not None and x is candidate_context['data_point'] and values is candidate_context['values']:
+        return candidate_context['results']
+    key = get_candidate_key(x)
+    if key is None:
+        return None
+    if key != candidate_context['key']:
+        candidate_context['key'] = key
+        candidate_context['results'] = {}
+    candidate_context['data_point'] = x
+    candidate_context['values'] = values
+    return candidate_context['results']
+
+
+class LabelingFunction(SnorkelLabelingFunction):
+    """
+    Labeling function that is evaluated at most once per candidate. Labeling functions that reuse other labeling
+    functions, e.g. the chained, replicated and negative labeling functions, get the memoized label of the current
+    candidate instead of running them again.
+    """
+
+    def __call__(self, x: DataPoint) -> int:
+        results = get_candidate_results(x)
+        if results is None:
+            return super().__call__(x)
+        label = results.get(self)
+        if label is None:
+            label = super().__call__(x)
+            results[self] = label
+        return label
+
+
+class labeling_function(snorkel_labeling_function):
+    """
+    Drop-in replacement for Snorkel's labeling_function decorator that creates labeling functions memoized per
+    candidate.
+    """
+
+    def __call__(self, f: Callable[..., int]) -> LabelingFunction:
+        name = self.name or f.__name__
+        return LabelingFunction(name=name, f=f, resources=self.resources, pre=self.pre)
+
+
+def candidate_memoized(f: Callable) -> Callable:
+    """
+    Decorator for helper functions that take the candidate as their first argument, e.g. generalized labeling functions
+    with options or sub-predicates shared by several labeling functions. The result is memoized per candidate and per
+    combination of the remaining (hashable) arguments.
+    :param f: Function f(x, *args, **kwargs).
+    :return: Memoized function.
+    """
+    @functools.wraps(f)
+    def wrapper(x, *args, **kwargs):
+        results = get_candidate_results(x)
+        if results is None:
+            return f(x, *args, **kwargs)
+        key = (wrapper, args, tuple(sorted(kwargs.items())))
+        if key not in results:
+            results[key] = f(x, *args, **kwargs)
+        return results[key]
+    return wrapper
@@ -0,0 +1,127 @@
+import operator
+from typing import Any, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from snorkel.labeling import PandasLFApplier
+from snorkel.labeling.apply.core import ApplierMetadata
+from snorkel.types import DataPoint
+
+from wsee.labeling.candidate_context import LabelingFunction, reset_candidate_context
+
+ABSTAIN = -1
+
+# Condition on a single column: (column, operator, value), e.g. ('between_distance', '>', 40)
+Condition = Tuple[str, str, Any]
+
+row_operators = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda a, b: a in b,
+    'not in': lambda a, b: a not in b
+}
+
+column_operators = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda a, b: np.isin(a, list(b)),
+    'not in': lambda a, b: ~np.isin(a, list(b))
+}
+
+
+class ColumnLabelingFunction(LabelingFunction):
+    """
+    Declarative labeling function that only depends on precomputed scalar columns of the candidate table, e.g. the
+    between_distance or separate_sentence columns of the role examples. It returns the label if all (or any) of its
+    conditions hold and abstains otherwise. The ColumnLFApplier evaluates it with whole-column operations instead of
+    once per row, while calling it on a single data point works like any other labeling function, so other labeling
+    functions can keep using it.
+    """
+
+    def __init__(self, name: str, label: int, conditions: List[Condition], combine: str = 'all') -> None:
+        """
+        :param name: Name of the labeling function.
+        :param label: Label that is returned if the conditions hold.
+        :param conditions: List of (column, operator, value) conditions. Supported operators are ==, !=, <, <=, >, >=,
+        in and not in.
+        :param combine: Whether all or any of the conditions have to hold.
+        """
+        for _, op, _ in conditions:
+            if op not in row_operators:
+                raise ValueError(f"Unsupported operator {op} in labeling function {name}")
+        if combine not in ['all', 'any']:
+            raise ValueError(f"combine has to be 'all' or 'any', got {combine}")
+        self.label = label
+        self.conditions = conditions
+        self.combine = combine
+        super().__init__(name=name, f=self._label_data_point, pre=[])
+
+    def _label_data_point(self, x: DataPoint) -> int:
+        matches = (row_operators[op](x[column], value) for column, op, value in self.conditions)
+        matched = all(matches) if self.combine == 'all' else any(matches)
+        return self.label if matched else ABSTAIN
+
+    def label_columns(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Labels all candidates of the data frame at once.
+        :param df: Candidate table containing the columns of the conditions.
+        :return: Array with the label or ABSTAIN for every row.
+        """
+        matched = np.full(len(df), self.combine == 'all')
+        for column, op, value in self.conditions:
+            column_matches = np.asarray(column_operators[op](df[column].to_numpy(), value), dtype=bool)
+            matched = matched & column_matches if self.combine == 'all' else matched | column_matches
+        return np.where(matched, self.label, ABSTAIN)
+
+
+class ColumnLFApplier(PandasLFApplier):
+    """
+    PandasLFApplier that evaluates ColumnLabelingFunctions as whole-column operations and only runs the remaining
+    labeling functions row by row. The label matrix has the same layout as the one of the PandasLFApplier, so both kinds
+    of labeling functions can be mixed in one list. Every run starts with an empty candidate context, so results that
+    were memoized in earlier runs are not reused for candidates that changed in between.
+    """
+
+    def apply(self, df: pd.DataFrame, progress_bar: bool = True, fault_tolerant: bool = False,
+              return_meta: bool = False) -> Union[np.ndarray, Tuple[np.ndarray, ApplierMetadata]]:
+        """
+        :param df: Candidate table.
+        :param progress_bar: Display a progress bar for the row-wise labeling functions.
+        :param fault_tolerant: Output ABSTAIN if a labeling function fails.
+        :param return_meta: Return metadata, such as fault counts, of the row-wise labeling functions.
+        :return: Label matrix of shape (number of candidates, number of labeling functions).
+        """
+        reset_candidate_context()
+        L = np.full((len(df), len(self._lfs)), ABSTAIN, dtype=int)
+        row_lf_indices = []
+        for j, lf in enumerate(self._lfs):
+            if isinstance(lf, ColumnLabelingFunction):
+                try:
+                    L[:, j] = lf.label_columns(df)
+                    continue
+                except Exception:
+                    if not fault_tolerant:
+                        raise
+            # labeling functions that need the whole row and column labeling functions that failed in the
+            # fault tolerant mode are applied row by row
+            row_lf_indices.append(j)
+
+        meta: Optional[ApplierMetadata] = None
+        if row_lf_indices and len(df) > 0:
+            row_applier = PandasLFApplier([self._lfs[j] for j in row_lf_indices])
+            L_rows = row_applier.apply(df, progress_bar=progress_bar, fault_tolerant=fault_tolerant,
+                                       return_meta=return_meta)
+            if return_meta:
+                L_rows, meta = L_rows
+            L[:, row_lf_indices] = L_rows
+        if return_meta:
+            return L, (meta if meta is not None else ApplierMetadata({}))
+        return L
@@ -1,12 +1,16 @@
-from fuzzywuzzy import process
 import os
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
-from snorkel.labeling import labeling_function
-
+from wsee.data.document_model import get_ner_type_mask, has_ner_type_at, is_location_at, LOCATION_NER_TYPE_MASK
 from wsee.labeling import event_trigger_lfs
-from wsee.preprocessors.pattern_event_processor import parse_pattern_file, find_best_pattern_match, location_subtypes
+from wsee.labeling.event_trigger_lfs import get_trigger_vote
+from wsee.labeling.candidate_context import candidate_memoized, labeling_function
+from wsee.labeling.column_lfs import ColumnLabelingFunction
+from wsee.preprocessors.pattern_event_processor import parse_pattern_file, location_subtypes, PatternMatchIndex
 from wsee.preprocessors.preprocessors import *
 from wsee.utils import utils
+from wsee.utils.lazy import LazyMapping
 
 location = 0
 delay = 1
@@ -21,6 +25,12 @@ route = 9
 no_arg = 10
 ABSTAIN = -1
 
+# NER type lookup tables for the context checks on the integer coded NER tags
+location_street_mask = get_ner_type_mask(['LOCATION_STREET'])
+location_city_mask = get_ner_type_mask(['LOCATION', 'LOCATION_CITY'])
+location_no_route_mask = get_ner_type_mask(['LOCATION', 'LOCATION_STREET', 'LOCATION_CITY', 'LOCATION_STOP'])
+date_time_mask = get_ner_type_mask(['DATE', 'TIME'])
+
 labels = {
     'location': 0,
     'delay': 1,
@@ -36,9 +46,26 @@ labels = {
 }
 
 ROOT_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
-original_rules = parse_pattern_file(ROOT_DIR.joinpath('event-patterns-annotated-britta-olli.txt'))
-general_location_rules = parse_pattern_file(ROOT_DIR.joinpath('event-patterns-phuc.txt'))
-traffic_event_causes = utils.parse_gaz_file(ROOT_DIR.joinpath('traffic_event_causes.gaz'))
+# The rules and the gazetteer are loaded on first use, see load_resources
+original_rules = LazyMapping(partial(parse_pattern_file, ROOT_DIR.joinpath('event-patterns-annotated-britta-olli.txt')),
+                             name='original_rules')
+general_location_rules = LazyMapping(partial(parse_pattern_file, ROOT_DIR.joinpath('event-patterns-phuc.txt')),
+                                     name='general_location_rules')
+traffic_event_causes = LazyMapping(partial(utils.parse_gaz_file, ROOT_DIR.joinpath('traffic_event_causes.gaz')),
+                                   name='traffic_event_causes')
+
+# Pattern match indices of the most recently labeled documents, keyed by rule set and mixed NER pattern
+PATTERN_MATCH_INDEX_CACHE_SIZE = 64
+pattern_match_index_cache: OrderedDict = OrderedDict()
+
+
+def load_resources():
+    """
+    Loads the event pattern rules and the gazetteer used by the labeling functions, which are otherwise loaded on first
+    use.
+    """
+    for resource in [original_rules, general_location_rules, traffic_event_causes]:
+        resource.load()
 
 
 # utility function
@@ -65,6 +92,7 @@ def is_nearest_trigger(between_distance: int, all_trigger_distances: Dict[str, i
 #  Obstruction (all except loc_stop), RailReplacementService (loc_route),
 #  TrafficJam (loc, loc_city, loc_street, loc_route)
 
+@candidate_memoized
 def lf_location(x, same_sentence=True, nearest=False, check_event_type=True):
     """
     Generalized labeling function for location argument type.
@@ -89,7 +117,8 @@ def lf_location(x, same_sentence=True, nearest=False, check_event_type=True):
         all_trigger_distances = get_all_trigger_distances(x)
         if not is_nearest_trigger(between_distance, all_trigger_distances):
             return ABSTAIN
-    if event_trigger_lfs.lf_canceledstop_keywords(x) == event_trigger_lfs.CanceledStop and between_distance > 2:
+    if get_trigger_vote(x, event_trigger_lfs.lf_canceledstop_keywords) == event_trigger_lfs.CanceledStop and \
+            between_distance > 2:
         return ABSTAIN
     trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
     if has_location_preposition(trigger_right_tokens) and x.argument['start'] < x.trigger['start']:
@@ -317,8 +346,8 @@ def get_first_of_entity_types(entities: List[Dict[str, Any]], entity_types: List
     :param exception_list: List of exceptions.
     :return: First entity, whose entity type is in entity_types and whose text is not in the exception_list.
     """
-    entities.sort(key=lambda e: e['start'])
-    for entity in entities:
+    # sorted copy instead of sorting in place, the entity list is shared by all candidates of a document
+    for entity in sorted(entities, key=lambda e: e['start']):
         if entity['entity_type'] in entity_types:
             if exception_list and entity['text'] in exception_list:
                 continue
@@ -327,6 +356,7 @@ def get_first_of_entity_types(entities: List[Dict[str, Any]], entity_types: List
     return None
 
 
+@candidate_memoized
 def no_entity_in_between(x):
     # TODO use sorted entities/ use get left/right neighbor entity
     no_in_between = True
@@ -350,8 +380,8 @@ def lf_delay_event_sentence(x):
                 return ABSTAIN
             if 'früher' in argument_right_tokens[:2]:
                 return ABSTAIN
-            if event_trigger_lfs.lf_delay_chained(x) == event_trigger_lfs.Delay or \
-                    event_trigger_lfs.lf_trafficjam_chained(x) == event_trigger_lfs.TrafficJam:
+            if get_trigger_vote(x, event_trigger_lfs.lf_delay_chained) == event_trigger_lfs.Delay or \
+                    get_trigger_vote(x, event_trigger_lfs.lf_trafficjam_chained) == event_trigger_lfs.TrafficJam:
                 return delay
     return ABSTAIN
 
@@ -367,8 +397,8 @@ def lf_delay_preceding_arg(x):
                 return ABSTAIN
             if 'früher' in argument_right_tokens[:2]:
                 return ABSTAIN
-            if event_trigger_lfs.lf_delay_keywords(x) == event_trigger_lfs.Delay or \
-                    event_trigger_lfs.lf_trafficjam_keywords(x) == event_trigger_lfs.TrafficJam:
+            if get_trigger_vote(x, event_trigger_lfs.lf_delay_keywords) == event_trigger_lfs.Delay or \
+                    get_trigger_vote(x, event_trigger_lfs.lf_trafficjam_keywords) == event_trigger_lfs.TrafficJam:
                 if x.between_distance < 1 and x.argument['start'] < x.trigger['start']:
                     return delay
                 else:
@@ -385,8 +415,8 @@ def lf_delay_preceding_trigger(x):
             if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or \
                     (x.separate_sentence and 'Zeitverlust' not in argument_left_tokens[-4:]):
                 return ABSTAIN
-            if event_trigger_lfs.lf_delay_keywords(x) == event_trigger_lfs.Delay or \
-                    event_trigger_lfs.lf_trafficjam_keywords(x) == event_trigger_lfs.TrafficJam:
+            if get_trigger_vote(x, event_trigger_lfs.lf_delay_keywords) == event_trigger_lfs.Delay or \
+                    get_trigger_vote(x, event_trigger_lfs.lf_trafficjam_keywords) == event_trigger_lfs.TrafficJam:
                 if x.between_distance <= 4 and x.trigger['start'] < x.argument['start'] and no_entity_in_between(x):
                     # chose 4 as maximum distance because of: "Verspätung von bis zu ca. 10 Min."
                     return delay
@@ -411,6 +441,7 @@ def lf_delay_earlier_negative(x):
 
 
 # direction role
+@candidate_memoized
 def lf_direction(x, preceding_arg=False, markers=True, pattern=True):
     if check_required_args(x.entity_type_freqs):
         arg_entity_type = x.argument['entity_type']
@@ -426,7 +457,8 @@ def lf_direction(x, preceding_arg=False, markers=True, pattern=True):
                 return direction
             if markers and has_direction_markers(argument_left_tokens, article_preposition_offset):
                 return direction
-            if pattern and has_direction_pattern(argument_left_tokens, get_windowed_left_ner(x.argument, x.ner_tags)):
+            if pattern and has_direction_pattern(argument_left_tokens,
+                                                 get_windowed_left_ner(x.argument, get_cand_ner_tag_codes(x))):
                 return direction
     return ABSTAIN
 
@@ -445,8 +477,8 @@ def argument_is_direction_word(argument_text):
 
 def has_direction_pattern(argument_left_tokens, argument_left_ner):
     return len(argument_left_tokens) > 2 and argument_left_tokens[-1] == '-' and \
-           argument_left_ner[-3][2:] == 'LOCATION_STREET' and \
-           argument_left_ner[-2][2:] in ['LOCATION', 'LOCATION_CITY']
+           has_ner_type_at(argument_left_ner, -3, location_street_mask) and \
+           has_ner_type_at(argument_left_ner, -2, location_city_mask)
 
 
 @labeling_function(pre=[])
@@ -470,15 +502,17 @@ def lf_direction_markers_pattern_order(x):
 
 
 # start_loc
+@candidate_memoized
 def lf_start_location(x, preceding_arg=False, nearest=False):
     arg_entity_type = x.argument['entity_type']
     if arg_entity_type in ['location', 'location_street', 'location_city', 'location_stop']:
         argument_left_tokens = get_windowed_left_tokens(x.argument, x.tokens)
         argument_right_tokens = get_windowed_right_tokens(x.argument, x.tokens)
-        argument_left_ner = get_windowed_left_ner(x.argument, x.ner_tags)
-        argument_right_ner = get_windowed_right_ner(x.argument, x.ner_tags)
+        ner_tag_codes = get_cand_ner_tag_codes(x)
+        argument_left_ner = get_windowed_left_ner(x.argument, ner_tag_codes)
+        argument_right_ner = get_windowed_right_ner(x.argument, ner_tag_codes)
         if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or \
-                event_trigger_lfs.lf_canceledstop_keywords(x) == event_trigger_lfs.CanceledStop:
+                get_trigger_vote(x, event_trigger_lfs.lf_canceledstop_keywords) == event_trigger_lfs.CanceledStop:
             return ABSTAIN
         if x.separate_sentence or x.not_an_event:
             return ABSTAIN
@@ -499,17 +533,14 @@ def has_start_location_markers(argument_left_tokens, argument_right_tokens,
                                argument_left_ner, argument_right_ner):
     indicator_idx, match_token = next(((idx, token) for idx, token in enumerate(argument_left_tokens[-3:])
                                        if token.lower() in ['zw', 'zw.', 'zwischen', 'ab', 'von']), (-1, None))
-    entity_between_indicator = indicator_idx > -1 and any(left_ner[2:]
-                                                          in ['LOCATION', 'LOCATION_STREET', 'LOCATION_CITY',
-                                                              'LOCATION_STOP', 'LOCATION_ROUTE']
+    entity_between_indicator = indicator_idx > -1 and any(LOCATION_NER_TYPE_MASK[left_ner]
                                                           for left_ner in argument_left_ner[-3 + indicator_idx:])
     if match_token and match_token.lower() == 'von' and 'bis' not in argument_right_tokens:
         # To avoid cases where 'von' indicates a start location of a train line, but not the start location of an event
         return False
     end_loc_after_symbol = argument_right_tokens and argument_right_tokens[0] in ['-', '<', '>', '<>'] and \
                            len(argument_right_ner) > 1 and \
-                           argument_right_ner[1][2:] in ['LOCATION', 'LOCATION_STREET', 'LOCATION_CITY',
-                                                         'LOCATION_STOP', 'LOCATION_ROUTE']
+                           is_location_at(argument_right_ner, 1)
     if (indicator_idx > -1 and not entity_between_indicator) or end_loc_after_symbol:
         return True
     else:
@@ -532,13 +563,14 @@ def lf_start_location_nearest(x):
 
 
 # end_loc
+@candidate_memoized
 def lf_end_location(x, preceding_arg=False, nearest=False):
     arg_entity_type = x.argument['entity_type']
     if arg_entity_type in ['location', 'location_street', 'location_city', 'location_stop']:
         argument_left_tokens = get_windowed_left_tokens(x.argument, x.tokens)
-        argument_left_ner = get_windowed_left_ner(x.argument, x.ner_tags)
+        argument_left_ner = get_windowed_left_ner(x.argument, get_cand_ner_tag_codes(x))
         if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or x.separate_sentence or x.not_an_event or \
-                event_trigger_lfs.lf_canceledstop_keywords(x) != ABSTAIN:
+                get_trigger_vote(x, event_trigger_lfs.lf_canceledstop_keywords) != ABSTAIN:
             return ABSTAIN
         if nearest:
             between_distance = x.between_distance
@@ -553,8 +585,8 @@ def lf_end_location(x, preceding_arg=False, nearest=False):
             return ABSTAIN
         if len(argument_left_tokens) > 2 and argument_left_tokens[-1] == '-':
             # Avoid patterns like: "A1 Münster - Köln in beiden Richtungen ...", where Köln is a direction
-            if argument_left_ner[-3][2:] == 'LOCATION_STREET' and \
-                    argument_left_ner[-2][2:] in ['LOCATION', 'LOCATION_CITY']:
+            if has_ner_type_at(argument_left_ner, -3, location_street_mask) and \
+                    has_ner_type_at(argument_left_ner, -2, location_city_mask):
                 return ABSTAIN
         if has_end_loc_prefix(argument_left_tokens) or has_preceding_start_loc(argument_left_tokens, argument_left_ner):
             return end_loc
@@ -572,8 +604,7 @@ def has_preceding_start_loc(argument_left_tokens, argument_left_ner):
     concatenation_prefix = contains_concatenation_token(argument_left_tokens[-1 - article_preposition_offset:])
     hyphenated_start_end_pair = argument_left_tokens and '-' == argument_left_tokens[-1] and \
                                 len(argument_left_ner) > 1 and \
-                                argument_left_ner[-2][2:] in ['LOCATION', 'LOCATION_STREET', 'LOCATION_CITY',
-                                                              'LOCATION_STOP']
+                                has_ner_type_at(argument_left_ner, -2, location_no_route_mask)
     return (preceding_start_loc and concatenation_prefix) or hyphenated_start_end_pair
 
 
@@ -612,7 +643,7 @@ def lf_start_date_type(x):
         if arg_entity_type in ['date', 'time']:
             argument_left_tokens = get_windowed_left_tokens(x.argument, x.tokens)
             argument_right_tokens = get_windowed_right_tokens(x.argument, x.tokens)
-            argument_right_ner = get_windowed_right_ner(x.argument, x.ner_tags)
+            argument_right_ner = get_windowed_right_ner(x.argument, get_cand_ner_tag_codes(x))
             between_tokens = get_between_tokens(x)
             if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or x.separate_sentence or x.not_an_event:
                 return ABSTAIN
@@ -638,7 +669,7 @@ def has_start_date_markers(argument_left_tokens, argument_right_tokens, argument
     if ((any(token.lower() in ['ab', 'von', 'vom'] for token in argument_left_tokens[-3:]) and
          not any(token.lower() in ['bis'] for token in argument_left_tokens[-3:])) or
             (argument_right_tokens and argument_right_tokens[0] in ['und', '/', '-', '->'] and
-             len(argument_right_ner) > 1 and argument_right_ner[1][2:] in ['DATE', 'TIME'])):
+             len(argument_right_ner) > 1 and has_ner_type_at(argument_right_ner, 1, date_time_mask))):
         return True
     else:
         return False
@@ -680,7 +711,7 @@ def lf_start_date_adjacent(x):
                  'ab' in argument_left_tokens[-3:]):
             return ABSTAIN
         else:
-            argument_left_ner = get_windowed_left_ner(x.argument, x.ner_tags)
+            argument_left_ner = get_windowed_left_ner(x.argument, get_cand_ner_tag_codes(x))
             if has_end_date_markers(argument_left_tokens, argument_left_ner):
                 return ABSTAIN
             else:
@@ -711,7 +742,7 @@ def lf_end_date_type(x):
         if arg_entity_type in ['date', 'time']:
             argument_left_tokens = get_windowed_left_tokens(x.argument, x.tokens)
             argument_right_tokens = get_windowed_right_tokens(x.argument, x.tokens)
-            argument_left_ner = get_windowed_left_ner(x.argument, x.ner_tags)
+            argument_left_ner = get_windowed_left_ner(x.argument, get_cand_ner_tag_codes(x))
             if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or x.separate_sentence or x.not_an_event:
                 return ABSTAIN
             elif 'Meldung' in argument_right_tokens:
@@ -735,7 +766,7 @@ def has_end_date_markers(argument_left_tokens, argument_left_ner):
     if ((any(token.lower() in ['bis', 'endet', 'enden'] for token in argument_left_tokens[-3:]) and
          not any(token.lower() in ['von', 'ab', 'vom'] for token in argument_left_tokens[-2:])) or
             (argument_left_tokens and argument_left_tokens[-1] in ['und', '/', '-'] and
-             len(argument_left_ner) > 1 and argument_left_ner[1][2:] in ['DATE', 'TIME'])):
+             len(argument_left_ner) > 1 and has_ner_type_at(argument_left_ner, 1, date_time_mask))):
         return True
     else:
         return False
@@ -788,11 +819,11 @@ def lf_cause_order(x):
                     (argument_right_tokens and argument_right_tokens[0].lower() in ['erzeugt', 'erzeugen'])):
                 return cause
             elif between_distance < 5 and \
-                    (event_trigger_lfs.lf_trafficjam_keywords(x) == event_trigger_lfs.TrafficJam or
-                     event_trigger_lfs.lf_obstruction_keywords(x) == event_trigger_lfs.Obstruction):
+                    (get_trigger_vote(x, event_trigger_lfs.lf_trafficjam_keywords) == event_trigger_lfs.TrafficJam or
+                     get_trigger_vote(x, event_trigger_lfs.lf_obstruction_keywords) == event_trigger_lfs.Obstruction):
                 # Accidents are often causes for obstructions/ traffic jams
-                highest = process.extractOne(x.argument['text'], event_trigger_lfs.accident_keywords)
-                if highest[1] >= 90:
+                highest = event_trigger_lfs.get_keyword_score(x.argument['text'], 'accident_keywords')
+                if highest >= 90:
                     return cause
     return ABSTAIN
 
@@ -815,7 +846,7 @@ def lf_distance_type(x):
             if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or \
                     x.separate_sentence:
                 return ABSTAIN
-            elif event_trigger_lfs.lf_trafficjam_keywords(x) == event_trigger_lfs.TrafficJam:
+            elif get_trigger_vote(x, event_trigger_lfs.lf_trafficjam_keywords) == event_trigger_lfs.TrafficJam:
                 return jam_length
     return ABSTAIN
 
@@ -833,7 +864,7 @@ def lf_distance_nearest(x):
             elif is_nearest_trigger(between_distance, sentence_trigger_distances) and \
                     entity_trigger_distances[arg_entity_type] and \
                     between_distance <= min(entity_trigger_distances[arg_entity_type]) and \
-                    event_trigger_lfs.lf_trafficjam_keywords(x) == event_trigger_lfs.TrafficJam:
+                    get_trigger_vote(x, event_trigger_lfs.lf_trafficjam_keywords) == event_trigger_lfs.TrafficJam:
                 return jam_length
     return ABSTAIN
 
@@ -846,7 +877,7 @@ def lf_distance_order(x):
             if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or \
                     x.separate_sentence:
                 return ABSTAIN
-            elif event_trigger_lfs.lf_trafficjam_keywords(x) == event_trigger_lfs.TrafficJam and \
+            elif get_trigger_vote(x, event_trigger_lfs.lf_trafficjam_keywords) == event_trigger_lfs.TrafficJam and \
                     x.argument['start'] < x.trigger['start'] and x.between_distance < 2:
                 return jam_length
     return ABSTAIN
@@ -860,7 +891,7 @@ def lf_route_type(x):
         if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or \
                 x.separate_sentence:
             return ABSTAIN
-        elif event_trigger_lfs.lf_canceledstop_keywords(x) == event_trigger_lfs.CanceledStop:
+        elif get_trigger_vote(x, event_trigger_lfs.lf_canceledstop_keywords) == event_trigger_lfs.CanceledStop:
             return route
     return ABSTAIN
 
@@ -872,7 +903,7 @@ def lf_route_type_order(x):
         if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or \
                 x.separate_sentence:
             return ABSTAIN
-        if event_trigger_lfs.lf_canceledstop_keywords(x) == event_trigger_lfs.CanceledStop and \
+        if get_trigger_vote(x, event_trigger_lfs.lf_canceledstop_keywords) == event_trigger_lfs.CanceledStop and \
                 x.argument['start'] < x.trigger['start']:
             return route
     return ABSTAIN
@@ -885,7 +916,7 @@ def lf_route_type_order_between_check(x):
         if lf_too_far_40(x) == no_arg or x.is_multiple_same_event_type or \
                 x.separate_sentence:
             return ABSTAIN
-        elif event_trigger_lfs.lf_canceledstop_keywords(x) == event_trigger_lfs.CanceledStop and \
+        elif get_trigger_vote(x, event_trigger_lfs.lf_canceledstop_keywords) == event_trigger_lfs.CanceledStop and \
                 x.argument['start'] < x.trigger['start']:
             between_text: str = get_between_text(x)
             if x.argument['text'] not in between_text:
@@ -895,20 +926,11 @@ def lf_route_type_order_between_check(x):
 
 
 # no_args
-@labeling_function(pre=[])
-def lf_not_an_event(x):
-    if x.not_an_event:
-        return no_arg
-    else:
-        return ABSTAIN
+lf_not_an_event = ColumnLabelingFunction('lf_not_an_event', no_arg, [('not_an_event', '==', True)])
 
 
-@labeling_function(pre=[])
-def lf_somajo_separate_sentence(x):
-    if x.separate_sentence:
-        return no_arg
-    else:
-        return ABSTAIN
+lf_somajo_separate_sentence = ColumnLabelingFunction('lf_somajo_separate_sentence', no_arg,
+                                                     [('separate_sentence', '==', True)])
 
 
 @labeling_function(pre=[])
@@ -924,18 +946,10 @@ def lf_stanford_separate_sentence(x):
 
 @labeling_function(pre=[pre_spacy_doc])
 def lf_spacy_separate_sentence(x):
-    # proof of concept that makes use of spaCy sentence splitter parsing feature; need proper mappings from
-    # entities to sentences in preprocessor
-    # see: https://github.com/explosion/spaCy/blob/master/examples/information_extraction/entity_relations.py
-    same_sentence = False
-    for sentence in x.spacy_doc['sentences']:
-        # TODO use check_spans from preprocessors to make sure
-        # edge case: two very similar sentences that both contain trigger text and arg text
-
-        if x.spacy_doc['trigger'] in sentence and x.spacy_doc['argument'] in sentence:
-            same_sentence = True
-            break
-    if same_sentence:
+    # makes use of the spaCy sentence splitting, entities are mapped to sentences via their character offsets
+    sentence_index = get_sentence_index(x.spacy_doc['sentences'], [x.trigger, x.argument])
+    trigger_sentence_id, argument_sentence_id = sentence_index['entity_sentences']
+    if trigger_sentence_id > -1 and trigger_sentence_id == argument_sentence_id:
         return ABSTAIN
     else:
         return no_arg
@@ -979,39 +993,39 @@ def lf_not_nearest_event_argument(x):
         return no_arg
 
 
-@labeling_function(pre=[])
-def lf_overlapping(x):
-    between_distance = x.between_distance
-    if between_distance < 0:
-        return no_arg
-    else:
-        return ABSTAIN
+lf_overlapping = ColumnLabelingFunction('lf_overlapping', no_arg, [('between_distance', '<', 0)])
 
 
-@labeling_function(pre=[])
-def lf_too_far_40(x):
-    between_distance = x.between_distance
-    if between_distance > 40:
-        return no_arg
-    else:
-        return ABSTAIN
+lf_too_far_40 = ColumnLabelingFunction('lf_too_far_40', no_arg, [('between_distance', '>', 40)])
 
 
-@labeling_function(pre=[])
-def lf_somajo_separate_sentence_or_too_far_40(x):
-    between_distance = x.between_distance
-    if x.separate_sentence or between_distance > 40:
-        return no_arg
-    else:
-        return ABSTAIN
+lf_somajo_separate_sentence_or_too_far_40 = ColumnLabelingFunction(
+    'lf_somajo_separate_sentence_or_too_far_40', no_arg,
+    [('separate_sentence', '==', True), ('between_distance', '>', 40)], combine='any')
 
 
-@labeling_function(pre=[])
-def lf_multiple_same_event_type(x):
-    if x.is_multiple_same_event_type:
-        return no_arg
+lf_multiple_same_event_type = ColumnLabelingFunction('lf_multiple_same_event_type', no_arg,
+                                                     [('is_multiple_same_event_type', '==', True)])
+
+
+def get_pattern_match_index(mixed_ner: str, rules) -> PatternMatchIndex:
+    """
+    Returns the pattern match index of the rules for the mixed NER pattern of a document. The index is built once per
+    document and shared by all its role candidates.
+    :param mixed_ner: Document text, where each entity has been replaced with its entity type.
+    :param rules: Rules from the event pattern file.
+    :return: Pattern match index.
+    """
+    key = (id(rules), mixed_ner)
+    pattern_match_index = pattern_match_index_cache.get(key)
+    if pattern_match_index is None:
+        pattern_match_index = PatternMatchIndex(mixed_ner, rules)
+        pattern_match_index_cache[key] = pattern_match_index
+        if len(pattern_match_index_cache) > PATTERN_MATCH_INDEX_CACHE_SIZE:
+            pattern_match_index_cache.popitem(last=False)
     else:
-        return ABSTAIN
+        pattern_match_index_cache.move_to_end(key)
+    return pattern_match_index
 
 
 def event_patterns_helper(x, rules, trigger_idx, argument_idx, general_location=False):
@@ -1028,7 +1042,8 @@ def event_patterns_helper(x, rules, trigger_idx, argument_idx, general_location=
         if general_location and argument_entity_type in location_subtypes:
             argument_entity_type = 'LOCATION'
 
-        best_rule, best_match = find_best_pattern_match(x.mixed_ner, rules, trigger_spans, argument_spans)
+        best_rule, best_match = get_pattern_match_index(x.mixed_ner, rules).find_best_match(trigger_spans,
+                                                                                           argument_spans)
 
         if best_rule and best_match:
             """
@@ -1038,7 +1053,7 @@ def event_patterns_helper(x, rules, trigger_idx, argument_idx, general_location=
             """
             # within span of the best match
             entities_subset = [entity for span, entity in zip(x.mixed_ner_spans, x.entities) if
-                               span[0] >= best_match.start() and span[1] <= best_match.end()]
+                               span[0] >= best_match[0] and span[1] <= best_match[1]]
             trigger_position = next(
                 (idx for idx, entity in enumerate(entities_subset) if entity['id'] == x.trigger['id']), None)
             argument_position = next(
@@ -1075,18 +1090,18 @@ def event_patterns_helper(x, rules, trigger_idx, argument_idx, general_location=
 @labeling_function(resources=dict(rules=original_rules), pre=[])
 def lf_event_patterns(x, rules):
     trigger: Dict[str, Any] = x.trigger
-    trigger_idx: int = get_entity_idx(trigger['id'], x.entities)
+    trigger_idx: int = get_entity_idx(trigger['id'], x.entities, x.get('entity_index'))
     argument: Dict[str, Any] = x.argument
-    argument_idx: int = get_entity_idx(argument['id'], x.entities)
+    argument_idx: int = get_entity_idx(argument['id'], x.entities, x.get('entity_index'))
     return event_patterns_helper(x, rules, trigger_idx, argument_idx, general_location=False)
 
 
 @labeling_function(resources=dict(rules=general_location_rules), pre=[])
 def lf_event_patterns_general_location(x, rules):
     trigger: Dict[str, Any] = x.trigger
-    trigger_idx: int = get_entity_idx(trigger['id'], x.entities)
+    trigger_idx: int = get_entity_idx(trigger['id'], x.entities, x.get('entity_index'))
     argument: Dict[str, Any] = x.argument
-    argument_idx: int = get_entity_idx(argument['id'], x.entities)
+    argument_idx: int = get_entity_idx(argument['id'], x.entities, x.get('entity_index'))
     label = event_patterns_helper(x, rules, trigger_idx, argument_idx, general_location=True)
     if label == route:
         return ABSTAIN
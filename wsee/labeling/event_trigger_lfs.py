@@ -1,6 +1,7 @@
-from snorkel.labeling import labeling_function
-from fuzzywuzzy import process
+from typing import Dict, Iterable, List
+from wsee.labeling.candidate_context import candidate_memoized, labeling_function, reset_candidate_context
 from wsee.preprocessors.preprocessors import *
+from wsee.utils import fuzzy_matching
 
 Accident = 0
 CanceledRoute = 1
@@ -85,6 +86,80 @@ trafficjam_exact_keywords = [
     'lahmender Verkehr', 'staut'
 ]
 
+keyword_lists: Dict[str, List[str]] = {
+    'public_transport_keywords': public_transport_keywords,
+    'intervention_keywords': intervention_keywords,
+    'accident_keywords': accident_keywords,
+    'accident_exact_keywords': accident_exact_keywords,
+    'accident_lower_priority_keywords': accident_lower_priority_keywords,
+    'canceledroute_keywords': canceledroute_keywords,
+    'canceledroute_exact_keywords': canceledroute_exact_keywords,
+    'canceledstop_keywords': canceledstop_keywords,
+    'canceledstop_exact_keywords': canceledstop_exact_keywords,
+    'delay_keywords': delay_keywords,
+    'delay_exact_keywords': delay_exact_keywords,
+    'delay_lower_priority_keywords': delay_lower_priority_keywords,
+    'obstruction_keywords': obstruction_keywords,
+    'obstruction_lower_priority_keywords': obstruction_lower_priority_keywords,
+    'railreplacementservice_keywords': railreplacementservice_keywords,
+    'railreplacementservice_exact_keywords': railreplacementservice_exact_keywords,
+    'trafficjam_keywords': trafficjam_keywords,
+    'trafficjam_exact_keywords': trafficjam_exact_keywords
+}
+
+# Best fuzzy match score of a text against each keyword list, see get_keyword_score
+keyword_score_table: Dict[str, Dict[str, int]] = {}
+KEYWORD_SCORE_TABLE_SIZE = 100000
+keyword_scorer: str = fuzzy_matching.DEFAULT_KEYWORD_SCORER
+
+
+def set_keyword_scorer(name: str):
+    """
+    Switches the backend used to score texts against the keyword lists and clears the keyword score table as well as
+    the labeling function results memoized with the previous scores.
+    :param name: Name of the keyword scorer, see fuzzy_matching.keyword_scorers.
+    """
+    global keyword_scorer
+    fuzzy_matching.get_keyword_scorer(name)
+    keyword_scorer = name
+    keyword_score_table.clear()
+    reset_candidate_context()
+
+
+def add_keyword_scores(texts: Iterable[str]) -> Dict[str, Dict[str, int]]:
+    """
+    Scores each unique text that is not yet in the keyword score table against every keyword list, e.g. all trigger
+    texts of a corpus before applying the labeling functions. The fuzzy matching then scales with the number of unique
+    texts instead of the number of candidates times labeling functions. The texts are scored in one batch per keyword
+    list with the configured keyword scorer.
+    :param texts: Texts.
+    :return: Keyword score table.
+    """
+    new_texts = [text for text in dict.fromkeys(texts) if text not in keyword_score_table]
+    if not new_texts:
+        return keyword_score_table
+    if len(keyword_score_table) + len(new_texts) > KEYWORD_SCORE_TABLE_SIZE:
+        keyword_score_table.clear()
+    scorer = fuzzy_matching.get_keyword_scorer(keyword_scorer)
+    keyword_list_scores = {name: scorer(new_texts, keywords) for name, keywords in keyword_lists.items()}
+    for idx, text in enumerate(new_texts):
+        keyword_score_table[text] = {name: scores[idx] for name, scores in keyword_list_scores.items()}
+    return keyword_score_table
+
+
+def get_keyword_score(text: str, keyword_list_name: str) -> int:
+    """
+    Looks up the best fuzzy match score of the text against a keyword list in the keyword score table. Texts that are
+    not in the table yet are scored against all keyword lists at once.
+    :param text: Text, e.g. the trigger text.
+    :param keyword_list_name: Name of the keyword list in keyword_lists, e.g. accident_keywords.
+    :return: Best WRatio score of the text against the keywords.
+    """
+    scores = keyword_score_table.get(text)
+    if scores is None:
+        scores = add_keyword_scores([text])[text]
+    return scores[keyword_list_name]
+
 
 @labeling_function(pre=[])
 def lf_accident_chained(x):
@@ -101,13 +176,10 @@ def lf_accident_chained(x):
 
 @labeling_function(pre=[])
 def lf_accident_keywords(x):
-    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], accident_keywords)
-    highest_lower_priority = process.extractOne(x.trigger['text'], accident_lower_priority_keywords)
-    if highest[1] >= 90 or highest_lower_priority[1] > 90:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'accident_keywords')
+    highest_lower_priority = get_keyword_score(x.trigger['text'], 'accident_lower_priority_keywords')
+    if highest >= 90 or highest_lower_priority > 90:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         else:
@@ -117,13 +189,10 @@ def lf_accident_keywords(x):
 
 @labeling_function(pre=[])
 def lf_accident_keywords_location_street(x):
-    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], accident_keywords)
-    highest_lower_priority = process.extractOne(x.trigger['text'], accident_lower_priority_keywords)
-    if highest[1] >= 90 or highest_lower_priority[1] > 90 or x.trigger['text'] in accident_exact_keywords:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'accident_keywords')
+    highest_lower_priority = get_keyword_score(x.trigger['text'], 'accident_lower_priority_keywords')
+    if highest >= 90 or highest_lower_priority > 90 or x.trigger['text'] in accident_exact_keywords:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif 'location_street' in x.entity_type_freqs:
@@ -133,11 +202,9 @@ def lf_accident_keywords_location_street(x):
 
 @labeling_function(pre=[])
 def lf_accident_keywords_no_cause_check(x):
-    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], accident_keywords)
-    if highest[1] >= 90:
-        if check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens) \
+    highest = get_keyword_score(x.trigger['text'], 'accident_keywords')
+    if highest >= 90:
+        if trigger_in_parentheses(x) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         else:
@@ -159,8 +226,8 @@ def check_cause_keywords(left_tokens, x):
     if cause_token_idx > -1:
         # Avoid cases such as: 'durch Busse ersetzt'
         if cause_word == 'durch':
-            highest = process.extractOne(x.trigger['text'], railreplacementservice_keywords)
-            if highest[1] >= 90 and 'location_route' in x.entity_type_freqs:
+            highest = get_keyword_score(x.trigger['text'], 'railreplacementservice_keywords')
+            if highest >= 90 and 'location_route' in x.entity_type_freqs:
                 return False
         # make sure that no other entity occurs after the causal keyword or is the one containing the cause_keyword
         if cause_token_idx == len(left_tokens) - 1:
@@ -194,6 +261,31 @@ def check_in_parentheses(trigger_text, left_tokens=None, right_tokens=None):
         return False
 
 
+@candidate_memoized
+def trigger_has_cause_keywords(x):
+    """
+    Checks the four tokens left of the trigger for causal keywords, see check_cause_keywords.
+    The result is shared by the labeling functions of a candidate.
+    :param x: DataPoint.
+    :return: True or False depending on a match with any of the causal keywords.
+    """
+    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
+    return check_cause_keywords(trigger_left_tokens[-4:], x)
+
+
+@candidate_memoized
+def trigger_in_parentheses(x):
+    """
+    Checks if the trigger is in parentheses, see check_in_parentheses.
+    The result is shared by the labeling functions of a candidate.
+    :param x: DataPoint.
+    :return: True or False depending on whether the trigger is in parentheses.
+    """
+    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
+    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
+    return check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)
+
+
 @labeling_function(pre=[])
 def lf_canceledroute_keywords(x):
     """
@@ -202,9 +294,9 @@ def lf_canceledroute_keywords(x):
     :return:
     """
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], canceledroute_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], canceledroute_exact_keywords)
-    if (highest[1] >= 90 or highest_exact[1] > 90) and 'location_route' in x.entity_type_freqs:
+    highest = get_keyword_score(x.trigger['text'], 'canceledroute_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'canceledroute_exact_keywords')
+    if (highest >= 90 or highest_exact > 90) and 'location_route' in x.entity_type_freqs:
         if x.trigger['text'] in ['aus', 'aus.'] and any(fall in trigger_left_tokens for fall in ['fällt', 'fallen']):
             return ABSTAIN
         return CanceledRoute
@@ -224,9 +316,9 @@ def lf_canceledroute_replicated(x):
 @labeling_function(pre=[])
 def lf_canceledstop_keywords(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], canceledstop_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], canceledstop_exact_keywords)
-    if (highest[1] >= 90 or highest_exact[1] > 90) and 'location_stop' in x.entity_type_freqs:
+    highest = get_keyword_score(x.trigger['text'], 'canceledstop_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'canceledstop_exact_keywords')
+    if (highest >= 90 or highest_exact > 90) and 'location_stop' in x.entity_type_freqs:
         if not check_route_keywords(trigger_left_tokens[-7:]):
             return CanceledStop
     return ABSTAIN
@@ -266,12 +358,10 @@ def lf_delay_chained(x):
 @labeling_function(pre=[])
 def lf_delay_keywords(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], delay_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], delay_exact_keywords)
-    if highest[1] >= 90 or highest_exact[1] > 90:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'delay_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'delay_exact_keywords')
+    if highest >= 90 or highest_exact > 90:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif is_negated(trigger_left_tokens):
@@ -301,12 +391,10 @@ def lf_delay_duration_positional_check(x):
 @labeling_function(pre=[])
 def lf_delay_keywords_duration(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], delay_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], delay_exact_keywords)
-    if highest[1] >= 90 or highest_exact[1] > 90:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'delay_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'delay_exact_keywords')
+    if highest >= 90 or highest_exact > 90:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif is_negated(trigger_left_tokens):
@@ -319,25 +407,23 @@ def lf_delay_keywords_duration(x):
 @labeling_function(pre=[])
 def lf_delay_keywords_priorities(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], delay_keywords)
-    highest_lower_priority = process.extractOne(x.trigger['text'], delay_lower_priority_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], delay_exact_keywords)
-    if highest[1] >= 90 or highest_exact[1] > 90 or highest_lower_priority[1] >= 90:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'delay_keywords')
+    highest_lower_priority = get_keyword_score(x.trigger['text'], 'delay_lower_priority_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'delay_exact_keywords')
+    if highest >= 90 or highest_exact > 90 or highest_lower_priority >= 90:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif is_negated(trigger_left_tokens):
             return ABSTAIN
-        elif x.entity_type_freqs['trigger'] > 1 and highest_lower_priority[1] >= 90:
+        elif x.entity_type_freqs['trigger'] > 1 and highest_lower_priority >= 90:
             # Check for other higher priority delay trigger: "Verspätung" vs. lower priority "Störung"
             higher_priority_delay = False
             for entity in x.entities:
                 if entity['entity_type'] == 'trigger' and entity['id'] != x.trigger['id']:
-                    best_match = process.extractOne(entity['text'], delay_keywords)
-                    best_exact_match = process.extractOne(entity['text'], delay_exact_keywords)
-                    if best_match[1] >= 90 or best_exact_match[1] > 90:
+                    best_match = get_keyword_score(entity['text'], 'delay_keywords')
+                    best_exact_match = get_keyword_score(entity['text'], 'delay_exact_keywords')
+                    if best_match >= 90 or best_exact_match > 90:
                         higher_priority_delay = True
             if higher_priority_delay:
                 return ABSTAIN
@@ -368,11 +454,9 @@ def lf_obstruction_chained(x):
 @labeling_function(pre=[])
 def lf_obstruction_keywords(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], obstruction_keywords)
-    if highest[1] >= 90 and x.trigger['text'] not in ['aus', 'aus.']:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'obstruction_keywords')
+    if highest >= 90 and x.trigger['text'] not in ['aus', 'aus.']:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif is_negated(trigger_left_tokens):
@@ -385,12 +469,10 @@ def lf_obstruction_keywords(x):
 @labeling_function(pre=[])
 def lf_obstruction_keywords_street(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], obstruction_keywords)
-    highest_lower_priority = process.extractOne(x.trigger['text'], obstruction_lower_priority_keywords)
-    if (highest[1] >= 90 or highest_lower_priority[1] >= 90) and x.trigger['text'] not in ['aus', 'aus.']:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'obstruction_keywords')
+    highest_lower_priority = get_keyword_score(x.trigger['text'], 'obstruction_lower_priority_keywords')
+    if (highest >= 90 or highest_lower_priority >= 90) and x.trigger['text'] not in ['aus', 'aus.']:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif is_negated(trigger_left_tokens):
@@ -403,23 +485,21 @@ def lf_obstruction_keywords_street(x):
 @labeling_function(pre=[])
 def lf_obstruction_keywords_priorities(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], obstruction_keywords)
-    highest_lower_priority = process.extractOne(x.trigger['text'], obstruction_lower_priority_keywords)
-    if (highest[1] >= 90 or highest_lower_priority[1] >= 90) and x.trigger['text'] not in ['aus', 'aus.']:
-        if (check_cause_keywords(trigger_left_tokens[-4:], x) or
-            check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens)) \
+    highest = get_keyword_score(x.trigger['text'], 'obstruction_keywords')
+    highest_lower_priority = get_keyword_score(x.trigger['text'], 'obstruction_lower_priority_keywords')
+    if (highest >= 90 or highest_lower_priority >= 90) and x.trigger['text'] not in ['aus', 'aus.']:
+        if (trigger_has_cause_keywords(x) or trigger_in_parentheses(x)) \
                 and x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif is_negated(trigger_left_tokens):
             return ABSTAIN
-        elif x.entity_type_freqs['trigger'] > 1 and highest_lower_priority[1] >= 90:
+        elif x.entity_type_freqs['trigger'] > 1 and highest_lower_priority >= 90:
             # Check for other higher priority obstruction trigger: "Sperrung" vs. lower priority "Baustelle"
             higher_priority_obstruction = False
             for entity in x.entities:
                 if entity['entity_type'] == 'trigger' and entity['id'] != x.trigger['id']:
-                    best_match = process.extractOne(entity['text'], obstruction_keywords)
-                    if best_match[1] >= 90:
+                    best_match = get_keyword_score(entity['text'], 'obstruction_keywords')
+                    if best_match >= 90:
                         higher_priority_obstruction = True
             if higher_priority_obstruction:
                 return ABSTAIN
@@ -433,9 +513,9 @@ def lf_obstruction_keywords_priorities(x):
 @labeling_function(pre=[])
 def lf_obstruction_keywords_negative(x):
     trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], obstruction_keywords)
-    highest_lower_priority = process.extractOne(x.trigger['text'], obstruction_lower_priority_keywords)
-    if (highest[1] >= 90 or highest_lower_priority[1] >= 90) and x.trigger['text'] not in ['aus', 'aus.']:
+    highest = get_keyword_score(x.trigger['text'], 'obstruction_keywords')
+    highest_lower_priority = get_keyword_score(x.trigger['text'], 'obstruction_lower_priority_keywords')
+    if (highest >= 90 or highest_lower_priority >= 90) and x.trigger['text'] not in ['aus', 'aus.']:
         if is_negated(trigger_left_tokens):
             return O
     return ABSTAIN
@@ -443,9 +523,9 @@ def lf_obstruction_keywords_negative(x):
 
 @labeling_function(pre=[])
 def lf_railreplacementservice_keywords(x):
-    highest = process.extractOne(x.trigger['text'], railreplacementservice_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], railreplacementservice_exact_keywords)
-    if (highest[1] >= 90 or highest_exact[1] > 90) and 'location_route' in x.entity_type_freqs:
+    highest = get_keyword_score(x.trigger['text'], 'railreplacementservice_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'railreplacementservice_exact_keywords')
+    if (highest >= 90 or highest_exact > 90) and 'location_route' in x.entity_type_freqs:
         return RailReplacementService
     return ABSTAIN
 
@@ -475,13 +555,11 @@ def lf_trafficjam_chained(x):
 
 @labeling_function(pre=[])
 def lf_trafficjam_keywords(x):
-    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], trafficjam_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], trafficjam_exact_keywords)
-    if (highest[1] >= 90 or highest_exact[1] > 90) and \
+    highest = get_keyword_score(x.trigger['text'], 'trafficjam_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'trafficjam_exact_keywords')
+    if (highest >= 90 or highest_exact > 90) and \
             x.trigger['text'] not in ['aus', 'aus.']:
-        if check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens) and \
+        if trigger_in_parentheses(x) and \
                 x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         else:
@@ -508,13 +586,11 @@ def lf_trafficjam_distance_positional_check(x):
 
 @labeling_function(pre=[])
 def lf_trafficjam_keywords_street(x):
-    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], trafficjam_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], trafficjam_exact_keywords)
-    if (highest[1] >= 90 or highest_exact[1] > 90) and \
+    highest = get_keyword_score(x.trigger['text'], 'trafficjam_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'trafficjam_exact_keywords')
+    if (highest >= 90 or highest_exact > 90) and \
             x.trigger['text'] not in ['aus', 'aus.']:
-        if check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens) and \
+        if trigger_in_parentheses(x) and \
                 x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif 'location_street' in x.entity_type_freqs:
@@ -524,13 +600,11 @@ def lf_trafficjam_keywords_street(x):
 
 @labeling_function(pre=[])
 def lf_trafficjam_keywords_order(x):
-    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    trigger_right_tokens = get_windowed_right_tokens(x.trigger, x.tokens)
-    highest = process.extractOne(x.trigger['text'], trafficjam_keywords)
-    highest_exact = process.extractOne(x.trigger['text'], trafficjam_exact_keywords)
-    if (highest[1] >= 90 or highest_exact[1] > 90) and \
+    highest = get_keyword_score(x.trigger['text'], 'trafficjam_keywords')
+    highest_exact = get_keyword_score(x.trigger['text'], 'trafficjam_exact_keywords')
+    if (highest >= 90 or highest_exact > 90) and \
             x.trigger['text'] not in ['aus', 'aus.']:
-        if check_in_parentheses(x.trigger['text'], trigger_left_tokens, trigger_right_tokens) and \
+        if trigger_in_parentheses(x) and \
                 x.entity_type_freqs['trigger'] > 1:
             return ABSTAIN
         elif x.entity_type_freqs['trigger'] > 1:
@@ -538,9 +612,9 @@ def lf_trafficjam_keywords_order(x):
             for entity in x.entities:
                 if entity['start'] < x.trigger['start'] and entity['entity_type'] == 'trigger' \
                         and entity['id'] != x.trigger['id']:
-                    best_match = process.extractOne(entity['text'], trafficjam_keywords)
-                    best_exact_match = process.extractOne(entity['text'], trafficjam_exact_keywords)
-                    if best_match[1] >= 90 or best_exact_match[1] > 90:
+                    best_match = get_keyword_score(entity['text'], 'trafficjam_keywords')
+                    best_exact_match = get_keyword_score(entity['text'], 'trafficjam_exact_keywords')
+                    if best_match >= 90 or best_exact_match > 90:
                         not_first_trafficjam_trigger = True
             if not_first_trafficjam_trigger:
                 return ABSTAIN
@@ -569,8 +643,9 @@ def lf_negative(x):
         lf_trafficjam_chained
     ]
     for lf in lfs:
-        if lf(x) != ABSTAIN:
-            if lf(x) == O:
+        label = lf(x)
+        if label != ABSTAIN:
+            if label == O:
                 return O
             else:
                 return ABSTAIN
@@ -579,8 +654,7 @@ def lf_negative(x):
 
 @labeling_function(pre=[])
 def lf_cause_negative(x):
-    trigger_left_tokens = get_windowed_left_tokens(x.trigger, x.tokens)
-    if check_cause_keywords(trigger_left_tokens[-4:], x) and x.entity_type_freqs['trigger'] > 1:
+    if trigger_has_cause_keywords(x) and x.entity_type_freqs['trigger'] > 1:
         return O
     else:
         return ABSTAIN
@@ -593,3 +667,43 @@ def lf_negated_event(x):
         return O
     else:
         return ABSTAIN
+
+
+# Trigger labeling functions whose votes are needed when labeling the role candidates of a trigger
+trigger_vote_lfs = [
+    lf_accident_chained,
+    lf_canceledroute_keywords,
+    lf_canceledstop_keywords,
+    lf_delay_chained,
+    lf_delay_keywords,
+    lf_obstruction_chained,
+    lf_obstruction_keywords,
+    lf_railreplacementservice_keywords,
+    lf_trafficjam_chained,
+    lf_trafficjam_keywords,
+    lf_negative
+]
+
+
+def get_trigger_votes(x) -> Dict[str, int]:
+    """
+    Applies the labeling functions in trigger_vote_lfs to a trigger candidate. The trigger labeling functions do not
+    look at the argument, so the votes can be computed once per trigger and shared by all its role candidates.
+    :param x: Trigger or role candidate.
+    :return: Dictionary mapping the names of the labeling functions to their votes.
+    """
+    return {lf.name: lf(x) for lf in trigger_vote_lfs}
+
+
+def get_trigger_vote(x, lf) -> int:
+    """
+    Returns the vote of a trigger labeling function for the trigger of a role candidate, which is taken from the
+    trigger_votes column if the candidate has one and computed otherwise.
+    :param x: Role candidate.
+    :param lf: Trigger labeling function.
+    :return: Vote of the labeling function.
+    """
+    trigger_votes = x.get('trigger_votes')
+    if trigger_votes and lf.name in trigger_votes:
+        return trigger_votes[lf.name]
+    return lf(x)
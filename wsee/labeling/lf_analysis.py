@@ -0,0 +1,220 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+ABSTAIN = -1
+
+DEFAULT_CHUNK_SIZE = 100000
+
+# Dense arrays (including memory-mapped ones), sparse matrices in the shifted encoding (see to_sparse_label_matrix),
+# paths to .npy/.npz files or iterables of chunks in one of these formats
+LabelMatrix = Union[np.ndarray, sp.spmatrix, str, Path, Iterable[Union[np.ndarray, sp.spmatrix]]]
+
+
+def to_sparse_label_matrix(L: np.ndarray) -> sp.csr_matrix:
+    """
+    Converts a dense label matrix into a sparse one. Labels are shifted by one, so that abstains become implicit zeros.
+    :param L: Label matrix with ABSTAIN (-1) for abstains.
+    :return: Sparse label matrix containing label + 1 for every vote.
+    """
+    return sp.csr_matrix(np.asarray(L) + 1)
+
+
+def save_sparse_label_matrix(L: Union[np.ndarray, sp.spmatrix], path: Union[str, Path]) -> None:
+    """
+    Stores a label matrix in the sparse .npz format that can be analyzed with get_lf_statistics.
+    :param L: Dense label matrix or sparse label matrix in the shifted encoding.
+    :param path: Path of the .npz file.
+    """
+    if not sp.issparse(L):
+        L = to_sparse_label_matrix(L)
+    sp.save_npz(path, sp.csr_matrix(L))
+
+
+def _to_dense_chunk(chunk: Union[np.ndarray, sp.spmatrix]) -> np.ndarray:
+    if sp.issparse(chunk):
+        return chunk.toarray().astype(int) - 1
+    return np.asarray(chunk, dtype=int)
+
+
+def iter_label_matrix_chunks(L: LabelMatrix, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """
+    Iterates over a label matrix in dense chunks of rows, so that only one chunk is held in memory at a time.
+    :param L: Dense or memory-mapped label matrix, sparse label matrix in the shifted encoding, path to a .npy file
+    (memory-mapped) or a .npz file (sparse) or an iterable of chunks.
+    :param chunk_size: Maximum number of rows per chunk.
+    :return: Iterator over dense chunks with ABSTAIN (-1) for abstains.
+    """
+    if isinstance(L, (str, Path)):
+        L = sp.load_npz(L) if str(L).endswith('.npz') else np.load(L, mmap_mode='r')
+    if sp.issparse(L):
+        L = L.tocsr()
+    if isinstance(L, np.ndarray) or sp.issparse(L):
+        for start in range(0, L.shape[0], chunk_size):
+            yield _to_dense_chunk(L[start:start + chunk_size])
+    else:
+        for chunk in L:
+            yield _to_dense_chunk(chunk)
+
+
+def _count_pairs(pairs: np.ndarray, n_lfs: int, cardinality: int) -> np.ndarray:
+    return np.bincount(pairs, minlength=n_lfs * cardinality).reshape(n_lfs, cardinality)
+
+
+def get_lf_statistics(L: LabelMatrix, cardinality: int, Y: Optional[np.ndarray] = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Accumulates the vote counts that LF quality reports are based on in a single pass over the label matrix.
+    :param L: Label matrix in any format supported by iter_label_matrix_chunks.
+    :param cardinality: Number of classes.
+    :param Y: Optional gold labels aligned with the rows of L. Rows with a negative gold label are treated as unlabeled
+    and only count towards coverage, overlaps and conflicts.
+    :param chunk_size: Maximum number of rows that are held in memory at a time.
+    :return: Dictionary of counts.
+    """
+    statistics: Optional[Dict[str, Any]] = None
+    offset = 0
+    for chunk in iter_label_matrix_chunks(L, chunk_size):
+        n_rows, n_lfs = chunk.shape
+        if statistics is None:
+            statistics = {
+                'n': 0,
+                'n_labeled': 0,
+                'cardinality': cardinality,
+                'covered_rows': 0,
+                'overlapped_rows': 0,
+                'conflicted_rows': 0,
+                'coverage': np.zeros(n_lfs, dtype=np.int64),
+                'overlaps': np.zeros(n_lfs, dtype=np.int64),
+                'conflicts': np.zeros(n_lfs, dtype=np.int64),
+                'class_votes': np.zeros((n_lfs, cardinality), dtype=np.int64),
+                'class_correct': np.zeros((n_lfs, cardinality), dtype=np.int64) if Y is not None else None,
+                'class_labeled_votes': np.zeros((n_lfs, cardinality), dtype=np.int64) if Y is not None else None,
+                'class_support': np.zeros(cardinality, dtype=np.int64) if Y is not None else None
+            }
+        elif n_lfs != len(statistics['coverage']):
+            raise ValueError(f"Chunk has {n_lfs} columns, expected {len(statistics['coverage'])}")
+
+        voted = chunk != ABSTAIN
+        n_votes = voted.sum(axis=1)
+        # a data point has conflicting votes if its smallest and largest non-abstain label differ
+        min_label = np.where(voted, chunk, np.iinfo(chunk.dtype).max).min(axis=1)
+        max_label = chunk.max(axis=1)
+        overlapped_rows = n_votes > 1
+        conflicted_rows = overlapped_rows & (min_label != max_label)
+
+        statistics['n'] += n_rows
+        statistics['covered_rows'] += int((n_votes > 0).sum())
+        statistics['overlapped_rows'] += int(overlapped_rows.sum())
+        statistics['conflicted_rows'] += int(conflicted_rows.sum())
+        statistics['coverage'] += voted.sum(axis=0)
+        statistics['overlaps'] += (voted & overlapped_rows[:, None]).sum(axis=0)
+        statistics['conflicts'] += (voted & conflicted_rows[:, None]).sum(axis=0)
+
+        if Y is not None:
+            Y_chunk = np.asarray(Y[offset:offset + n_rows], dtype=int)
+            if len(Y_chunk) != n_rows:
+                raise ValueError("Y has fewer rows than L")
+            labeled_rows = Y_chunk >= 0
+            statistics['n_labeled'] += int(labeled_rows.sum())
+            statistics['class_support'] += np.bincount(Y_chunk[labeled_rows], minlength=cardinality)[:cardinality]
+
+        # count the votes per (labeling function, class) pair with a single bincount over the flattened pair indices
+        class_voted = voted & (chunk < cardinality)
+        rows, lfs = np.nonzero(class_voted)
+        labels = chunk[rows, lfs]
+        pairs = lfs * cardinality + labels
+        statistics['class_votes'] += _count_pairs(pairs, n_lfs, cardinality)
+        if Y is not None:
+            statistics['class_labeled_votes'] += _count_pairs(pairs[labeled_rows[rows]], n_lfs, cardinality)
+            statistics['class_correct'] += _count_pairs(pairs[labels == Y_chunk[rows]], n_lfs, cardinality)
+        offset += n_rows
+
+    if statistics is None:
+        raise ValueError("Label matrix is empty")
+    if Y is not None and offset != len(Y):
+        raise ValueError(f"Y has {len(Y)} rows, but L has {offset}")
+    return statistics
+
+
+def _get_lf_names(statistics: Dict[str, Any], lf_names: Optional[List[str]]) -> List[str]:
+    n_lfs = len(statistics['coverage'])
+    if lf_names is None:
+        return [str(j) for j in range(n_lfs)]
+    if len(lf_names) != n_lfs:
+        raise ValueError(f"Got {len(lf_names)} names for {n_lfs} labeling functions")
+    return list(lf_names)
+
+
+def _divide(numerator: np.ndarray, denominator: Union[np.ndarray, int]) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+def get_label_coverage(statistics: Dict[str, Any]) -> float:
+    """
+    :param statistics: Counts from get_lf_statistics.
+    :return: Fraction of data points with at least one non-abstain vote.
+    """
+    return statistics['covered_rows'] / statistics['n'] if statistics['n'] else 0.0
+
+
+def get_lf_summary(statistics: Dict[str, Any], lf_names: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Builds a report in the format of Snorkel's LFAnalysis.lf_summary from accumulated counts. Correct, Incorrect and
+    Emp. Acc. are only included if gold labels were given and are computed on the data points with a gold label.
+    :param statistics: Counts from get_lf_statistics.
+    :param lf_names: Names of the labeling functions in the column order of L.
+    :return: DataFrame with one row per labeling function.
+    """
+    lf_names = _get_lf_names(statistics, lf_names)
+    n = statistics['n']
+    summary = pd.DataFrame({
+        'j': range(len(lf_names)),
+        'Polarity': [np.nonzero(votes)[0].tolist() for votes in statistics['class_votes']],
+        'Coverage': _divide(statistics['coverage'], n),
+        'Overlaps': _divide(statistics['overlaps'], n),
+        'Conflicts': _divide(statistics['conflicts'], n)
+    }, index=lf_names)
+    if statistics['class_correct'] is not None:
+        correct = statistics['class_correct'].sum(axis=1)
+        labeled_votes = statistics['class_labeled_votes'].sum(axis=1)
+        summary['Correct'] = correct
+        summary['Incorrect'] = labeled_votes - correct
+        summary['Emp. Acc.'] = _divide(correct, labeled_votes)
+    return summary
+
+
+def get_lf_class_summary(statistics: Dict[str, Any], lf_names: Optional[List[str]] = None,
+                         class_names: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Breaks the votes of every labeling function down by the class it votes for, e.g. using ROLE_LABELS or
+    SD4M_RELATION_TYPES as class names. With gold labels, the report includes the precision of the votes for each class
+    and the recall with respect to the gold labels of that class.
+    :param statistics: Counts from get_lf_statistics.
+    :param lf_names: Names of the labeling functions in the column order of L.
+    :param class_names: Names of the classes in label order.
+    :return: DataFrame with one row per labeling function and class the labeling function votes for.
+    """
+    lf_names = _get_lf_names(statistics, lf_names)
+    cardinality = statistics['cardinality']
+    if class_names is None:
+        class_names = [str(c) for c in range(cardinality)]
+    lf_indices, classes = np.nonzero(statistics['class_votes'])
+    class_summary = pd.DataFrame({
+        'lf': [lf_names[j] for j in lf_indices],
+        'class': [class_names[c] for c in classes],
+        'Votes': statistics['class_votes'][lf_indices, classes],
+        'Coverage': _divide(statistics['class_votes'][lf_indices, classes], statistics['n'])
+    })
+    if statistics['class_correct'] is not None:
+        correct = statistics['class_correct'][lf_indices, classes]
+        labeled_votes = statistics['class_labeled_votes'][lf_indices, classes]
+        class_summary['Correct'] = correct
+        class_summary['Incorrect'] = labeled_votes - correct
+        class_summary['Precision'] = _divide(correct, labeled_votes)
+        class_summary['Recall'] = _divide(correct, statistics['class_support'][classes])
+    return class_summary.set_index(['lf', 'class'])
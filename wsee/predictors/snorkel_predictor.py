@@ -1,11 +1,30 @@
-import pandas as pd
+import argparse
+import json
+import logging
+import time
+from collections import deque
+from multiprocessing import Pool
 from pathlib import Path
-from typing import Union, Tuple
+from typing import Union, Tuple, Dict, Any, List, Optional, Iterator
 
-from snorkel.labeling import LabelModel, PandasLFApplier
+import numpy as np
+import pandas as pd
+from snorkel.labeling import LabelModel, LabelingFunction
+from tqdm import tqdm
+from wsee import warm_up
 from wsee.data import pipeline, ace_formatter
+from wsee.labeling.candidate_context import reset_candidate_context
+from wsee.labeling.column_lfs import ColumnLFApplier
+from wsee.preprocessors import preprocessors
+from wsee.preprocessors.preprocessors import get_entity
 from wsee.utils import utils
 
+logger = logging.getLogger('wsee')
+logger.setLevel(level=logging.INFO)
+
+# Label models of a prediction worker process, see init_prediction_worker
+worker_label_models: Optional[Tuple[LabelModel, LabelModel]] = None
+
 
 def load_snorkel_ee_components(save_path: Union[str, Path]) \
         -> Tuple[LabelModel, LabelModel]:
@@ -27,7 +46,8 @@ def predict_documents(documents: pd.DataFrame, trigger_label_model: LabelModel,
 
     # 1. Get trigger probabilities
     df_predict_triggers, _ = pipeline.build_event_trigger_examples(documents)
-    trigger_lf_applier = PandasLFApplier(pipeline.get_trigger_list_lfs())
+    trigger_lfs = pipeline.get_trigger_list_lfs()
+    trigger_lf_applier = ColumnLFApplier(trigger_lfs)
     L_predict_triggers = trigger_lf_applier.apply(df_predict_triggers)
     event_trigger_probs = trigger_label_model.predict_proba(L_predict_triggers)
 
@@ -35,8 +55,9 @@ def predict_documents(documents: pd.DataFrame, trigger_label_model: LabelModel,
         df_predict_triggers, utils.zero_out_abstains(event_trigger_probs, L_predict_triggers))
 
     # 2. Get role probabilities
-    df_predict_roles, _ = pipeline.build_event_role_examples(documents)
-    role_lf_applier = PandasLFApplier(pipeline.get_role_list_lfs())
+    trigger_votes = pipeline.get_label_matrix_trigger_votes(df_predict_triggers, L_predict_triggers, trigger_lfs)
+    df_predict_roles, _ = pipeline.build_event_role_examples(documents, trigger_votes=trigger_votes)
+    role_lf_applier = ColumnLFApplier(pipeline.get_role_list_lfs())
     L_predict_roles = role_lf_applier.apply(df_predict_roles)
     event_roles_probs = role_label_model.predict_proba(L_predict_roles)
 
@@ -63,3 +84,212 @@ def predict_documents(documents: pd.DataFrame, trigger_label_model: LabelModel,
     # 4. Add ACE events
     labeled_documents = ace_formatter.snorkel_to_ace_format(labeled_documents)
     return labeled_documents
+
+
+def apply_lfs(candidates: List[utils.Candidate], lfs: List[LabelingFunction]) -> np.ndarray:
+    """
+    Applies labeling functions to a list of candidates without going through a DataFrame.
+    :param candidates: Trigger or role candidates of a document.
+    :param lfs: Labeling functions.
+    :return: Label matrix of shape (number of candidates, number of labeling functions).
+    """
+    reset_candidate_context()
+    L = np.full((len(candidates), len(lfs)), -1, dtype=int)
+    for i, cand in enumerate(candidates):
+        for j, lf in enumerate(lfs):
+            L[i, j] = lf(cand)
+    return L
+
+
+def predict_document(document: Dict[str, Any], trigger_label_model: LabelModel, role_label_model: LabelModel,
+                     trigger_lfs: Optional[List[LabelingFunction]] = None,
+                     role_lfs: Optional[List[LabelingFunction]] = None,
+                     somajo_doc: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Single document counterpart of predict_documents that works on the document dictionary directly instead of
+    building DataFrames for the candidates, which keeps the per document latency low.
+    :param document: Document with at least text, tokens, ner_tags and entities.
+    :param trigger_label_model: Trained trigger label model.
+    :param role_label_model: Trained role label model.
+    :param trigger_lfs: Trigger labeling functions, defaults to the ones used in the pipeline.
+    :param role_lfs: Role labeling functions, defaults to the ones used in the pipeline.
+    :param somajo_doc: Precomputed SoMaJo output of the document text, e.g. from a batched tokenization.
+    :return: Copy of the document with event triggers, event roles and events in the ACE format.
+    """
+    if trigger_lfs is None:
+        trigger_lfs = pipeline.get_trigger_list_lfs()
+    if role_lfs is None:
+        role_lfs = pipeline.get_role_list_lfs()
+
+    doc = utils.Candidate(document)
+    if 'event_triggers' not in doc and 'event_roles' not in doc:
+        doc = pipeline.add_default_events(doc)
+    if somajo_doc is not None:
+        doc['somajo_doc'] = somajo_doc
+    # Role preprocessing is a superset of the trigger preprocessing
+    doc = pipeline.preprocess_docs_for_roles(doc)
+
+    # 1. Get trigger probabilities
+    event_triggers = []
+    trigger_votes = {}
+    trigger_candidates = [
+        utils.Candidate(doc, trigger=get_entity(event_trigger['id'], doc['entities'], doc['entity_index']))
+        for event_trigger in doc['event_triggers']]
+    if trigger_candidates:
+        L_triggers = apply_lfs(trigger_candidates, trigger_lfs)
+        trigger_votes = pipeline.build_trigger_votes(trigger_candidates, L_triggers, trigger_lfs)
+        event_trigger_probs = utils.zero_out_abstains(trigger_label_model.predict_proba(L_triggers), L_triggers)
+        event_triggers = [{'id': cand.trigger['id'], 'event_type_probs': probs.tolist()}
+                          for cand, probs in zip(trigger_candidates, event_trigger_probs)]
+
+    # 2. Get role probabilities
+    event_roles = []
+    role_candidates = [pipeline.preprocess_role_examples(
+        utils.Candidate(doc, trigger=get_entity(event_role['trigger'], doc['entities'], doc['entity_index']),
+                        argument=get_entity(event_role['argument'], doc['entities'], doc['entity_index']),
+                        trigger_votes=trigger_votes.get((doc.get('id'), event_role['trigger']))))
+        for event_role in doc['event_roles']]
+    if role_candidates:
+        L_roles = apply_lfs(role_candidates, role_lfs)
+        event_role_probs = utils.zero_out_abstains(role_label_model.predict_proba(L_roles), L_roles)
+        event_roles = [{'trigger': cand.trigger['id'], 'argument': cand.argument['id'],
+                        'event_argument_probs': probs.tolist()}
+                       for cand, probs in zip(role_candidates, event_role_probs)]
+
+    # 3. Add trigger & role probabilities and ACE events
+    labeled_document = dict(document)
+    labeled_document['event_triggers'] = event_triggers
+    labeled_document['event_roles'] = event_roles
+    return ace_formatter.create_events(labeled_document)
+
+
+def read_jsonl_batches(input_path: Union[str, Path], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Lazily reads a JSONL file in batches of documents.
+    :param input_path: Path to the JSONL file.
+    :param batch_size: Maximum number of documents per batch.
+    :return: Iterator over batches of documents.
+    """
+    batch = []
+    with open(input_path, 'r', encoding='utf8') as input_file:
+        for line in input_file:
+            if not line.strip():
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def init_prediction_worker(model_path: Union[str, Path]):
+    global worker_label_models
+    worker_label_models = load_snorkel_ee_components(model_path)
+    warm_up()
+
+
+def predict_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Labels a batch of documents with the label models of the worker process and converts them to the ACE format.
+    The texts of the batch are tokenized with a single SoMaJo call.
+    :param batch: Documents.
+    :return: Labeled documents with events, without event triggers and event roles.
+    """
+    trigger_label_model, role_label_model = worker_label_models
+    somajo_docs = preprocessors.get_somajo_doc_batch([document['text'] for document in batch])
+    labeled_batch = []
+    for document, somajo_doc in zip(batch, somajo_docs):
+        labeled_document = predict_document(document, trigger_label_model, role_label_model, somajo_doc=somajo_doc)
+        labeled_document.pop('event_triggers')
+        labeled_document.pop('event_roles')
+        labeled_batch.append(labeled_document)
+    return labeled_batch
+
+
+def predict_jsonl(input_path: Union[str, Path], output_path: Union[str, Path], model_path: Union[str, Path],
+                  batch_size: int = 64, n_workers: int = 4) -> int:
+    """
+    Streams documents from a JSONL file through the label models and incrementally writes the labeled documents
+    in the ACE format to a JSONL file, keeping the input order. Only a bounded number of batches is held in memory.
+    :param input_path: Path to the input JSONL file.
+    :param output_path: Path to the output JSONL file.
+    :param model_path: Directory containing trigger_lm.pt and role_lm.pt.
+    :param batch_size: Number of documents per batch.
+    :param n_workers: Number of worker processes. 1 labels the documents in the main process.
+    :return: Number of labeled documents.
+    """
+    num_docs = 0
+    start_time = time.time()
+    pool = None
+    if n_workers > 1:
+        pool = Pool(n_workers, initializer=init_prediction_worker, initargs=(model_path,))
+    else:
+        init_prediction_worker(model_path)
+    max_pending_batches = 2 * max(n_workers, 1)
+    pending = deque()
+    progress_bar = tqdm(unit='docs')
+
+    with open(output_path, 'w', encoding='utf8') as output_file:
+        def write_batch(labeled_batch):
+            for labeled_document in labeled_batch:
+                output_file.write(json.dumps(labeled_document, ensure_ascii=False) + '\n')
+            progress_bar.update(len(labeled_batch))
+            return len(labeled_batch)
+
+        try:
+            for batch in read_jsonl_batches(input_path, batch_size):
+                if pool is None:
+                    num_docs += write_batch(predict_batch(batch))
+                    continue
+                pending.append(pool.apply_async(predict_batch, (batch,)))
+                if len(pending) >= max_pending_batches:
+                    num_docs += write_batch(pending.popleft().get())
+            while pending:
+                num_docs += write_batch(pending.popleft().get())
+        except BaseException:
+            if pool is not None:
+                # stop the queued batches instead of waiting for them before surfacing the error
+                pool.terminate()
+            raise
+        else:
+            if pool is not None:
+                pool.close()
+        finally:
+            progress_bar.close()
+            if pool is not None:
+                pool.join()
+
+    elapsed_time = time.time() - start_time
+    logger.info(f"Labeled {num_docs} documents in {elapsed_time:.1f}s "
+                f"({num_docs / max(elapsed_time, 1e-9):.1f} documents/s)")
+    return num_docs
+
+
+def main(args):
+    input_path = Path(args.input_path)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input not found: {input_path}")
+    model_path = Path(args.model_path)
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model path not found: {model_path}")
+
+    logger.info(f"Labeling {input_path} with label models from {model_path}")
+    predict_jsonl(input_path, Path(args.output_path), model_path,
+                  batch_size=args.batch_size, n_workers=args.n_workers)
+
+
+if __name__ == '__main__':
+    """
+    Usage: python wsee/predictors/snorkel_predictor.py --input_path data/daystream.jsonl
+    --output_path data/daystream_predicted.jsonl --model_path data/models
+    """
+    parser = argparse.ArgumentParser(
+        description='Applies saved Snorkel label models to a JSONL file and writes ACE format JSONL')
+    parser.add_argument('--input_path', type=str, help='Path to input JSONL')
+    parser.add_argument('--output_path', type=str, help='Path to output JSONL')
+    parser.add_argument('--model_path', type=str, help='Directory containing trigger_lm.pt and role_lm.pt')
+    parser.add_argument('--batch_size', type=int, default=64, help='Number of documents per batch')
+    parser.add_argument('--n_workers', type=int, default=4, help='Number of worker processes')
+    arguments = parser.parse_args()
+    main(arguments)
@@ -0,0 +1,149 @@
+import copy
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Hashable, List, Optional, Tuple
+
+from snorkel.map import BaseMapper
+from snorkel.preprocess import LambdaPreprocessor
+from snorkel.types import DataPoint
+
+from wsee.data.document_model import EntityTable, SPAN_KEYS
+
+# Preprocessors whose output only depends on the document
+DOCUMENT_LEVEL = 'document'
+# Preprocessors whose output depends on the document, the trigger and the argument of a candidate
+CANDIDATE_LEVEL = 'candidate'
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+def get_document_key(x: DataPoint) -> Optional[Hashable]:
+    """
+    Returns the cache key of the document a candidate belongs to, which is the document id together with the hash of
+    the document text in order to guard against reused ids.
+    :param x: DataPoint with at least an id or a text field.
+    :return: Document key or None if the DataPoint has neither an id nor a text.
+    """
+    doc_id = x.get('id')
+    text = x.get('text')
+    if doc_id is None and text is None:
+        return None
+    return doc_id, hash(text)
+
+
+def get_entity_id(entity: Any) -> Optional[str]:
+    if isinstance(entity, Mapping):
+        return entity.get('id')
+    return None
+
+
+def get_candidate_key(x: DataPoint) -> Optional[Hashable]:
+    """
+    Returns the cache key of a trigger or role candidate: (document key, trigger id, argument id).
+    :param x: DataPoint.
+    :return: Candidate key or None if the DataPoint has no document key.
+    """
+    document_key = get_document_key(x)
+    if document_key is None:
+        return None
+    return document_key, get_entity_id(x.get('trigger')), get_entity_id(x.get('argument'))
+
+
+def get_entities_digest(x: DataPoint) -> Optional[Hashable]:
+    """
+    Returns a digest of the texts, spans and types of the entities of a document, so that results derived from the
+    entities are not taken from the cache after the entities were edited.
+    :param x: DataPoint with an entities field.
+    :return: Hash of the entities or None if the DataPoint has no entities.
+    """
+    entities = x.get('entities')
+    if entities is None:
+        return None
+    if isinstance(entities, EntityTable):
+        return hash((tuple(entities.texts), entities.spans.tobytes(), entities.type_ids.tobytes(),
+                     entities.extra_types))
+    return hash(tuple((entity.get('text'), entity.get('entity_type')) + tuple(entity.get(key) for key in SPAN_KEYS)
+                      for entity in entities))
+
+
+class MemoizedPreprocessor(LambdaPreprocessor):
+    """
+    Preprocessor that memoizes the fields it adds to a DataPoint in a bounded LRU cache.
+    In contrast to Snorkel's memoize option the cache is not keyed on the hashed DataPoint, but on the document
+    (level='document') or on the document, trigger and argument (level='candidate'). On a cache hit the DataPoint is
+    only copied shallowly and the cached fields are shared between the candidates, so the preprocessor neither
+    recomputes the fields nor pays for the pickle roundtrip of the whole DataPoint. Labeling functions must therefore
+    not modify the cached fields in place. Preprocessors that read the entities of the document set entity_dependent,
+    which adds a digest of the entities to the key, see get_entities_digest.
+    """
+
+    def __init__(self, name: str, f, fields: List[str], level: str = DOCUMENT_LEVEL,
+                 pre: Optional[List[BaseMapper]] = None, maxsize: int = DEFAULT_CACHE_SIZE,
+                 entity_dependent: bool = False) -> None:
+        if level == DOCUMENT_LEVEL:
+            self._get_key = get_document_key
+        elif level == CANDIDATE_LEVEL:
+            self._get_key = get_candidate_key
+        else:
+            raise ValueError(f"Unknown memoization level {level}, use {DOCUMENT_LEVEL} or {CANDIDATE_LEVEL}")
+        self.fields: List[str] = fields
+        self.level: str = level
+        self.maxsize: int = maxsize
+        self.entity_dependent: bool = entity_dependent
+        super().__init__(name=name, f=f, pre=pre, memoize=False)
+
+    def reset_cache(self) -> None:
+        super().reset_cache()
+        self._lru_cache: OrderedDict = OrderedDict()
+
+    def __call__(self, x: DataPoint) -> Optional[DataPoint]:
+        key = self._get_key(x)
+        if key is None or self.maxsize <= 0:
+            return super().__call__(x)
+        if self.entity_dependent:
+            key = key, get_entities_digest(x)
+        cached_values: Optional[Tuple[Any, ...]] = self._lru_cache.get(key)
+        if cached_values is None:
+            x_mapped = super().__call__(x)
+            if x_mapped is not None and all(field in x_mapped for field in self.fields):
+                self._lru_cache[key] = tuple(x_mapped[field] for field in self.fields)
+                if len(self._lru_cache) > self.maxsize:
+                    self._lru_cache.popitem(last=False)
+            return x_mapped
+        self._lru_cache.move_to_end(key)
+        # copies the container only, the values are shared with x
+        x_mapped = copy.copy(x)
+        for field, value in zip(self.fields, cached_values):
+            x_mapped[field] = value
+        return x_mapped
+
+
+class memoized_preprocessor:
+    """
+    Decorates functions to create preprocessors that are memoized on the document or candidate level, see
+    MemoizedPreprocessor.
+    Example
+    -------
+    >>> @memoized_preprocessor(fields=['entity_type_freqs'], entity_dependent=True)
+    ... def pre_entity_type_freqs(cand):
+    ...     cand['entity_type_freqs'] = get_entity_type_freqs(cand)
+    ...     return cand
+    """
+
+    def __init__(self, fields: List[str], level: str = DOCUMENT_LEVEL, name: Optional[str] = None,
+                 pre: Optional[List[BaseMapper]] = None, maxsize: int = DEFAULT_CACHE_SIZE,
+                 entity_dependent: bool = False) -> None:
+        if callable(fields):
+            raise ValueError("Looks like this decorator is missing parentheses!")
+        self.fields = fields
+        self.level = level
+        self.name = name
+        self.pre = pre
+        self.maxsize = maxsize
+        self.entity_dependent = entity_dependent
+
+    def __call__(self, f) -> MemoizedPreprocessor:
+        name = self.name or f.__name__
+        return MemoizedPreprocessor(name=name, f=f, fields=self.fields, level=self.level, pre=self.pre,
+                                    maxsize=self.maxsize, entity_dependent=self.entity_dependent)
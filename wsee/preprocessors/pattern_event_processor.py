@@ -1,8 +1,19 @@
 import re
-import pickle
-from typing import List
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from wsee import __version__
+from wsee.utils import cache
+from wsee.utils.lazy import LazyMapping
+
 
 escaped_chars = ["<", "(", "[", "{", "\\", "^", "-", "=", "$", "!", "|",
                  "]", "}", ")", "?", "*", "+", ".", ">"]
@@ -46,23 +57,40 @@ class ConverterRule:
         # what does relation type do?
         self.relation_type = None
         self.slots: List[ConverterRuleSlot] = []
+        # literals that occur in every string matched by the pattern
+        self.literals: List[str] = []
 
     def __repr__(self):
         return f"ConverterRule(pattern: {self.pattern}, slots: {self.slots})"
 
 
-def parse_pattern_file(pattern_file):
+def get_rules_cache_path(pattern_file, cache_dir=None) -> Path:
+    """
+    Returns the path of the cached rules of an event pattern file, which depends on the content of the file and the
+    wsee version, so that changes to either invalidate the cache.
+    :param pattern_file: Path to event pattern file.
+    :param cache_dir: Optional cache directory, see cache.get_cache_dir.
+    :return: Path of the cached rules.
+    """
+    content_hash = cache.get_content_hash(pattern_file)
+    return cache.get_cache_dir(cache_dir).joinpath(
+        'event_patterns', f'{Path(pattern_file).name}.{content_hash[:16]}.{__version__}.pkl')
+
+
+def parse_pattern_file(pattern_file, cache_dir=None, use_cache=True):
     """
     Reads an event pattern file and converts each line into a ConverterRule.
     :param pattern_file: Path to event pattern file.
+    :param cache_dir: Optional directory for the parsed rules, see cache.get_cache_dir.
+    :param use_cache: Whether to load and store the parsed rules in the cache directory.
     :return: List of ConverterRules.
     """
-    # first check if we have pickled the rules before
-    pickled_pattern_file = Path(str(pattern_file) + '.pkl')
-
-    if pickled_pattern_file.exists():
-        with open(pickled_pattern_file, 'rb') as pickled_rules:
-            return pickle.load(pickled_rules)
+    # first check if we have cached the rules of this file version before
+    cache_path = get_rules_cache_path(pattern_file, cache_dir) if use_cache else None
+    if cache_path is not None:
+        rules = cache.load_pickle(cache_path)
+        if rules is not None:
+            return rules
 
     tag_pattern = re.compile('\\[.*?]')
     rules = {}
@@ -111,12 +139,13 @@ def parse_pattern_file(pattern_file):
 
             rule.relation_type = relation_type
             rule.id = idx
+            rule.literals = get_required_literals(pattern)
             rule.pattern = convert_to_regex(pattern)
 
             rules[rule.pattern] = rule
 
-    with open(pickled_pattern_file, 'wb') as pickled_rules:
-        pickle.dump(rules, pickled_rules)
+    if cache_path is not None:
+        cache.dump_pickle_atomic(rules, cache_path)
     return rules
 
 
@@ -155,7 +184,25 @@ def replace_whitespace(pattern):
     :return: Pattern with whitespaces replaced.
     """
     whitespaces = re.compile('[\\s]')
-    return whitespaces.sub('[\\s]', pattern)
+    # use a function as replacement, since '\\s' is an invalid escape sequence in replacement strings
+    return whitespaces.sub(lambda match: '[\\s]', pattern)
+
+
+def get_required_literals(pattern):
+    """
+    Extracts the literals that every match of the converted event pattern contains: the whitespace separated parts of
+    the pattern without the optional hashtags, where general LOCATION types are reduced to LOCATION since they match
+    any location subtype.
+    :param pattern: Event pattern.
+    :return: List of required literals.
+    """
+    literals = []
+    for token in pattern.split():
+        for part in token.split('#'):
+            for literal in re.split('(LOCATION(?!_))', part):
+                if literal and literal not in literals:
+                    literals.append(literal)
+    return literals
 
 
 def convert_to_regex(pattern):
@@ -170,6 +217,88 @@ def convert_to_regex(pattern):
     return re.compile(converted_rule_pattern)
 
 
+class LiteralPrefilter:
+    """
+    Multi-pattern literal matcher over the required literals of a rule set. A rule can only match a mixed NER pattern if
+    all of its required literals occur in it, so only those rules have to be evaluated. The literals are found with an
+    Aho-Corasick automaton if pyahocorasick is installed and with substring checks otherwise.
+    """
+
+    def __init__(self, rules: Dict[re.Pattern, ConverterRule], use_automaton: bool = True):
+        """
+        :param rules: Rules from the event pattern file.
+        :param use_automaton: Whether to use the Aho-Corasick automaton if pyahocorasick is installed.
+        """
+        self.literals: List[str] = []
+        literal_ids: Dict[str, int] = {}
+        # required literals of each rule as bit mask over the literal ids
+        self.rule_literal_masks: List[Tuple[re.Pattern, int]] = []
+        for p, rule in rules.items():
+            literal_mask = 0
+            for literal in getattr(rule, 'literals', None) or []:
+                if literal not in literal_ids:
+                    literal_ids[literal] = len(self.literals)
+                    self.literals.append(literal)
+                literal_mask |= 1 << literal_ids[literal]
+            self.rule_literal_masks.append((p, literal_mask))
+        self.automaton = None
+        if use_automaton and ahocorasick is not None and self.literals:
+            self.automaton = ahocorasick.Automaton()
+            for literal_id, literal in enumerate(self.literals):
+                self.automaton.add_word(literal, literal_id)
+            self.automaton.make_automaton()
+
+    def find_literals(self, pattern: str) -> int:
+        """
+        :param pattern: Mixed NER pattern.
+        :return: Bit mask of the literals that occur in the pattern.
+        """
+        found = 0
+        if self.automaton is not None:
+            for _, literal_id in self.automaton.iter(pattern):
+                found |= 1 << literal_id
+        else:
+            for literal_id, literal in enumerate(self.literals):
+                if literal in pattern:
+                    found |= 1 << literal_id
+        return found
+
+    def get_candidate_patterns(self, pattern: str) -> List[re.Pattern]:
+        """
+        :param pattern: Mixed NER pattern.
+        :return: Compiled rule patterns whose required literals all occur in the pattern, in the order of the rules.
+        """
+        missing = ~self.find_literals(pattern)
+        return [p for p, literal_mask in self.rule_literal_masks if not literal_mask & missing]
+
+
+LITERAL_PREFILTER_CACHE_SIZE = 8
+# Literal prefilters of rule sets that are plain dictionaries, keyed by the id of the dictionary and validated against
+# a snapshot of its rules
+literal_prefilter_cache: 'OrderedDict[int, Tuple[Dict[re.Pattern, ConverterRule], LiteralPrefilter]]' = OrderedDict()
+
+
+def get_literal_prefilter(rules: Mapping[re.Pattern, ConverterRule]) -> LiteralPrefilter:
+    """
+    Returns the literal prefilter of a rule set. Read-only rule sets (LazyMapping) build it once on first use. For other
+    rule sets it is kept in a small LRU cache and rebuilt if the rules were changed in place.
+    :param rules: Rules from the event pattern file.
+    :return: Literal prefilter.
+    """
+    if isinstance(rules, LazyMapping):
+        return rules.get_derived('literal_prefilter', LiteralPrefilter)
+    key = id(rules)
+    cached = literal_prefilter_cache.get(key)
+    if cached is None or cached[0] != rules:
+        cached = (dict(rules), LiteralPrefilter(rules))
+        literal_prefilter_cache[key] = cached
+        if len(literal_prefilter_cache) > LITERAL_PREFILTER_CACHE_SIZE:
+            literal_prefilter_cache.popitem(last=False)
+    else:
+        literal_prefilter_cache.move_to_end(key)
+    return cached[1]
+
+
 def find_best_pattern_match(pattern, rules, trigger_spans, argument_spans):
     """
     Tries to find best matching rule for pattern while ensuring that the trigger and argument
@@ -183,7 +312,7 @@ def find_best_pattern_match(pattern, rules, trigger_spans, argument_spans):
     # pattern has to be mixed ner pattern from text containing the relevant trigger/trigger-arg pair
     best_match = None
     best_rule = None
-    for p in rules.keys():
+    for p in get_literal_prefilter(rules).get_candidate_patterns(pattern):
         matches = p.finditer(pattern)
         for match in matches:
             if match.start() <= min(trigger_spans[0], argument_spans[0]) \
@@ -192,3 +321,40 @@ def find_best_pattern_match(pattern, rules, trigger_spans, argument_spans):
                     best_match = match
                     best_rule = rules[p]
     return best_rule, best_match
+
+
+class PatternMatchIndex:
+    """
+    Index of all matches of a set of rules in one mixed NER pattern. The rules are matched once per document and the
+    matches are stored as intervals sorted by length, so that the longest match covering a trigger and an argument is a
+    lookup instead of matching all rules again for each trigger-argument pair.
+    """
+
+    def __init__(self, pattern: str, rules: Dict[re.Pattern, ConverterRule]):
+        matches: List[Tuple[int, int, int, ConverterRule]] = []
+        for p in get_literal_prefilter(rules).get_candidate_patterns(pattern):
+            for match in p.finditer(pattern):
+                matches.append((match.start(), match.end(), len(matches), rules[p]))
+        # longest matches first, ties are resolved in favor of the earlier rule and match like find_best_pattern_match
+        matches.sort(key=lambda m: (m[0] - m[1], m[2]))
+        self.starts: np.ndarray = np.array([m[0] for m in matches], dtype=int)
+        self.ends: np.ndarray = np.array([m[1] for m in matches], dtype=int)
+        self.rules: List[ConverterRule] = [m[3] for m in matches]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def find_best_match(self, trigger_spans, argument_spans) \
+            -> Tuple[Optional[ConverterRule], Optional[Tuple[int, int]]]:
+        """
+        Finds the longest match that contains the trigger and the argument.
+        :param trigger_spans: Character based spans of the trigger.
+        :param argument_spans: Character based spans of the argument.
+        :return: Best matching rule and span of the best match.
+        """
+        covering = (self.starts <= min(trigger_spans[0], argument_spans[0])) & \
+                   (self.ends >= max(trigger_spans[1], argument_spans[1]))
+        if not covering.any():
+            return None, None
+        best_idx = int(covering.argmax())
+        return self.rules[best_idx], (int(self.starts[best_idx]), int(self.ends[best_idx]))
@@ -1,146 +1,274 @@
 import re
+import bisect
 import logging
 import numpy as np
 
-from typing import Dict, List, Optional, Any, Tuple
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
 
-import spacy
-from somajo import SoMaJo
-from somajo.token import Token
-from snorkel.preprocess import preprocessor
 from snorkel.types import DataPoint
+from wsee.data import document_model
+from wsee.data.document_model import EntityTable
+from wsee.labeling.candidate_context import candidate_memoized
+from wsee.preprocessors.memoization import memoized_preprocessor, CANDIDATE_LEVEL
 from wsee.preprocessors.pattern_event_processor import escape_regex_chars
 
+if TYPE_CHECKING:
+    # spaCy and SoMaJo are only imported when the models are loaded, see load_spacy_model and load_somajo_model
+    from spacy.language import Language
+    from somajo import SoMaJo
+    from somajo.token import Token
+
 punctuation_marks = ["<", "(", "[", "{", "\\", "^", "-", "=", "$", "!", "|",
                      "]", "}", ")", "?", "*", "+", ".", ",", ":", ";", ">",
                      "_", "#", "/"]
 
-nlp_somajo: Optional[SoMaJo] = None
+nlp_somajo: Optional['SoMaJo'] = None
+nlp_spacy: Optional['Language'] = None
+# spaCy components that are able to set sentence boundaries, in order of preference
+spacy_sentence_components = ['senter', 'parser', 'sentencizer']
+
+
+class TokenWindow(Sequence):
+    """
+    Read-only view on a window [start, end) of a per document sequence such as tokens, POS or NER tags.
+    Indexing, slicing, membership tests and iteration work like on the corresponding list slice, but the elements are
+    not copied.
+    """
+    __slots__ = ('sequence', 'start', 'end')
+
+    def __init__(self, sequence, start: int, end: int):
+        self.sequence = sequence
+        self.start: int = max(0, min(start, len(sequence)))
+        self.end: int = max(self.start, min(end, len(sequence)))
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, item):
+        positions = range(self.start, self.end)[item]
+        if isinstance(item, slice):
+            if positions.step == 1:
+                return TokenWindow(self.sequence, positions.start, positions.stop)
+            return [self.sequence[position] for position in positions]
+        return self.sequence[positions]
+
+    def __iter__(self):
+        sequence = self.sequence
+        for position in range(self.start, self.end):
+            yield sequence[position]
+
+    def __contains__(self, value):
+        if isinstance(self.sequence, (list, tuple)):
+            try:
+                self.sequence.index(value, self.start, self.end)
+                return True
+            except ValueError:
+                return False
+        return any(element == value for element in self)
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenWindow, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.sequence, self.start, self.end
+
+    def __setstate__(self, state):
+        self.sequence, self.start, self.end = state
+
+    def __repr__(self):
+        return f"TokenWindow({list(self)})"
 
 
 def load_somajo_model():
     global nlp_somajo
     if nlp_somajo is None:
+        from somajo import SoMaJo
         nlp_somajo = SoMaJo("de_CMC", split_camel_case=True)
 
 
 def load_spacy_model():
     global nlp_spacy
     if nlp_spacy is None:
+        import spacy
         nlp_spacy = spacy.load('de_core_news_md')
 
 
-def get_entity_idx(entity_id: str, entities: List[Dict[str, Any]]) -> int:
-    entity_idx: int = next((idx for idx, x in enumerate(entities) if x['id'] == entity_id), -1)
+def get_entity_index(entities: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Builds an index over the entities of a document once, so that entities can be looked up by their id in constant
+    time instead of scanning the entity list for every candidate.
+    :param entities: Entities of the document.
+    :return: Dictionary containing the entity id to list position mapping (positions), the list positions sorted
+    by the token based start of the entities (start_order) and the entity id to rank in start_order mapping (ranks).
+    """
+    positions: Dict[str, int] = {}
+    for idx, entity in enumerate(entities):
+        # keep the first occurrence just like the linear scan does
+        positions.setdefault(entity['id'], idx)
+    start_order: List[int] = sorted(range(len(entities)), key=lambda idx: entities[idx]['start'])
+    ranks: Dict[str, int] = {}
+    for rank, idx in enumerate(start_order):
+        ranks.setdefault(entities[idx]['id'], rank)
+    return {
+        'positions': positions,
+        'start_order': start_order,
+        'ranks': ranks
+    }
+
+
+@candidate_memoized
+def get_cand_ner_tag_codes(cand: DataPoint) -> np.ndarray:
+    """
+    Returns the integer coded NER tags that were attached to the document during preprocessing or encodes them if
+    they are missing. The result is memoized per candidate, so that the tags are encoded at most once per candidate
+    when several labeling functions check the NER context.
+    :param cand: DataPoint.
+    :return: NER tag codes, see document_model.encode_ner_tags.
+    """
+    ner_tag_codes: Optional[np.ndarray] = cand.get('ner_tag_codes')
+    if ner_tag_codes is None or len(ner_tag_codes) != len(cand.ner_tags):
+        ner_tag_codes = document_model.encode_ner_tags(cand.ner_tags)
+    return ner_tag_codes
+
+
+def get_entity_idx(entity_id: str, entities: List[Dict[str, Any]],
+                   entity_index: Optional[Dict[str, Any]] = None) -> int:
+    entity_idx: int = -1
+    if entity_index is not None:
+        entity_idx = entity_index['positions'].get(entity_id, -1)
+        if entity_idx >= len(entities) or entities[entity_idx]['id'] != entity_id:
+            # entity list was modified after building the index
+            entity_idx = -1
+    if entity_idx < 0:
+        entity_idx = next((idx for idx, x in enumerate(entities) if x['id'] == entity_id), -1)
     if entity_idx < 0:
         raise Exception(f'The entity_id {entity_id} was not found in:\n {entities}')
     else:
         return entity_idx
 
 
-def get_entity(entity_id: str, entities: List[Dict[str, Any]]) -> Dict:
-    entity: Optional[Dict] = next((x for x in entities if x['id'] == entity_id), None)
-    if entity:
-        return entity
-    else:
-        raise Exception(f'The entity_id {entity_id} was not found in:\n {entities}')
+def get_entity(entity_id: str, entities: List[Dict[str, Any]], entity_index: Optional[Dict[str, Any]] = None) -> Dict:
+    return entities[get_entity_idx(entity_id, entities, entity_index)]
 
 
-def get_left_neighbor_entity(entity: Dict[str, Any], entities: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    entities.sort(key=lambda e: e['start'])
-    entity_idx: int = next(idx for idx, item in enumerate(entities) if item['id'] == entity['id'])
-    if entity_idx - 1 >= 0:
-        return entities[entity_idx - 1]
+def get_left_neighbor_entity(entity: Dict[str, Any], entities: List[Dict[str, Any]],
+                             entity_index: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Returns the entity preceding the given entity with regard to the token based start without modifying the entities.
+    :param entity: Entity.
+    :param entities: Entities of the document.
+    :param entity_index: Entity index of the document, built on the fly if it is not provided.
+    :return: Left neighbor entity or None.
+    """
+    if entity_index is None:
+        entity_index = get_entity_index(entities)
+    entity_rank: int = entity_index['ranks'][entity['id']]
+    if entity_rank - 1 >= 0:
+        return entities[entity_index['start_order'][entity_rank - 1]]
     else:
         return None
 
 
-def get_right_neighbor_entity(entity, entities):
-    entities.sort(key=lambda e: e['start'])
-    entity_idx: int = next(idx for idx, item in enumerate(entities) if item['id'] == entity['id'])
-    if entity_idx + 1 < len(entities):
-        return entities[entity_idx + 1]
+def get_right_neighbor_entity(entity: Dict[str, Any], entities: List[Dict[str, Any]],
+                              entity_index: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Returns the entity following the given entity with regard to the token based start without modifying the entities.
+    :param entity: Entity.
+    :param entities: Entities of the document.
+    :param entity_index: Entity index of the document, built on the fly if it is not provided.
+    :return: Right neighbor entity or None.
+    """
+    if entity_index is None:
+        entity_index = get_entity_index(entities)
+    entity_rank: int = entity_index['ranks'][entity['id']]
+    if entity_rank + 1 < len(entity_index['start_order']):
+        return entities[entity_index['start_order'][entity_rank + 1]]
     else:
         return None
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['trigger_idx'], level=CANDIDATE_LEVEL)
 def pre_trigger_idx(cand: DataPoint) -> DataPoint:
     trigger: Dict[str, Any] = cand.trigger
-    trigger_idx: int = get_entity_idx(trigger['id'], cand.entities)
+    trigger_idx: int = get_entity_idx(trigger['id'], cand.entities, cand.get('entity_index'))
     cand['trigger_idx']: int = trigger_idx
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['argument_idx'], level=CANDIDATE_LEVEL)
 def pre_argument_idx(cand: DataPoint) -> DataPoint:
     argument: Dict[str, Any] = cand.argument
-    argument_idx: int = get_entity_idx(argument['id'], cand.entities)
+    argument_idx: int = get_entity_idx(argument['id'], cand.entities, cand.get('entity_index'))
     cand['argument_idx']: int = argument_idx
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['trigger_left_tokens'], level=CANDIDATE_LEVEL)
 def pre_trigger_left_tokens(cand: DataPoint) -> DataPoint:
     trigger: Dict[str, Any] = cand.trigger
-    cand['trigger_left_tokens']: List[str] = get_windowed_left_tokens(trigger, cand.tokens)
+    cand['trigger_left_tokens']: TokenWindow = get_windowed_left_tokens(trigger, cand.tokens)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['trigger_left_pos'], level=CANDIDATE_LEVEL)
 def pre_trigger_left_pos(cand: DataPoint) -> DataPoint:
     trigger: Dict[str, Any] = cand.trigger
     if 'pos' in cand:
-        cand['trigger_left_pos']: List[str] = get_windowed_left_pos(trigger, cand.pos)
+        cand['trigger_left_pos']: TokenWindow = get_windowed_left_pos(trigger, cand.pos)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['trigger_left_ner'], level=CANDIDATE_LEVEL)
 def pre_trigger_left_ner(cand: DataPoint) -> DataPoint:
     trigger: Dict[str, Any] = cand.trigger
     if 'ner' in cand:
-        cand['trigger_left_ner']: List[str] = get_windowed_left_ner(trigger, cand.ner_tags)
+        cand['trigger_left_ner']: TokenWindow = get_windowed_left_ner(trigger, cand.ner_tags)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['argument_left_tokens'], level=CANDIDATE_LEVEL)
 def pre_argument_left_tokens(cand: DataPoint) -> DataPoint:
     argument: Dict[str, Any] = cand.argument
-    cand['argument_left_tokens']: List[str] = get_windowed_left_tokens(argument, cand.tokens)
+    cand['argument_left_tokens']: TokenWindow = get_windowed_left_tokens(argument, cand.tokens)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['argument_left_pos'], level=CANDIDATE_LEVEL)
 def pre_argument_left_pos(cand: DataPoint) -> DataPoint:
     argument: Dict[str, Any] = cand.argument
     if 'pos' in cand:
-        cand['argument_left_pos']: List[str] = get_windowed_left_pos(argument, cand.pos)
+        cand['argument_left_pos']: TokenWindow = get_windowed_left_pos(argument, cand.pos)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['argument_left_ner'], level=CANDIDATE_LEVEL)
 def pre_argument_left_ner(cand: DataPoint) -> DataPoint:
     argument: Dict[str, Any] = cand.argument
     if 'ner' in cand:
-        cand['argument_left_ner']: List[str] = get_windowed_left_ner(argument, cand.ner_tags)
+        cand['argument_left_ner']: TokenWindow = get_windowed_left_ner(argument, cand.ner_tags)
     return cand
 
 
-def get_windowed_left_tokens(entity: Dict, tokens: List[str], window_size: int = None) -> List[str]:
+def get_windowed_left_tokens(entity: Dict, tokens: List[str], window_size: int = None) -> TokenWindow:
     window_end: int = entity['start']
     if window_size is None:
         window_start: int = 0
     else:
         window_start: int = max(0, window_end - window_size)
 
-    return tokens[window_start:window_end]
+    return TokenWindow(tokens, window_start, window_end)
 
 
-def get_windowed_left_pos(entity: Dict, pos: List[str], window_size: int = None) -> List[str]:
+def get_windowed_left_pos(entity: Dict, pos: List[str], window_size: int = None) -> TokenWindow:
     return get_windowed_left_tokens(entity, pos, window_size)
 
 
-def get_windowed_left_ner(entity: Dict, ner: List[str], window_size: int = None) -> List[str]:
+def get_windowed_left_ner(entity: Dict, ner: List[str], window_size: int = None) -> TokenWindow:
     return get_windowed_left_tokens(entity, ner, window_size)
 
 
@@ -151,71 +279,71 @@ def get_between_text(cand: DataPoint) -> str:
     return between_text
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['trigger_right_tokens'], level=CANDIDATE_LEVEL)
 def pre_trigger_right_tokens(cand: DataPoint) -> DataPoint:
     trigger: Dict[str, Any] = cand.trigger
-    cand['trigger_right_tokens']: List[str] = get_windowed_right_tokens(trigger, cand.tokens)
+    cand['trigger_right_tokens']: TokenWindow = get_windowed_right_tokens(trigger, cand.tokens)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['trigger_right_pos'], level=CANDIDATE_LEVEL)
 def pre_trigger_right_pos(cand: DataPoint) -> DataPoint:
     trigger: Dict[str, Any] = cand.trigger
     if 'pos' in cand:
-        cand['trigger_right_pos']: List[str] = get_windowed_right_pos(trigger, cand.pos)
+        cand['trigger_right_pos']: TokenWindow = get_windowed_right_pos(trigger, cand.pos)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['trigger_right_ner'], level=CANDIDATE_LEVEL)
 def pre_trigger_right_ner(cand: DataPoint) -> DataPoint:
     trigger: Dict[str, Any] = cand.trigger
     if 'ner' in cand:
-        cand['trigger_right_ner']: List[str] = get_windowed_right_ner(trigger, cand.ner_tags)
+        cand['trigger_right_ner']: TokenWindow = get_windowed_right_ner(trigger, cand.ner_tags)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['argument_right_tokens'], level=CANDIDATE_LEVEL)
 def pre_argument_right_tokens(cand: DataPoint) -> DataPoint:
     argument: Dict[str, Any] = cand.argument
-    cand['argument_right_tokens']: List[str] = get_windowed_right_tokens(argument, cand.tokens)
+    cand['argument_right_tokens']: TokenWindow = get_windowed_right_tokens(argument, cand.tokens)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['argument_right_pos'], level=CANDIDATE_LEVEL)
 def pre_argument_right_pos(cand: DataPoint) -> DataPoint:
     argument: Dict[str, Any] = cand.argument
     if 'pos' in cand:
-        cand['argument_right_pos']: List[str] = get_windowed_right_pos(argument, cand.pos)
+        cand['argument_right_pos']: TokenWindow = get_windowed_right_pos(argument, cand.pos)
     return cand
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['argument_right_ner'], level=CANDIDATE_LEVEL)
 def pre_argument_right_ner(cand: DataPoint) -> DataPoint:
     argument: Dict[str, Any] = cand.argument
     if 'ner' in cand:
-        cand['argument_right_ner']: List[str] = get_windowed_right_ner(argument, cand.ner_tags)
+        cand['argument_right_ner']: TokenWindow = get_windowed_right_ner(argument, cand.ner_tags)
     return cand
 
 
-def get_windowed_right_tokens(entity: Dict, tokens: List[str], window_size: int = None) -> List[str]:
+def get_windowed_right_tokens(entity: Dict, tokens: List[str], window_size: int = None) -> TokenWindow:
     window_start: int = entity['end']
     if window_size is None:
         window_end: int = len(tokens)
     else:
         window_end: int = min(len(tokens), window_start + window_size)
 
-    return tokens[window_start:window_end]
+    return TokenWindow(tokens, window_start, window_end)
 
 
-def get_windowed_right_pos(entity: Dict, pos: List[str], window_size: int = None) -> List[str]:
+def get_windowed_right_pos(entity: Dict, pos: List[str], window_size: int = None) -> TokenWindow:
     return get_windowed_right_tokens(entity, pos, window_size)
 
 
-def get_windowed_right_ner(entity: Dict, ner: List[str], window_size: int = None) -> List[str]:
+def get_windowed_right_ner(entity: Dict, ner: List[str], window_size: int = None) -> TokenWindow:
     return get_windowed_right_tokens(entity, ner, window_size)
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['between_tokens'], level=CANDIDATE_LEVEL)
 def pre_between_tokens(cand: DataPoint) -> DataPoint:
     cand['between_tokens']: List[str] = get_between_tokens(cand)
     return cand
@@ -239,7 +367,7 @@ def get_between_tokens(cand: DataPoint) -> List[str]:
     return cand.tokens[start:end]
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['between_distance'], level=CANDIDATE_LEVEL)
 def pre_between_distance(cand: DataPoint) -> DataPoint:
     cand['between_distance']: int = get_between_distance(cand)
     return cand
@@ -248,10 +376,15 @@ def pre_between_distance(cand: DataPoint) -> DataPoint:
 def get_between_distance(cand: DataPoint) -> int:
     trigger: Dict[str, Any] = cand.trigger
     argument: Dict[str, Any] = cand.argument
-    return get_entity_distance(trigger, argument)
+    distance_index: Dict[str, Any] = get_cand_distance_index(cand)
+    trigger_row: Optional[int] = distance_index['trigger_rows'].get(trigger['id'])
+    argument_idx: Optional[int] = distance_index['entity_positions'].get(argument['id'])
+    if trigger_row is None or argument_idx is None:
+        return get_entity_distance(trigger, argument)
+    return distance_index['distances'][trigger_row][argument_idx]
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['all_trigger_distances'], level=CANDIDATE_LEVEL, entity_dependent=True)
 def pre_all_trigger_distances(cand: DataPoint) -> DataPoint:
     cand['all_trigger_distances']: Dict[str, Any] = get_all_trigger_distances(cand)
     return cand
@@ -261,16 +394,23 @@ def get_all_trigger_distances(cand: DataPoint) -> Dict[str, int]:
     argument: Dict[str, Any] = cand.argument
     all_trigger_distances: Dict[str, int] = {}
     event_triggers: List[Dict] = cand.event_triggers
+    distance_index: Dict[str, Any] = get_cand_distance_index(cand)
+    trigger_rows: Dict[str, int] = distance_index['trigger_rows']
+    argument_idx: Optional[int] = distance_index['entity_positions'].get(argument['id'])
     for event_trigger in event_triggers:
         trigger_id = event_trigger['id']
         if trigger_id != argument['id']:
-            trigger: Dict[str, Any] = get_entity(trigger_id, cand.entities)
-            distance: int = get_entity_distance(trigger, argument)
+            trigger_row: Optional[int] = trigger_rows.get(trigger_id)
+            if trigger_row is None or argument_idx is None:
+                trigger: Dict[str, Any] = get_entity(trigger_id, cand.entities, cand.get('entity_index'))
+                distance: int = get_entity_distance(trigger, argument)
+            else:
+                distance: int = distance_index['distances'][trigger_row][argument_idx]
             all_trigger_distances[trigger_id]: int = distance
     return all_trigger_distances
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['entity_trigger_distances'], level=CANDIDATE_LEVEL, entity_dependent=True)
 def pre_entity_trigger_distances(cand: DataPoint) -> DataPoint:
     cand['entity_trigger_distances']: Dict[str, List[int]] = get_entity_trigger_distances(cand)
     return cand
@@ -296,9 +436,14 @@ def get_entity_trigger_distances(cand: DataPoint) -> Dict[str, List[int]]:
     }
     trigger: Dict[str, Any] = cand.trigger
     entities: List[Dict] = cand.entities
-    for entity in entities:
+    distance_index: Dict[str, Any] = get_cand_distance_index(cand)
+    trigger_row: Optional[int] = distance_index['trigger_rows'].get(trigger['id'])
+    if trigger_row is None:
+        trigger_distances: List[int] = [get_entity_distance(trigger, entity) for entity in entities]
+    else:
+        trigger_distances: List[int] = distance_index['distances'][trigger_row]
+    for entity, distance in zip(entities, trigger_distances):
         if entity['id'] != trigger['id']:
-            distance: int = get_entity_distance(trigger, entity)
             entity_type: str = entity['entity_type']
             if entity_type in entity_trigger_distances:
                 entity_trigger_distances[entity_type].append(distance)
@@ -308,50 +453,64 @@ def get_entity_trigger_distances(cand: DataPoint) -> Dict[str, List[int]]:
 
 
 def get_closest_entity(cand: DataPoint) -> Optional[Dict]:
-    closest_entity: Optional[Dict] = None
-    min_distance: int = 10000
-    entities: List[Dict] = cand.entities
     trigger: Dict[str, Any] = cand.trigger
-    for entity in entities:
-        if entity['id'] != trigger['id']:
-            distance: int = get_entity_distance(trigger, entity)
-            if distance < min_distance:
-                closest_entity = entity
-                min_distance = distance
-    return closest_entity
+    distance_index: Dict[str, Any] = get_cand_distance_index(cand)
+    trigger_row: Optional[int] = distance_index['trigger_rows'].get(trigger['id'])
+    if trigger_row is not None:
+        closest_position: int = distance_index['closest_entities'][trigger_row]
+        return cand.entities[closest_position] if closest_position > -1 else None
+    return get_closest_entity_from_mask(trigger, cand, distance_index, distance_index['entity_ids'] != trigger['id'])
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['closest_entity'], level=CANDIDATE_LEVEL, entity_dependent=True)
 def pre_closest_entity_same_sentence(cand: DataPoint) -> Optional[Dict]:
     cand['closest_entity'] = get_closest_entity_same_sentence(cand)
     return cand
 
 
 def get_closest_entity_same_sentence(cand: DataPoint) -> Optional[Dict]:
-    closest_entity: Optional[Dict] = None
-    min_distance: int = 10000
     entities: List[Dict] = cand.entities
     trigger: Dict[str, Any] = cand.trigger
-    somajo_dictionary: Dict[str, Any] = cand.somajo_doc
-    sentences: List[Dict[str, Any]] = somajo_dictionary['sentences']
-    trigger_sentence = {'char_start': 0, 'char_end': len(cand.text)}
-    for sentence in sentences:
-        if sentence['char_start'] <= trigger['char_start'] and sentence['char_end'] >= trigger['char_end']:
-            trigger_sentence['char_start'] = sentence['char_start']
-            trigger_sentence['char_end'] = sentence['char_end']
-    same_sentence_entities = [entity for entity in entities
-                              if entity['char_start'] >= trigger_sentence['char_start'] and
-                              entity['char_end'] <= trigger_sentence['char_end']]
-    for entity in same_sentence_entities:
-        if entity['id'] != trigger['id']:
-            distance: int = get_entity_distance(trigger, entity)
-            if distance < min_distance:
-                closest_entity = entity
-                min_distance = distance
-    return closest_entity
+    distance_index: Dict[str, Any] = get_cand_distance_index(cand, same_sentence=True)
+    trigger_row: Optional[int] = distance_index['trigger_rows'].get(trigger['id'])
+    sentence_index: Dict[str, Any] = get_cand_sentence_index(cand)
+    trigger_sentence_id: int = get_sentence_id(trigger, sentence_index)
+    if trigger_sentence_id > -1 and trigger_row is not None:
+        closest_position: int = distance_index['closest_same_sentence_entities'][trigger_row]
+        return entities[closest_position] if closest_position > -1 else None
+    elif trigger_sentence_id > -1:
+        same_sentence_mask: np.ndarray = np.zeros(len(entities), dtype=bool)
+        same_sentence_mask[sentence_index['sentence_entities'][trigger_sentence_id]] = True
+    else:
+        same_sentence_mask: np.ndarray = np.array([entity['char_start'] >= 0 and entity['char_end'] <= len(cand.text)
+                                                   for entity in entities], dtype=bool)
+    return get_closest_entity_from_mask(trigger, cand, distance_index,
+                                        same_sentence_mask & (distance_index['entity_ids'] != trigger['id']))
 
 
-@preprocessor()
+def get_closest_entity_from_mask(trigger: Dict[str, Any], cand: DataPoint, distance_index: Dict[str, Any],
+                                 mask: np.ndarray) -> Optional[Dict]:
+    """
+    Returns the first entity with the minimal distance to the trigger among the entities selected by the mask.
+    Overlapping entities have the distance -1 and are therefore preferred.
+    :param trigger: Trigger.
+    :param cand: DataPoint.
+    :param distance_index: Distance index of the document.
+    :param mask: Boolean mask over the entity positions.
+    :return: Closest entity or None.
+    """
+    trigger_row: Optional[int] = distance_index['trigger_rows'].get(trigger['id'])
+    if trigger_row is None:
+        trigger_distances = np.array([get_entity_distance(trigger, entity) for entity in cand.entities], dtype=int)
+    else:
+        trigger_distances = distance_index['distance_matrix'][trigger_row]
+    candidate_positions: np.ndarray = np.flatnonzero(mask & (trigger_distances < 10000))
+    if len(candidate_positions) == 0:
+        return None
+    return cand.entities[candidate_positions[trigger_distances[candidate_positions].argmin()]]
+
+
+@memoized_preprocessor(fields=['sentence_trigger_distances'], level=CANDIDATE_LEVEL, entity_dependent=True)
 def pre_sentence_trigger_distances(cand: DataPoint) -> DataPoint:
     cand['sentence_trigger_distances']: Dict[str, int] = get_sentence_trigger_distances(cand)
     return cand
@@ -363,28 +522,28 @@ def get_sentence_trigger_distances(cand: DataPoint) -> Dict[str, int]:
     :param cand:
     :return: Distances from argument to triggers of the same sentence.
     """
-    somajo_dictionary: Dict[str, Any] = cand.somajo_doc
-    sentences: List[Dict[str, Any]] = somajo_dictionary['sentences']
+    sentence_index: Dict[str, Any] = get_cand_sentence_index(cand)
     argument: Dict[str, Any] = cand.argument
+    argument_sentence_id: int = get_sentence_id(argument, sentence_index)
 
     sentence_trigger_distances: Dict[str, int] = {}
+    if argument_sentence_id < 0:
+        return sentence_trigger_distances
+    distance_index: Dict[str, Any] = get_cand_distance_index(cand, same_sentence=True)
+    trigger_rows: Dict[str, int] = distance_index['trigger_rows']
+    argument_idx: Optional[int] = distance_index['entity_positions'].get(argument['id'])
     event_triggers: List[Dict] = cand.event_triggers
     for event_trigger in event_triggers:
         trigger_id: str = event_trigger['id']
         if trigger_id != argument['id']:
-            trigger: Dict[str, Any] = get_entity(trigger_id, cand.entities)
-
-            tolerance: int = 0
-            for sentence in sentences:
-                sentence_start = sentence['char_start']
-                sentence_end = sentence['char_end']
-                m_start: int = min(trigger['char_start'], argument['char_start'])
-                m_end: int = max(trigger['char_end'], argument['char_end'])
-
-                if sentence_start <= m_start + tolerance and m_end <= sentence_end + tolerance:
-                    distance: int = get_entity_distance(trigger, argument)
-                    sentence_trigger_distances[trigger_id]: int = distance
-                    break
+            trigger_row: Optional[int] = trigger_rows.get(trigger_id)
+            if trigger_row is None or argument_idx is None:
+                trigger: Dict[str, Any] = get_entity(trigger_id, cand.entities, cand.get('entity_index'))
+                if get_sentence_id(trigger, sentence_index) == argument_sentence_id:
+                    sentence_trigger_distances[trigger_id]: int = get_entity_distance(trigger, argument)
+            elif distance_index['same_sentence'][trigger_row, argument_idx]:
+                distance: int = distance_index['distances'][trigger_row][argument_idx]
+                sentence_trigger_distances[trigger_id]: int = distance
     return sentence_trigger_distances
 
 
@@ -399,7 +558,98 @@ def get_entity_distance(entity1: Dict[str, Any], entity2: Dict[str, Any]) -> int
         return -1
 
 
-@preprocessor()
+def get_distance_index(entities: List[Dict[str, Any]],
+                       sentence_index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Computes the token distances between all triggers and all entities of a document at once, so that the distance
+    based preprocessors and labeling functions do not have to recompute them for every candidate.
+    Overlapping trigger entity pairs have the distance -1 like in get_entity_distance.
+    :param entities: Entities of the document.
+    :param sentence_index: Sentence index of the document, used to compute the same sentence mask.
+    :return: Dictionary containing the trigger id to matrix row mapping (trigger_rows), the entity id to matrix
+    column mapping (entity_positions), the trigger x entity distance matrix (distance_matrix) and its rows as lists
+    for cheap scalar access (distances), the trigger x entity same sentence mask (same_sentence, None if no sentence
+    index is given), the position of the closest entity for each trigger overall (closest_entities) and within the
+    same sentence (closest_same_sentence_entities) and the entity ids (entity_ids).
+    """
+    if isinstance(entities, EntityTable):
+        starts: np.ndarray = entities.spans[:, document_model.START].astype(int)
+        ends: np.ndarray = entities.spans[:, document_model.END].astype(int)
+        trigger_positions: List[int] = np.flatnonzero(entities.type_ids == entities.get_type_id('trigger')).tolist()
+    else:
+        starts: np.ndarray = np.array([entity['start'] for entity in entities], dtype=int)
+        ends: np.ndarray = np.array([entity['end'] for entity in entities], dtype=int)
+        trigger_positions: List[int] = [idx for idx, entity in enumerate(entities)
+                                        if entity['entity_type'] == 'trigger']
+    trigger_starts: np.ndarray = starts[trigger_positions]
+    trigger_ends: np.ndarray = ends[trigger_positions]
+    right_distances: np.ndarray = starts[np.newaxis, :] - trigger_ends[:, np.newaxis]
+    left_distances: np.ndarray = trigger_starts[:, np.newaxis] - ends[np.newaxis, :]
+    distances: np.ndarray = np.where(right_distances >= 0, right_distances,
+                                     np.where(left_distances >= 0, left_distances, -1))
+    same_sentence: Optional[np.ndarray] = None
+    if sentence_index is not None:
+        entity_sentences: np.ndarray = np.array(sentence_index['entity_sentences'], dtype=int)
+        trigger_sentences: np.ndarray = entity_sentences[trigger_positions]
+        same_sentence = (trigger_sentences[:, np.newaxis] == entity_sentences[np.newaxis, :]) & \
+                        (trigger_sentences[:, np.newaxis] > -1)
+    entity_ids: np.ndarray = np.array([entity['id'] for entity in entities], dtype=object)
+    # closest entity per trigger that is not the trigger itself, the first one in case of ties like in a linear scan
+    candidate_mask: np.ndarray = (entity_ids[np.newaxis, :] != entity_ids[trigger_positions][:, np.newaxis]) & \
+                                 (distances < 10000)
+    closest_entities: List[int] = get_closest_positions(distances, candidate_mask)
+    closest_same_sentence_entities: Optional[List[int]] = None
+    if same_sentence is not None:
+        closest_same_sentence_entities = get_closest_positions(distances, candidate_mask & same_sentence)
+    entity_positions: Dict[str, int] = {}
+    for idx, entity in enumerate(entities):
+        entity_positions.setdefault(entity['id'], idx)
+    trigger_rows: Dict[str, int] = {}
+    for row, position in enumerate(trigger_positions):
+        # only use the row if the trigger id refers to this entity in lookups by id
+        if entity_positions[entities[position]['id']] == position:
+            trigger_rows[entities[position]['id']] = row
+    return {
+        'trigger_rows': trigger_rows,
+        'entity_positions': entity_positions,
+        'distance_matrix': distances,
+        'distances': distances.tolist(),
+        'same_sentence': same_sentence,
+        'closest_entities': closest_entities,
+        'closest_same_sentence_entities': closest_same_sentence_entities,
+        'entity_ids': entity_ids
+    }
+
+
+def get_closest_positions(distances: np.ndarray, mask: np.ndarray) -> List[int]:
+    """
+    :param distances: Trigger x entity distance matrix.
+    :param mask: Trigger x entity mask of the entities to consider.
+    :return: Position of the first entity with the minimal distance for each trigger, -1 if there is none.
+    """
+    if distances.size == 0:
+        return [-1] * distances.shape[0]
+    masked_distances: np.ndarray = np.where(mask, distances, np.iinfo(distances.dtype).max)
+    closest_positions: np.ndarray = masked_distances.argmin(axis=1)
+    return np.where(mask.any(axis=1), closest_positions, -1).tolist()
+
+
+def get_cand_distance_index(cand: DataPoint, same_sentence: bool = False) -> Dict[str, Any]:
+    """
+    Returns the distance index that was attached to the document during preprocessing or builds it if it is missing.
+    :param cand: DataPoint.
+    :param same_sentence: Whether the same sentence mask is required.
+    :return: Distance index of the document.
+    """
+    distance_index: Optional[Dict[str, Any]] = cand.get('distance_index')
+    if distance_index is None or len(distance_index['entity_ids']) != len(cand.entities) or \
+            (same_sentence and distance_index['same_sentence'] is None):
+        sentence_index = get_cand_sentence_index(cand) if same_sentence else cand.get('sentence_index')
+        distance_index = get_distance_index(cand.entities, sentence_index)
+    return distance_index
+
+
+@memoized_preprocessor(fields=['entity_type_freqs'], entity_dependent=True)
 def pre_entity_type_freqs(cand: DataPoint) -> DataPoint:
     cand['entity_type_freqs']: Dict[str, int] = get_entity_type_freqs(cand)
     return cand
@@ -452,7 +702,7 @@ def check_spans(tokens: List[str], text: str, entity_span: Tuple[int, int], matc
     return abs(len(glued_tokens) - m_end) <= tolerance
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['mixed_ner', 'mixed_ner_spans'], entity_dependent=True)
 def pre_mixed_ner(cand: DataPoint) -> DataPoint:
     """
     Builds mixed NER patterns from text and entities.
@@ -465,48 +715,116 @@ def pre_mixed_ner(cand: DataPoint) -> DataPoint:
     return cand
 
 
+def get_token_char_offsets(tokens: List[str], text: str) -> List[Optional[Tuple[int, int]]]:
+    """
+    Aligns the tokens with the text in a single pass.
+    Tokens that do not occur in the text, e.g. due to normalization, get no character offsets. The text skipped to
+    align the following token may only contain whitespaces and as many characters as the unaligned tokens.
+    :param tokens: Tokens of the document
+    :param text: Text of the document
+    :return: Character offsets for each token or None if the token could not be aligned
+    """
+    token_offsets: List[Optional[Tuple[int, int]]] = []
+    cursor = 0
+    unaligned_chars = 0
+    for token in tokens:
+        token_start = text.find(token, cursor) if token else -1
+        if token_start >= 0 and count_non_whitespace_chars(text[cursor:token_start]) <= unaligned_chars:
+            cursor = token_start + len(token)
+            token_offsets.append((token_start, cursor))
+            unaligned_chars = 0
+        else:
+            token_offsets.append(None)
+            unaligned_chars += len(token)
+    return token_offsets
+
+
+def get_glued_token_lengths(tokens: List[str]) -> Tuple[List[int], List[int]]:
+    """
+    Precomputes the values check_spans needs for every token based entity end, so that the check does not have to
+    join and scan the preceding tokens for every match.
+    :param tokens: Tokens of the document
+    :return: Length of the whitespace joined first k tokens and number of punctuation marks in the first k tokens
+    """
+    glued_lengths = [0]
+    punctuation_counts = [0]
+    for idx, token in enumerate(tokens):
+        glued_lengths.append(glued_lengths[-1] + len(token) + (1 if idx > 0 else 0))
+        punctuation_counts.append(punctuation_counts[-1] + (1 if token in punctuation_marks else 0))
+    return glued_lengths, punctuation_counts
+
+
+def find_entity_match(entity_text: str, text: str, glued_length: int, tolerance: int) -> Optional[Tuple[int, int]]:
+    """
+    Searches the first occurrence of the entity text whose end is plausible according to check_spans.
+    Only the part of the text within the tolerance around the expected end is searched.
+    :param entity_text: Text of the entity
+    :param text: Text of the document
+    :param glued_length: Length of the whitespace joined tokens up to the entity end
+    :param tolerance: Allowed deviation of the match end from glued_length
+    :return: Character offsets of the match or None
+    """
+    match_start = text.find(entity_text, max(0, glued_length - tolerance - len(entity_text)))
+    while 0 <= match_start and match_start + len(entity_text) <= glued_length + tolerance:
+        match_end = match_start + len(entity_text)
+        if abs(glued_length - match_end) <= tolerance:
+            return match_start, match_end
+        match_start = text.find(entity_text, match_start + 1)
+    return None
+
+
 def get_mixed_ner(cand: DataPoint) -> (str, List[Tuple[int, int]]):
     """
     Builds mixed NER patterns from text and entities.
-    :param cand:
-    :return:
+    Entities without character offsets are located via the character offsets of their tokens. If the tokens cannot
+    be aligned with the text, the entity text is searched close to where the token span suggests.
+    :param cand: DataPoint with at least text, tokens and entities
+    :return: Mixed NER pattern and list of entity spans in the same order as the entities
     """
-    # simple solution with additional token span check
-    mixed_ner: str = ''
+    mixed_ner_parts: List[str] = []
     offset: int = 0
-    mixed_ner_spans: List[Tuple[int, int]] = []
-    # TODO: ensure that entities are sorted according to their spans
-    entities: List[Dict] = cand.entities
-    for idx, entity in enumerate(entities):
-        if 'char_start' and 'char_end' in entity.keys():
+    mixed_ner_spans: List[Optional[Tuple[int, int]]] = [None] * len(cand.entities)
+    token_offsets: Optional[List[Optional[Tuple[int, int]]]] = None
+    glued_lengths: List[int] = []
+    punctuation_counts: List[int] = []
+    entity_order = sorted(range(len(cand.entities)),
+                          key=lambda i: (cand.entities[i]['start'], cand.entities[i]['end']))
+    for idx in entity_order:
+        entity = cand.entities[idx]
+        if 'char_start' in entity and 'char_end' in entity:
             match_start: int = entity['char_start']
             match_end: int = entity['char_end']
             assert cand.text[match_start:match_end] == entity['text'], \
                 f"Mismatch {cand.text[match_start:match_end]} {entity['text']} in:\n{cand.text}"
         else:
-            # simple text replace with search for entity text + check with token span?
-            entity_text = re.compile(escape_regex_chars(entity['text'], optional_hashtag=False))
-            matches = list(entity_text.finditer(cand.text))
-            relevant_match = next((match for match in matches if check_spans(cand.tokens, cand.text,
-                                                                             (entity['start'], entity['end']),
-                                                                             (match.start(), match.end()))), None)
+            if token_offsets is None:
+                token_offsets = get_token_char_offsets(cand.tokens, cand.text)
+                glued_lengths, punctuation_counts = get_glued_token_lengths(cand.tokens)
+            e_start, e_end = entity['start'], entity['end']
+            first_token = token_offsets[e_start] if 0 <= e_start < len(token_offsets) else None
+            last_token = token_offsets[e_end - 1] if 0 < e_end <= len(token_offsets) else None
+            if first_token and last_token and cand.text[first_token[0]:last_token[1]] == entity['text']:
+                relevant_match = (first_token[0], last_token[1])
+            else:
+                e_end = min(max(e_end, 0), len(cand.tokens))
+                # same tolerance as in check_spans
+                tolerance: int = 2 * punctuation_counts[e_end] + cand.text.count('\n')
+                relevant_match = find_entity_match(entity['text'], cand.text, glued_lengths[e_end], tolerance)
 
             if relevant_match is None:
                 print("Something went wrong")
                 print(entity)
-                mixed_ner = ''
-                mixed_ner_spans = []
-                break
+                return '', []
             else:
-                match_start = relevant_match.start()
-                match_end = relevant_match.end()
+                match_start, match_end = relevant_match
         # TODO: handle new line character differently
         #  replace with whitespace character adjust spans
-        mixed_ner += cand.text[offset:match_start] + entity['entity_type'].upper()
-        mixed_ner_spans.append((match_start, match_start + len(entity['entity_type'])))
+        mixed_ner_parts.append(cand.text[offset:match_start])
+        mixed_ner_parts.append(entity['entity_type'].upper())
+        mixed_ner_spans[idx] = (match_start, match_start + len(entity['entity_type']))
         offset = match_end
-    mixed_ner += cand.text[offset:]
-    return mixed_ner, mixed_ner_spans
+    mixed_ner_parts.append(cand.text[offset:])
+    return ''.join(mixed_ner_parts), mixed_ner_spans
 
 
 def get_spacy_doc_tokens(doc):
@@ -517,27 +835,83 @@ def get_spacy_doc_sentences(doc):
     return [s.text for s in doc.sents]
 
 
-def get_spacy_doc(cand: DataPoint):
+def get_spacy_doc_sentence_spans(doc) -> List[Dict[str, Any]]:
+    """
+    :param doc: spaCy Doc
+    :return: List of sentences with sentence text and spans (character and token level) like in
+    get_somajo_doc_sentences
+    """
+    return [{
+        'text': sentence.text,
+        'start': sentence.start,
+        'end': sentence.end,
+        'char_start': sentence.start_char,
+        'char_end': sentence.end_char
+    } for sentence in doc.sents]
+
+
+def get_spacy_sentence_component() -> str:
+    """
+    Determines the preferred component of the spaCy pipeline that sets sentence boundaries and adds a rule-based
+    sentencizer if there is none.
+    :return: Name of the sentence boundary component.
+    """
     load_spacy_model()
-    spacy_doc = nlp_spacy(cand.text)
-    doc = {
-        'doc': spacy_doc,
-        'tokens': get_spacy_doc_tokens(spacy_doc),
-        'sentences': get_spacy_doc_sentences(spacy_doc),  # preserves sentence texts
-        'trigger_text': nlp_spacy(get_entity(cand.trigger['id'], cand.entities)['text']),
-    }
-    if 'argument_id' in cand:
-        doc['argument_text'] = get_entity(cand.argument['id'], cand.entities)['text']
-    return doc
+    component_names = getattr(nlp_spacy, 'component_names', nlp_spacy.pipe_names)
+    sentence_component = next((name for name in spacy_sentence_components if name in component_names), None)
+    if sentence_component is None:
+        sentence_component = 'sentencizer'
+        if hasattr(nlp_spacy, 'enable_pipe'):
+            nlp_spacy.add_pipe(sentence_component)
+        else:
+            nlp_spacy.add_pipe(nlp_spacy.create_pipe(sentence_component))
+    return sentence_component
 
 
-@preprocessor()
+def get_spacy_doc_batch(texts: List[str], batch_size: int = 64) -> List[Dict[str, Any]]:
+    """
+    Performs tokenization and sentence splitting using spaCy on a batch of texts via nlp.pipe, only running the
+    pipeline components needed for sentence splitting.
+    :param texts: Document texts
+    :param batch_size: Number of texts spaCy processes at once
+    :return: List containing the token list and sentences for each text
+    """
+    sentence_component = get_spacy_sentence_component()
+    # e.g. senter is disabled by default in spaCy v3 pipelines
+    enable_sentence_component = sentence_component not in nlp_spacy.pipe_names
+    if enable_sentence_component:
+        nlp_spacy.enable_pipe(sentence_component)
+    # the parser listens to the shared token-to-vector layer
+    required_components = [sentence_component, 'tok2vec'] if sentence_component == 'parser' else [sentence_component]
+    disabled_components = [name for name in nlp_spacy.pipe_names if name not in required_components]
+    try:
+        return [{
+            'tokens': get_spacy_doc_tokens(spacy_doc),
+            'sentences': get_spacy_doc_sentence_spans(spacy_doc)
+        } for spacy_doc in nlp_spacy.pipe(texts, batch_size=batch_size, disable=disabled_components)]
+    finally:
+        if enable_sentence_component:
+            nlp_spacy.disable_pipe(sentence_component)
+
+
+def get_spacy_doc(cand: DataPoint) -> Dict[str, Any]:
+    """
+    Performs tokenization and sentence splitting using spaCy on the text of the DataPoint
+    :param cand: DataPoint with at least a text field
+    :return: Dictionary containing token list and sentences
+    """
+    return get_spacy_doc_batch([cand.text])[0]
+
+
+@memoized_preprocessor(fields=['spacy_doc'])
 def pre_spacy_doc(cand: DataPoint) -> DataPoint:
-    cand['spacy_doc'] = get_spacy_doc(cand)
+    # reuse the spacy_doc that was computed once for the document, e.g. via get_spacy_doc_batch
+    if not isinstance(cand.get('spacy_doc'), dict):
+        cand['spacy_doc'] = get_spacy_doc(cand)
     return cand
 
 
-def get_somajo_doc_tokens(doc: List[List[Token]]) -> List[str]:
+def get_somajo_doc_tokens(doc: List[List['Token']]) -> List[str]:
     doc_tokens = []
     for sentence in doc:
         for token in sentence:
@@ -559,65 +933,79 @@ def normalize_whitespaces(s):
     return normalized_ws
 
 
-def remap_sentence_boundaries(sentence_text: str, sentence_char_start: int, sentence_char_end: int, text: str) \
-        -> Tuple[int, int]:
+def get_whitespace_offset_map(text: str) -> Tuple[str, List[int]]:
+    """
+    Normalizes the whitespaces of the text like normalize_whitespaces in a single pass and keeps track of the
+    original character offset of every character in the normalized text
+    :param text: Original document text
+    :return: Normalized text and list mapping each normalized character offset to its original character offset
+    """
+    normalized_chars: List[str] = []
+    offsets: List[int] = []
+    previous_ws = False
+    for char_idx, char in enumerate(text):
+        if char.isspace():
+            if previous_ws:
+                continue
+            normalized_chars.append(' ')
+            previous_ws = True
+        else:
+            normalized_chars.append(char)
+            previous_ws = False
+        offsets.append(char_idx)
+    return ''.join(normalized_chars), offsets
+
+
+def remap_sentence_boundaries(sentence_text: str, normalized_start: int, normalized_text: str, offsets: List[int],
+                              text: str) -> Tuple[int, int, int]:
     """
     Uses information from SoMaJo sentence splitting and original text to retrieve correct character offsets for sentence
     :param sentence_text: Reconstructed sentence text from sentence tokens
-    :param sentence_char_start: Approximate start char
-    :param sentence_char_end: Approximate end char
+    :param normalized_start: Approximate start char in the whitespace normalized text
+    :param normalized_text: Whitespace normalized document text
+    :param offsets: Mapping from normalized character offsets to original character offsets
     :param text: Original document text
-    :return: Updated character offsets for sentence
-    """
-    char_start = sentence_char_start
-    char_end = sentence_char_end
-    cleaned_text = normalize_whitespaces(text)
-    removed_whitespaces = len(text) - len(cleaned_text)
-
-    for i in range(0, removed_whitespaces+1):
-        cleaned_sentence = normalize_whitespaces(text[char_start:char_end + i])
-        cleaned_text_lstrip = cleaned_sentence.lstrip()
-        stripped_leading_ws = len(cleaned_sentence) - len(cleaned_text_lstrip)
-        if stripped_leading_ws > 0:
-            char_start += stripped_leading_ws
-            cleaned_sentence = normalize_whitespaces(text[char_start:char_end + i])
-        if sentence_text == cleaned_sentence:
-            return char_start, char_end+i
+    :return: Updated character offsets for sentence and end char in the whitespace normalized text
+    """
+    if normalized_text.startswith(' ', normalized_start):
+        normalized_start += 1
+    normalized_end = normalized_start + len(sentence_text)
+    char_start = offsets[normalized_start] if normalized_start < len(offsets) else len(text)
+    if sentence_text and normalized_text.startswith(sentence_text, normalized_start):
+        return char_start, offsets[normalized_end - 1] + 1, normalized_end
+    char_end = min(char_start + len(sentence_text), len(text))
     logging.warning(f"Sentence boundary [A] and text substring [B] do not match, but could not be remapped: "
                     f"\n[A]{sentence_text}\n[B]{text[char_start:char_end]}")
-    return char_start, char_end
+    return char_start, char_end, min(normalized_end, len(normalized_text))
 
 
-def get_somajo_doc_sentences(doc: List[List[Token]], text: str) -> List[Dict[str, Any]]:
+def get_somajo_doc_sentences(doc: List[List['Token']], text: str) -> List[Dict[str, Any]]:
     """
-    Builds sentence dictionaries from SoMaJo sentence splitting and document text
+    Builds sentence dictionaries from SoMaJo sentence splitting and document text.
+    The whitespace normalized text and its offset mapping are built once per document, so that each sentence is
+    remapped in time linear to its length.
     :param doc: List of sentences, where each sentence is a list of SoMaJo tokens
     :param text: Original document text
     :return: List of sentences with sentence text and spans (character and token level)
     """
     sentences: List[Dict[str, Any]] = []
-    char_offset = 0
+    normalized_offset = 0
     token_idx = 0
     if len(doc) > 1:
+        normalized_text, offsets = get_whitespace_offset_map(text)
         for sentence in doc:
-            sentence_text = ""
-            add_space_after = False  # whether to increase char_offset after sentence end
+            sentence_tokens = []
             sentence_start = token_idx
             sentence_end = sentence_start
             for token in sentence:
                 sentence_end += 1
                 token_text = token.original_spelling if token.original_spelling else token.text
-                sentence_text += token_text
-                if token.space_after:
-                    if not token.last_in_sentence:
-                        sentence_text += " "
-                    else:
-                        add_space_after = True
-            sentence_char_start = char_offset
-            sentence_char_end = sentence_char_start + len(sentence_text)
-            sentence_char_start, sentence_char_end = remap_sentence_boundaries(sentence_text,
-                                                                               sentence_char_start,
-                                                                               sentence_char_end, text)
+                sentence_tokens.append(token_text)
+                if token.space_after and not token.last_in_sentence:
+                    sentence_tokens.append(" ")
+            sentence_text = "".join(sentence_tokens)
+            sentence_char_start, sentence_char_end, normalized_offset = remap_sentence_boundaries(
+                sentence_text, normalized_offset, normalized_text, offsets, text)
             tmp_sentence = {
                 'text': text[sentence_char_start:sentence_char_end],
                 'start': sentence_start,
@@ -627,9 +1015,6 @@ def get_somajo_doc_sentences(doc: List[List[Token]], text: str) -> List[Dict[str
             }
             sentences.append(tmp_sentence)
             token_idx = sentence_end
-            char_offset = sentence_char_end
-            if add_space_after:
-                char_offset += 1
     else:
         sentences.append({
             'text': text,
@@ -641,29 +1026,161 @@ def get_somajo_doc_sentences(doc: List[List[Token]], text: str) -> List[Dict[str
     return sentences
 
 
-@preprocessor()
+@memoized_preprocessor(fields=['somajo_doc'])
 def pre_somajo_doc(cand: DataPoint) -> DataPoint:
     cand['somajo_doc'] = get_somajo_doc(cand)
     return cand
 
 
-def get_somajo_doc(cand: DataPoint) -> Dict[str, Any]:
+def get_somajo_doc(cand: DataPoint, full_tokens: bool = False) -> Dict[str, Any]:
     """
     Performs tokenization and sentence splitting using SoMaJo on the text of the DataPoint
     :param cand: DataPoint with at least a text field
-    :return: Dictionary containing SoMaJo output, token list and sentences
+    :param full_tokens: Whether to keep the SoMaJo tokens, see build_somajo_doc
+    :return: Dictionary containing token list, sentences and optionally the SoMaJo output
     """
     load_somajo_model()
-    somajo_doc: List[List[Token]] = list(nlp_somajo.tokenize_text([cand.text]))
+    somajo_doc: List[List['Token']] = list(nlp_somajo.tokenize_text([cand.text]))
+    return build_somajo_doc(somajo_doc, cand.text, full_tokens=full_tokens)
+
 
+def build_somajo_doc(somajo_doc: List[List['Token']], text: str, full_tokens: bool = False) -> Dict[str, Any]:
+    """
+    Builds the somajo_doc dictionary from the SoMaJo sentences of a document.
+    The SoMaJo Token objects are only kept under 'doc' if full_tokens is set, e.g. for exploration, since the labeling
+    functions only need the token strings and sentence spans and the Token objects would otherwise be pickled with
+    every candidate.
+    :param somajo_doc: List of sentences, where each sentence is a list of SoMaJo tokens
+    :param text: Original document text
+    :param full_tokens: Whether to keep the SoMaJo output under 'doc'
+    :return: Dictionary containing token list, sentences and optionally the SoMaJo output
+    """
     doc = {
-        'doc': somajo_doc,
         'tokens': get_somajo_doc_tokens(somajo_doc),
-        'sentences': get_somajo_doc_sentences(somajo_doc, cand.text)
+        'sentences': get_somajo_doc_sentences(somajo_doc, text)
     }
+    if full_tokens:
+        doc['doc'] = somajo_doc
     return doc
 
 
+def count_non_whitespace_chars(text: str) -> int:
+    return sum(1 for char in text if not char.isspace())
+
+
+def split_somajo_sentences(sentences: List[List['Token']], texts: List[str]) -> Tuple[List[List[List['Token']]], int]:
+    """
+    Assigns the sentences SoMaJo produced for a batch of texts back to the individual texts.
+    SoMaJo does not split sentences across paragraphs, so the sentences of a text are consumed until their tokens
+    cover the non-whitespace characters of the text.
+    :param sentences: Sentences of all texts in the order of the texts
+    :param texts: Texts that were tokenized as one paragraph each
+    :return: List of sentences for each text that could be aligned and the number of aligned texts
+    """
+    somajo_docs: List[List[List['Token']]] = []
+    sentence_idx = 0
+    for text in texts:
+        target_chars = count_non_whitespace_chars(text)
+        covered_chars = 0
+        somajo_doc: List[List['Token']] = []
+        while covered_chars < target_chars and sentence_idx < len(sentences):
+            sentence = sentences[sentence_idx]
+            covered_chars += sum(count_non_whitespace_chars(token.original_spelling if token.original_spelling
+                                                            else token.text) for token in sentence)
+            somajo_doc.append(sentence)
+            sentence_idx += 1
+        if covered_chars != target_chars:
+            break
+        somajo_docs.append(somajo_doc)
+    return somajo_docs, len(somajo_docs)
+
+
+def get_somajo_doc_batch(texts: List[str], parallel: int = 1, full_tokens: bool = False) -> List[Dict[str, Any]]:
+    """
+    Performs tokenization and sentence splitting using SoMaJo on a batch of texts in a single SoMaJo call and splits
+    the results back per text. Texts that cannot be aligned with the SoMaJo output are tokenized one at a time.
+    SoMaJo drops empty paragraphs from a batch, so texts without non-whitespace characters are not passed to SoMaJo and
+    get the single empty sentence that SoMaJo returns for them on their own.
+    :param texts: Document texts
+    :param parallel: Number of processes SoMaJo uses for tokenization
+    :param full_tokens: Whether to keep the SoMaJo tokens, see build_somajo_doc
+    :return: List containing the token list, sentences and optionally the SoMaJo output for each text
+    """
+    load_somajo_model()
+    non_empty_texts = [text for text in texts if text.strip()]
+    sentences: List[List['Token']] = list(nlp_somajo.tokenize_text(non_empty_texts, parallel=parallel))
+    non_empty_docs, num_aligned = split_somajo_sentences(sentences, non_empty_texts)
+    if num_aligned < len(non_empty_texts):
+        logging.warning(f"Could not align SoMaJo output with text {num_aligned} of the batch, "
+                        f"tokenizing the remaining {len(non_empty_texts) - num_aligned} texts one at a time")
+        for text in non_empty_texts[num_aligned:]:
+            non_empty_docs.append(list(nlp_somajo.tokenize_text([text])))
+    non_empty_docs_iter = iter(non_empty_docs)
+    somajo_docs: List[List[List['Token']]] = [next(non_empty_docs_iter) if text.strip() else [[]] for text in texts]
+    return [build_somajo_doc(somajo_doc, text, full_tokens=full_tokens)
+            for somajo_doc, text in zip(somajo_docs, texts)]
+
+
+def get_sentence_index(sentences: List[Dict[str, Any]], entities: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Builds an index over the sentences of a document once, so that character offsets can be mapped to sentences via
+    binary search and the entities of a sentence do not have to be collected for every candidate.
+    :param sentences: Sentences with character offsets, e.g. from get_somajo_doc_sentences.
+    :param entities: Entities of the document.
+    :return: Dictionary containing the sentence start (starts) and end (ends) character offsets, the sentence id for
+    each entity position (entity_sentences, -1 if the entity is not within a sentence) and the entity positions for
+    each sentence (sentence_entities).
+    """
+    sentence_index: Dict[str, Any] = {
+        'starts': [sentence['char_start'] for sentence in sentences],
+        'ends': [sentence['char_end'] for sentence in sentences],
+        'entity_sentences': [],
+        'sentence_entities': [[] for _ in sentences]
+    }
+    for idx, entity in enumerate(entities):
+        sentence_id: int = get_sentence_id(entity, sentence_index)
+        sentence_index['entity_sentences'].append(sentence_id)
+        if sentence_id > -1:
+            sentence_index['sentence_entities'][sentence_id].append(idx)
+    return sentence_index
+
+
+def get_sentence_id(entity: Dict[str, Any], sentence_index: Dict[str, Any]) -> int:
+    """
+    :param entity: Entity with character offsets.
+    :param sentence_index: Sentence index of the document.
+    :return: Id of the sentence that contains the entity or -1 if the entity is not within a sentence.
+    """
+    sentence_id: int = bisect.bisect_right(sentence_index['starts'], entity['char_start']) - 1
+    if sentence_id > -1 and entity['char_end'] <= sentence_index['ends'][sentence_id]:
+        return sentence_id
+    return -1
+
+
+def get_cand_sentence_index(cand: DataPoint) -> Dict[str, Any]:
+    """
+    Returns the sentence index that was attached to the document during preprocessing or builds it from the SoMaJo
+    sentences if it is missing.
+    :param cand: DataPoint with somajo_doc.
+    :return: Sentence index of the document.
+    """
+    if 'sentence_index' in cand:
+        return cand.sentence_index
+    return get_sentence_index(cand.somajo_doc['sentences'], cand.entities)
+
+
+def get_same_sentence_id(cand: DataPoint) -> int:
+    """
+    :param cand: DataPoint with trigger and argument.
+    :return: Id of the sentence that contains both the trigger and the argument or -1 if there is no such sentence.
+    """
+    sentence_index: Dict[str, Any] = get_cand_sentence_index(cand)
+    trigger_sentence_id: int = get_sentence_id(cand.trigger, sentence_index)
+    if trigger_sentence_id == get_sentence_id(cand.argument, sentence_index):
+        return trigger_sentence_id
+    return -1
+
+
 def get_somajo_separate_sentence(cand: DataPoint) -> bool:
     """
     Checks based on the SoMaJo sentence splitting, whether the trigger and the argument of the DataPoint are in the
@@ -674,24 +1191,7 @@ def get_somajo_separate_sentence(cand: DataPoint) -> bool:
     assert 'somajo_doc' in cand, 'You need to run get_somajo_doc first and add somajo_doc to the dataframe.'
     if len(cand.somajo_doc['sentences']) == 1:
         return False
-    same_sentence: bool = False
-    tolerance: int = 0
-    trigger: Dict[str, Any] = cand.trigger
-    argument: Dict[str, Any] = cand.argument
-    somajo_doc: Dict[str, Any] = cand.somajo_doc
-    for sentence in somajo_doc['sentences']:
-        sentence_start = sentence['char_start']
-        sentence_end = sentence['char_end']
-        m_start: int = min(trigger['char_start'], argument['char_start'])
-        m_end: int = max(trigger['char_end'], argument['char_end'])
-
-        if sentence_start <= m_start + tolerance and m_end <= sentence_end + tolerance:
-            same_sentence = True
-            break
-    if same_sentence:
-        return False
-    else:
-        return True
+    return get_same_sentence_id(cand) < 0
 
 
 def get_sentence_entities(cand: DataPoint) -> List[Dict[str, Any]]:
@@ -702,22 +1202,11 @@ def get_sentence_entities(cand: DataPoint) -> List[Dict[str, Any]]:
     :return: Entities that are in the same sentence as the trigger-argument pair.
     """
     assert 'somajo_doc' in cand, "Need somajo_doc to retrieve sentence entities"
-    tolerance: int = 0
-    trigger: Dict[str, Any] = cand.trigger
-    argument: Dict[str, Any] = cand.argument
-    somajo_doc: Dict[str, Any] = cand.somajo_doc
+    sentence_id: int = get_same_sentence_id(cand)
+    if sentence_id < 0:
+        return []
     entities: List[Dict[str, Any]] = cand.entities
-    for sentence in somajo_doc['sentences']:
-        sentence_start = sentence['char_start']
-        sentence_end = sentence['char_end']
-        m_start: int = min(trigger['char_start'], argument['char_start'])
-        m_end: int = max(trigger['char_end'], argument['char_end'])
-
-        if sentence_start <= m_start + tolerance and m_end <= sentence_end + tolerance:
-            return [entity for entity in entities
-                    if sentence_start <= entity['char_start'] + tolerance and
-                    entity['char_end'] <= sentence_end + tolerance]
-    return []
+    return [entities[idx] for idx in get_cand_sentence_index(cand)['sentence_entities'][sentence_id]]
 
 
 def is_multiple_same_event_type(cand: DataPoint) -> bool:
@@ -735,7 +1224,7 @@ def get_event_types(cand: DataPoint) -> DataPoint:
     if 'event_triggers' in cand:
         event_types = []
         for event_trigger in cand.event_triggers:
-            entity: Dict[str, Any] = get_entity(event_trigger['id'], cand.entities)
+            entity: Dict[str, Any] = get_entity(event_trigger['id'], cand.entities, cand.get('entity_index'))
             label: int = np.asarray(event_trigger['event_type_probs']).argmax()
             event_types.append((entity['text'], (entity['char_start'], entity['char_end']), label))
         cand['event_types'] = event_types
@@ -748,11 +1237,12 @@ def get_event_arg_roles(cand: DataPoint) -> DataPoint:
         for event_role in cand.event_roles:
             role_label = np.asarray(event_role['event_argument_probs']).argmax()
             if role_label != 10:
-                trigger: Dict[str, Any] = get_entity(event_role['trigger'], cand.entities)
+                trigger: Dict[str, Any] = get_entity(event_role['trigger'], cand.entities, cand.get('entity_index'))
                 event_type = next((np.asarray(event_trigger['event_type_probs']).argmax()
                                    for event_trigger in cand.event_triggers
                                    if event_trigger['id'] == event_role['trigger']), 7)
-                argument: Dict[str, Any] = get_entity(event_role['argument'], cand.entities)
+                argument: Dict[str, Any] = get_entity(event_role['argument'], cand.entities,
+                                                      cand.get('entity_index'))
                 role_label = np.asarray(event_role['event_argument_probs']).argmax()
                 event_arg_roles.append(((trigger['text'], (trigger['char_start'], trigger['char_end']), event_type),
                                         (argument['text'], argument['entity_type'],
@@ -0,0 +1,78 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger('wsee')
+
+# Environment variable that overrides the default cache directory
+CACHE_DIR_ENV_VAR = 'WSEE_CACHE_DIR'
+
+
+def get_cache_dir(cache_dir: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Returns the cache directory: the given directory, the directory set in the WSEE_CACHE_DIR environment variable or
+    wsee in the user cache directory ($XDG_CACHE_HOME or ~/.cache).
+    :param cache_dir: Optional cache directory.
+    :return: Path of the cache directory.
+    """
+    if cache_dir is not None:
+        return Path(cache_dir)
+    if os.environ.get(CACHE_DIR_ENV_VAR):
+        return Path(os.environ[CACHE_DIR_ENV_VAR])
+    user_cache_dir = os.environ.get('XDG_CACHE_HOME') or Path.home().joinpath('.cache')
+    return Path(user_cache_dir).joinpath('wsee')
+
+
+def get_content_hash(path: Union[str, Path]) -> str:
+    """
+    :param path: Path of a file.
+    :return: SHA-256 hex digest of the file content.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_pickle(path: Union[str, Path]) -> Optional[Any]:
+    """
+    Loads a cached pickle.
+    :param path: Path of the pickle.
+    :return: Unpickled object or None if the file does not exist or cannot be unpickled.
+    """
+    try:
+        with open(path, 'rb') as pickled_file:
+            return pickle.load(pickled_file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache file {path}: {e}")
+        return None
+
+
+def dump_pickle_atomic(obj: Any, path: Union[str, Path]) -> bool:
+    """
+    Pickles an object into a temporary file next to the target and renames it to the target path. The rename is atomic,
+    so concurrent readers never see a partially written file and concurrent writers of the same content do not
+    interfere with each other.
+    :param obj: Object to pickle.
+    :param path: Path of the pickle.
+    :return: True if the object was written, False if the cache directory is not writable.
+    """
+    path = Path(path)
+    tmp_path = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=path.parent, prefix=path.name + '.', suffix='.tmp',
+                                         delete=False) as tmp_file:
+            tmp_path = tmp_file.name
+            pickle.dump(obj, tmp_file)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        logger.warning(f"Could not write cache file {path}: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
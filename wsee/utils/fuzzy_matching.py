@@ -0,0 +1,68 @@
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from fuzzywuzzy import process, utils as fuzzywuzzy_utils
+
+try:
+    from rapidfuzz import fuzz as rapidfuzz_fuzz, process as rapidfuzz_process
+except ImportError:
+    rapidfuzz_fuzz = None
+    rapidfuzz_process = None
+
+# Scores from this value upwards are identical for all keyword scorers
+EXACT_SCORE_CUTOFF = 80
+
+
+def fuzzywuzzy_scorer(texts: List[str], keywords: List[str]) -> List[int]:
+    """
+    Reference keyword scorer that matches one text at a time with fuzzywuzzy.
+    :param texts: Texts.
+    :param keywords: Keyword list.
+    :return: Best fuzzywuzzy WRatio score of each text against the keywords.
+    """
+    return [process.extractOne(text, keywords)[1] for text in texts]
+
+
+def full_process(s: str) -> str:
+    # same preprocessing as fuzzywuzzy's WRatio, which removes non-ASCII characters
+    return fuzzywuzzy_utils.full_process(s, force_ascii=True)
+
+
+def rapidfuzz_scorer(texts: List[str], keywords: List[str]) -> List[int]:
+    """
+    Batch keyword scorer that computes the WRatio scores of all texts against all keywords with a single rapidfuzz
+    cdist call. rapidfuzz finds optimal partial alignments, so its WRatio is never more than rounding below the
+    fuzzywuzzy WRatio. The keywords of a text that reach EXACT_SCORE_CUTOFF - 1 are therefore rescored with fuzzywuzzy,
+    which makes all scores from EXACT_SCORE_CUTOFF upwards, including the labeling function thresholds, identical to
+    the ones of fuzzywuzzy_scorer. Lower scores are only approximations.
+    :param texts: Texts.
+    :param keywords: Keyword list.
+    :return: Best WRatio score of each text against the keywords.
+    """
+    scores: np.ndarray = rapidfuzz_process.cdist(texts, keywords, scorer=rapidfuzz_fuzz.WRatio,
+                                                 processor=full_process)
+    best_scores: List[int] = []
+    for text, text_scores in zip(texts, scores):
+        close_keywords = [keywords[idx] for idx in np.flatnonzero(text_scores >= EXACT_SCORE_CUTOFF - 1)]
+        if close_keywords:
+            best_scores.append(process.extractOne(text, close_keywords)[1])
+        else:
+            best_scores.append(int(np.rint(text_scores.max())) if len(text_scores) else 0)
+    return best_scores
+
+
+keyword_scorers: Dict[str, Callable[[List[str], List[str]], List[int]]] = {'fuzzywuzzy': fuzzywuzzy_scorer}
+if rapidfuzz_process is not None:
+    keyword_scorers['rapidfuzz'] = rapidfuzz_scorer
+DEFAULT_KEYWORD_SCORER = 'rapidfuzz' if 'rapidfuzz' in keyword_scorers else 'fuzzywuzzy'
+
+
+def get_keyword_scorer(name: Optional[str] = None) -> Callable[[List[str], List[str]], List[int]]:
+    """
+    :param name: Name of the keyword scorer (rapidfuzz or fuzzywuzzy), defaults to rapidfuzz if it is installed.
+    :return: Function that scores a list of texts against a keyword list.
+    """
+    name = name or DEFAULT_KEYWORD_SCORER
+    if name not in keyword_scorers:
+        raise ValueError(f"Unknown or unavailable keyword scorer {name}, choose from {list(keyword_scorers)}")
+    return keyword_scorers[name]
@@ -0,0 +1,68 @@
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyMapping(Mapping):
+    """
+    Read-only mapping whose content is loaded on first access, e.g. parsed event pattern rules or gazetteers that are
+    passed to labeling functions as resources. The mapping object itself is created at import time, so it can be bound
+    to the labeling functions, while the loading cost is only paid by the processes that use it.
+    """
+
+    def __init__(self, loader: Callable[[], Dict], name: Optional[str] = None):
+        self.loader = loader
+        self.name = name or getattr(loader, '__name__', 'resource')
+        self._data: Optional[Dict] = None
+        self._derived: Dict[str, Any] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def load(self) -> Dict:
+        """
+        Loads the content if it has not been loaded yet.
+        :return: Loaded dictionary.
+        """
+        if self._data is None:
+            self._data = self.loader()
+        return self._data
+
+    def get_derived(self, name: str, factory: Callable[[Dict], Any]) -> Any:
+        """
+        Returns a value derived from the content, e.g. an index over it, which is computed once on first use. The
+        mapping is read-only, so the derived value never becomes stale.
+        :param name: Name of the derived value.
+        :param factory: Function that computes the value from the loaded dictionary.
+        :return: Derived value.
+        """
+        if name not in self._derived:
+            self._derived[name] = factory(self.load())
+        return self._derived[name]
+
+    def __getitem__(self, key) -> Any:
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+    def __contains__(self, key) -> bool:
+        return key in self.load()
+
+    def keys(self):
+        return self.load().keys()
+
+    def items(self):
+        return self.load().items()
+
+    def values(self):
+        return self.load().values()
+
+    def get(self, key, default=None) -> Any:
+        return self.load().get(key, default)
+
+    def __repr__(self):
+        return f"LazyMapping({self.name}, loaded: {self.loaded})"
@@ -6,10 +6,26 @@ import pandas as pd
 import numpy as np
 
 from wsee import SD4M_RELATION_TYPES, ROLE_LABELS, NEGATIVE_ARGUMENT_LABEL, NEGATIVE_TRIGGER_LABEL
-from wsee.preprocessors.preprocessors import get_entity
+from wsee.preprocessors.preprocessors import get_entity, get_entity_index
 from wsee.utils.encode import one_hot_encode
 
 
+class Candidate(dict):
+    """
+    Lightweight data point that supports both attribute (x.trigger) and item (x['trigger']) access like a
+    pd.Series row, so that preprocessors and labeling functions can be applied without building DataFrames.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
 def get_deep_copy(obj):
     return pickle.loads(pickle.dumps(obj))
 
@@ -128,6 +144,10 @@ def create_events(document):
     """
     formatted_events = []
     if 'entities' in document and 'event_triggers' in document and 'event_roles' in document:
+        entity_index = get_entity_index(document['entities'])
+        trigger_args = {}
+        for event_arg in document['event_roles']:
+            trigger_args.setdefault(event_arg['trigger'], []).append(event_arg)
         for event_trigger in document['event_triggers']:
             event_type_probs = np.asarray(event_trigger['event_type_probs'])
             if event_type_probs.sum() == 0.0:
@@ -136,9 +156,8 @@ def create_events(document):
             trigger_label = SD4M_RELATION_TYPES[trigger_label_idx]
             if trigger_label == NEGATIVE_TRIGGER_LABEL:
                 continue
-            trigger_entity = get_entity(event_trigger['id'], document['entities'])
-            relevant_args = [arg for arg in document['event_roles']
-                             if arg['trigger'] == event_trigger['id']]
+            trigger_entity = get_entity(event_trigger['id'], document['entities'], entity_index)
+            relevant_args = trigger_args.get(event_trigger['id'], [])
             formatted_args = []
             for event_arg in relevant_args:
                 event_argument_probs = np.asarray(event_arg['event_argument_probs'])
@@ -148,7 +167,7 @@ def create_events(document):
                 role_label = ROLE_LABELS[role_label_idx]
                 if role_label == NEGATIVE_ARGUMENT_LABEL:
                     continue
-                event_arg_entity = get_entity(event_arg['argument'], document['entities'])
+                event_arg_entity = get_entity(event_arg['argument'], document['entities'], entity_index)
                 event_arg_entity['role'] = role_label
                 formatted_args.append(event_arg_entity)
             formatted_event = {